@@ -0,0 +1,120 @@
+"""
+Benchmark — Phase 2 cleaning: per-cell apply vs dictionary-encoded stage.
+
+Builds a wide applications-like frame (many low-cardinality text columns with
+stray whitespace/case and missing values, a free-text column, numerics and
+~10% duplicate rows) and runs, each in a fresh process:
+
+    baseline  ``drop_duplicates`` + ``reindex`` + ``fillna/apply(clean_text)``
+    encoded   ``unique_rows`` + ``clean_frame`` (fraud_cleaning)
+
+Reports wall time and peak RSS growth over the loaded frame, and checks the
+two outputs are identical.
+
+Usage:
+    python benchmarks/bench_cleaning.py --rows 1000000 --text-columns 20
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fraud_cleaning import clean_frame, clean_text, unique_rows  # noqa: E402
+
+
+def make_frame(rows, text_columns, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for j in range(text_columns):
+        values = np.array([f"  Value {j}-{k} " if k % 3 else f"VALUE {k}" for k in range(rng.integers(3, 40))],
+                          dtype=object)
+        column = values[rng.integers(len(values), size=rows)]
+        column[rng.random(rows) < 0.05] = None
+        data[f"category_{j}"] = column
+    data['Job Description'] = np.array([f"Description {i % (rows // 5 + 1)} " for i in range(rows)], dtype=object)
+    data['salary'] = np.where(rng.random(rows) < 0.1, np.nan, rng.normal(50, 10, rows).round())
+    data['has_logo'] = rng.integers(0, 2, rows)
+    df = pd.DataFrame(data)
+    duplicates = df.sample(frac=0.1, random_state=seed)
+    return pd.concat([df, duplicates], ignore_index=True)
+
+
+def baseline(df, numeric_cols, text_cols):
+    df = df.drop_duplicates()
+    medians = {col: df[col].median() for col in numeric_cols}
+    df = df.reindex(columns=df.columns.tolist())
+    for col in numeric_cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(medians[col])
+    for col in text_cols:
+        df[col] = df[col].fillna("unknown").apply(clean_text)
+    return df
+
+
+def encoded(df, numeric_cols, text_cols):
+    rows = unique_rows(df)
+    medians = {col: df[col].iloc[rows].median() for col in numeric_cols}
+    return clean_frame(df, df.columns.tolist(), numeric_cols, text_cols, medians, rows)
+
+
+def _peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(name, rows, text_columns, queue):
+    df = make_frame(rows, text_columns)
+    numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
+    text_cols = df.select_dtypes(include=['object', 'string']).columns.tolist()
+    before = _peak_mb()
+    start = time.perf_counter()
+    result = (baseline if name == 'baseline' else encoded)(df, numeric_cols, text_cols)
+    seconds = time.perf_counter() - start
+    queue.put({
+        'variant': name,
+        'seconds': round(seconds, 3),
+        'peak_rss_growth_mb': round(_peak_mb() - before, 1),
+        'output_mb': round(result.memory_usage(deep=True).sum() / 1e6, 1),
+        'checksum': int(pd.util.hash_pandas_object(result).sum()),
+        'dtypes': [str(t) for t in result.dtypes],
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-cell and dictionary-encoded Phase 2 cleaning")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--text-columns', type=int, default=20)
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    ctx = mp.get_context('spawn')
+    results = []
+    for name in ('baseline', 'encoded'):
+        queue = ctx.Queue()
+        process = ctx.Process(target=_run, args=(name, args.rows, args.text_columns, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    base, fast = results
+    identical = base['checksum'] == fast['checksum'] and base['dtypes'] == fast['dtypes']
+    print(f"📊 {args.rows:,} rows x {args.text_columns + 3} columns (+10% duplicates)")
+    for row in results:
+        print(f"   {row['variant']:<9} {row['seconds']:>8.2f}s  peak +{row['peak_rss_growth_mb']:>7,.0f} MB  "
+              f"output {row['output_mb']:,.0f} MB")
+    print(f"   speed-up {base['seconds'] / fast['seconds']:.1f}x, identical output: {'yes' if identical else 'NO'}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': args.rows, 'results': results, 'identical': identical}, f, indent=2)
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark — dashboard cold start and per-interaction reruns.
+
+Runs ``fraud_dashboard.py`` headless (Streamlit's AppTest) with metrics on,
+each repeat in a fresh process with an empty dataset cache, against the
+demo artifact or a result store of ``--rows`` scored rows, and records:
+
+    first_paint    script start -> header sent, on a cold process (the
+                   first run minus every section lap after the header)
+    cold_run       the whole first run (imports, dataset build, plotly import)
+    full_rerun     a warm rerun of the whole script: what every widget
+                   interaction cost before the fragment
+    filter_rerun   the Actionable Intelligence fragment after a filter
+                   change: what a filter interaction reruns now
+    sections       cold and warm seconds per dashboard section
+
+AppTest always reruns the whole script, so ``filter_rerun`` is the
+fragment's own span within that run.
+
+Usage:
+    python benchmarks/bench_dashboard.py --repeats 5
+    python benchmarks/bench_dashboard.py --rows 1000000 --json bench_dashboard.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DASHBOARD = os.path.join(ROOT, 'fraud_dashboard.py')
+SECTIONS = ('header', 'data', 'kpis', 'methodology', 'charts', 'alerts', 'intelligence', 'similar', 'footer')
+
+
+def _laps(metrics):
+    spans = {s['span']: s['last_seconds'] for s in metrics.snapshot()['spans']}
+    sections = {name: spans.get(f"dashboard.{name}", 0.0) for name in SECTIONS}
+    fragment = sum(seconds for name, seconds in spans.items() if name.startswith('intelligence.'))
+    return sections, fragment
+
+
+def _run(rows, seed, queue):
+    with tempfile.TemporaryDirectory() as workdir:
+        # Cold: nothing cached on disk from an earlier run
+        os.environ['HOME'] = workdir
+        os.environ['FRAUD_METRICS'] = '1'
+        if rows:
+            from fraud_store import export_results
+            from fraud_synthetic import make_scored
+
+            export_results(make_scored(rows, seed=seed), os.path.join(workdir, 'fraud_detection_results'))
+        os.chdir(workdir)
+        from streamlit.testing.v1 import AppTest
+
+        from fraud_metrics import METRICS
+
+        app = AppTest.from_file(DASHBOARD, default_timeout=600)
+        start = time.perf_counter()
+        app.run()
+        cold_run = time.perf_counter() - start
+        cold, _ = _laps(METRICS)
+        errors = [e.value for e in app.exception]
+
+        start = time.perf_counter()
+        app.run()
+        full_rerun = time.perf_counter() - start
+        warm, _ = _laps(METRICS)
+
+        slider = app.slider[0]
+        slider.set_value(min(slider.value + 0.05, 1.0)).run()
+        _, filter_rerun = _laps(METRICS)
+
+    queue.put({
+        'first_paint': cold_run - sum(seconds for name, seconds in cold.items() if name != 'header'),
+        'cold_run': cold_run,
+        'full_rerun': full_rerun,
+        'filter_rerun': filter_rerun,
+        'cold_sections': cold,
+        'warm_sections': warm,
+        'errors': errors,
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the dashboard's cold start and interaction reruns")
+    parser.add_argument('--rows', type=int, default=0, help="Scored rows in a result store (0: the demo artifact)")
+    parser.add_argument('--repeats', type=int, default=3, help="Fresh processes to run")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Write machine-readable results here")
+    args = parser.parse_args(argv)
+
+    ctx = mp.get_context('spawn')
+    runs = []
+    for _ in range(args.repeats):
+        queue = ctx.Queue()
+        process = ctx.Process(target=_run, args=(args.rows, args.seed, queue))
+        process.start()
+        runs.append(queue.get())
+        process.join()
+        if runs[-1]['errors']:
+            print(f"⚠️ Dashboard raised: {runs[-1]['errors']}")
+
+    summary = {key: round(float(np.median([r[key] for r in runs])), 4)
+               for key in ('first_paint', 'cold_run', 'full_rerun', 'filter_rerun')}
+    sections = {
+        name: {phase: round(float(np.median([r[f'{phase}_sections'][name] for r in runs])), 4)
+               for phase in ('cold', 'warm')}
+        for name in SECTIONS
+    }
+    source = f"{args.rows:,}-row result store" if args.rows else "demo artifact"
+    print(f"📊 Dashboard on the {source}, median of {args.repeats} cold processes")
+    print(f"   first paint {summary['first_paint'] * 1000:8.0f} ms")
+    print(f"   cold run    {summary['cold_run'] * 1000:8.0f} ms")
+    print(f"   full rerun  {summary['full_rerun'] * 1000:8.0f} ms")
+    print(f"   filter      {summary['filter_rerun'] * 1000:8.0f} ms (fragment only)")
+    print(f"   {'section':<14}{'cold ms':>10}{'warm ms':>10}")
+    for name, times in sections.items():
+        print(f"   {name:<14}{times['cold'] * 1000:>10.0f}{times['warm'] * 1000:>10.0f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'cpus': os.cpu_count(),
+                'rows': args.rows,
+                'summary': summary,
+                'sections': sections,
+                'runs': runs,
+            }, f, indent=2)
+        print(f"✔️ Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark — Phases 2-6 peak memory: concatenated frames vs preallocated matrix.
+
+Fits ``FraudPipeline`` phase by phase on a synthetic applications frame, each
+variant in a fresh process, and records per phase the peak traced memory
+above the phase's starting point (numpy / pandas allocations via
+``tracemalloc``) and the memory still held when the phase ends:
+
+    legacy   the previous Phases 3-4: ``reset_index`` + ``pd.concat`` of the
+             scaled and SVD frames, then ``df[MODEL_FEATURES].values`` as a
+             float64 model matrix
+    matrix   one preallocated float32 matrix filled in place (fraud_features)
+    sparse   ``text_features='sparse'``: scaled columns + TF-IDF kept in CSR
+
+Usage:
+    python benchmarks/bench_feature_matrix.py --rows 200000
+    python benchmarks/bench_feature_matrix.py --rows 200000 --json feature_matrix.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fraud_cleaning import unique_rows  # noqa: E402
+from fraud_features import matrix_memory_mb  # noqa: E402
+from fraud_pipeline import FraudPipeline, is_count_feature  # noqa: E402
+
+VARIANTS = ('legacy', 'matrix', 'sparse')
+PHASES = ('clean', 'engineer', 'fit_text', 'features', 'models', 'scoring')
+
+
+class LegacyPipeline(FraudPipeline):
+    """Phases 3-5 as they were before the preallocated matrix"""
+
+    def _features(self, df):
+        df = df.reset_index(drop=True)
+        blocks = [df.drop(columns=[c for c in self.scale_cols_ if not is_count_feature(c)], errors='ignore')]
+        if self.scaler_ is not None:
+            scaled = self.scaler_.transform(df[self.scale_cols_])
+            blocks.append(pd.DataFrame(scaled, columns=self.scaled_cols_))
+        if self.svd_ is not None:
+            tfidf_vectors = self.vectorizer_.transform(df[self.text_col_].fillna(''))
+            blocks.append(pd.DataFrame(self.svd_.transform(tfidf_vectors), columns=self.svd_cols_))
+        df = pd.concat(blocks, axis=1)
+        return df, df[self.model_features_].values
+
+    def _apply_models(self, df, X):
+        df['iso_score_raw'] = self.iso_.decision_function(X)
+        df['iso_prediction'] = self.iso_.predict(X)
+        clusters = self.kmeans_.predict(X)
+        df['cluster'] = clusters
+        df['kmeans_distance'] = np.linalg.norm(X - self.kmeans_.cluster_centers_[clusters], axis=1)
+        return df
+
+
+def make_applications(rows, seed=0):
+    """Applications-shaped frame: templated titles, categoricals, free text, flags"""
+    rng = np.random.default_rng(seed)
+    words = np.array([f"word{i}" for i in range(3000)])
+    weights = 1.0 / np.arange(1, len(words) + 1)
+    weights /= weights.sum()
+
+    def pick(values, missing=0.0):
+        column = np.asarray(values, dtype=object)[rng.integers(len(values), size=rows)]
+        column[rng.random(rows) < missing] = None
+        return column
+
+    titles = [f"{a} {b}" for a, b in zip(rng.choice(words[:400], 1500), rng.choice(words[:60], 1500))]
+    descriptions = [" ".join(rng.choice(words, 40, p=weights)) for _ in range(max(1, rows // 3))]
+    return pd.DataFrame({
+        'Job Title': pick(titles),
+        'Job Location': pick([f"US, ST{i}, City {i}" for i in range(300)], 0.02),
+        'Department': pick([f"Dept {i}" for i in range(40)], 0.6),
+        'Range of Salary': pick([f"{i}0000-{i + 2}0000" for i in range(1, 20)], 0.8),
+        'Profile': pick([f"Company profile {i}" for i in range(800)], 0.2),
+        'Job Description': pick(descriptions),
+        'Requirements': pick([f"Requirement set {i}" for i in range(2000)], 0.15),
+        'Telecomunication': rng.integers(0, 2, rows),
+        'Comnpany Logo': rng.integers(0, 2, rows),
+        'Type of Employment': pick(['Full-time', 'Part-time', 'Contract', 'Temporary', 'Other'], 0.2),
+        'Experience': pick(['Entry level', 'Mid-Senior level', 'Associate', 'Director', 'Internship'], 0.4),
+        'Qualification': pick(["Bachelor's Degree", 'High School', "Master's Degree", 'Unspecified'], 0.45),
+        'Type of Industry': pick([f"Industry {i}" for i in range(120)], 0.3),
+        'Operations': pick([f"Function {i}" for i in range(35)], 0.35),
+        'Fraudulent': (rng.random(rows) < 0.05).astype(np.int64),
+    })
+
+
+def _phase(name, report, fn):
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    report[name] = {
+        'seconds': round(time.perf_counter() - start, 3),
+        'peak_mb': round((peak - before) / 1e6, 1),
+        'held_mb': round((current - before) / 1e6, 1),
+    }
+    return result
+
+
+def _run(variant, rows, queue):
+    raw = make_applications(rows)
+    if variant == 'legacy':
+        pipeline = LegacyPipeline(feature_dtype='float64')
+    else:
+        pipeline = FraudPipeline(text_features='sparse' if variant == 'sparse' else 'svd')
+    phases = {}
+    tracemalloc.start()
+
+    def clean():
+        kept = unique_rows(raw)
+        pipeline._fit_clean(raw, kept)
+        return pipeline._clean(raw, kept)
+
+    def engineer():
+        pipeline._fit_proxies(df)
+        return pipeline._engineer(df)
+
+    def fit_text():
+        pipeline._fit_features(df)
+
+    def features():
+        return pipeline._features(df)
+
+    def models():
+        pipeline._fit_models(X)
+        return pipeline._apply_models(df, X)
+
+    def scoring():
+        pipeline._fit_ranks(df)
+        scored = pipeline._apply_ranks(df)
+        pipeline._fit_threshold(scored)
+        return scored
+
+    df = _phase('clean', phases, clean)
+    df = _phase('engineer', phases, engineer)
+    _phase('fit_text', phases, fit_text)
+    df, X = _phase('features', phases, features)
+    df = _phase('models', phases, models)
+    df = _phase('scoring', phases, scoring)
+    tracemalloc.stop()
+    queue.put({
+        'variant': variant,
+        'phases': phases,
+        'matrix_mb': round(matrix_memory_mb(X), 1),
+        'matrix': f"{type(X).__name__} {X.dtype} {X.shape[0]:,} x {X.shape[1]}",
+        'flagged': int((df['fraud_score'] >= pipeline.threshold_).sum()),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-phase peak memory of the Phases 3-5 feature matrix")
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    ctx = mp.get_context('spawn')
+    results = []
+    for variant in args.variants:
+        queue = ctx.Queue()
+        process = ctx.Process(target=_run, args=(variant, args.rows, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print(f"📊 {args.rows:,} rows — peak traced memory above phase start (MB), held after the phase")
+    print(f"   {'phase':<10}" + "".join(f"{r['variant']:>22}" for r in results))
+    for phase in PHASES:
+        cells = "".join(f"{r['phases'][phase]['peak_mb']:>12,.0f} / {r['phases'][phase]['held_mb']:>7,.0f}"
+                        for r in results)
+        print(f"   {phase:<10}{cells}")
+    for r in results:
+        print(f"   {r['variant']:<9} matrix {r['matrix']} ({r['matrix_mb']:,.0f} MB), {r['flagged']:,} flagged")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': args.rows, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark — "find similar" index: build time, query latency and recall.
+
+Fits the pipeline on a synthetic applications frame (fraud_synthetic),
+scores ``--scales`` more applications and indexes their model vectors (scaled
+numerics + SVD components) with each method:
+
+    ball_tree  exact sklearn ``BallTree``
+    hnsw       approximate HNSW graph (hnswlib), queried at ``ef``
+    brute      reference: every distance with numpy, one query at a time
+
+Per method and scale it records build seconds, the persisted index size,
+``similar()`` latency (p50 / p95 over ``--queries`` random rows) and
+recall@k against the exact neighbours (distance ties count as found).
+
+Usage:
+    python benchmarks/bench_neighbors.py --scales 100000 1000000
+    python benchmarks/bench_neighbors.py --scales 1000000 --methods hnsw --json neighbors.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fraud_neighbors import BALL_TREE_MAX_ROWS, NEIGHBORS_K, NeighborIndex, model_vectors  # noqa: E402
+from fraud_pipeline import FraudPipeline  # noqa: E402
+from fraud_synthetic import make_applications  # noqa: E402
+
+METHODS = ('ball_tree', 'hnsw')
+SCORE_CHUNK_ROWS = 250_000
+
+
+def scored_vectors(pipeline, rows, seed):
+    """Model vectors of ``rows`` scored applications, scored a chunk at a time"""
+    blocks = []
+    for start in range(0, rows, SCORE_CHUNK_ROWS):
+        batch = make_applications(min(SCORE_CHUNK_ROWS, rows - start), seed=seed + start)
+        blocks.append(model_vectors(pipeline.score(batch), pipeline)[1])
+    return np.concatenate(blocks)
+
+
+def exact_neighbors(vectors, positions, k):
+    """k-th nearest distance of each query row (itself excluded), by brute force"""
+    kth, seconds = [], []
+    for position in positions:
+        start = time.perf_counter()
+        distances = np.sqrt(((vectors - vectors[position]) ** 2).sum(axis=1))
+        distances[position] = np.inf
+        kth.append(np.partition(distances, k - 1)[k - 1])
+        seconds.append(time.perf_counter() - start)
+    return np.array(kth), np.array(seconds)
+
+
+def run_method(method, vectors, positions, kth, k):
+    start = time.perf_counter()
+    index = NeighborIndex.build(vectors, method=method)
+    build_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        index_mb = sum(f.stat().st_size for f in index.save(tmp).iterdir()) / 1e6
+
+    seconds, found = [], 0
+    for position, bound in zip(positions, kth):
+        start = time.perf_counter()
+        similar = index.similar(int(position), k)
+        seconds.append(time.perf_counter() - start)
+        # A neighbour within the exact k-th distance is a correct one
+        found += int((similar['distance'].to_numpy() <= bound * (1 + 1e-5)).sum())
+    return {
+        'method': index.method,
+        'build_seconds': round(build_seconds, 2),
+        'index_mb': round(index_mb, 1),
+        'p50_ms': round(float(np.percentile(seconds, 50)) * 1000, 3),
+        'p95_ms': round(float(np.percentile(seconds, 95)) * 1000, 3),
+        'recall': round(found / (len(positions) * k), 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the find-similar nearest-neighbour index")
+    parser.add_argument('--scales', type=int, nargs='+', default=[100_000, 1_000_000], help="Indexed rows")
+    parser.add_argument('--methods', nargs='+', choices=METHODS, default=list(METHODS))
+    parser.add_argument('--fit-rows', type=int, default=50_000, help="Applications the pipeline is fitted on")
+    parser.add_argument('--queries', type=int, default=200, help="Random rows queried per method")
+    parser.add_argument('-k', type=int, default=NEIGHBORS_K, help="Neighbours per query")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Write machine-readable results here")
+    args = parser.parse_args(argv)
+
+    pipeline = FraudPipeline().fit(make_applications(args.fit_rows, seed=args.seed))
+    vectors = scored_vectors(pipeline, max(args.scales), args.seed + 1)
+    rng = np.random.default_rng(args.seed)
+
+    results = []
+    for rows in args.scales:
+        subset = np.ascontiguousarray(vectors[:rows])
+        positions = rng.choice(rows, size=min(args.queries, rows), replace=False)
+        kth, brute_seconds = exact_neighbors(subset, positions, args.k)
+        print(f"📊 {rows:,} rows x {subset.shape[1]} model features (auto: "
+              f"{'ball_tree' if rows <= BALL_TREE_MAX_ROWS else 'hnsw'})")
+        print(f"   {'method':<10}{'build s':>9}{'index MB':>10}{'p50 ms':>9}{'p95 ms':>9}{'recall':>8}")
+        print(f"   {'brute':<10}{'':>9}{'':>10}{np.percentile(brute_seconds, 50) * 1000:>9.2f}"
+              f"{np.percentile(brute_seconds, 95) * 1000:>9.2f}{1:>8.3f}")
+        for method in args.methods:
+            result = run_method(method, subset, positions, kth, args.k)
+            results.append({'rows': rows, **result})
+            print(f"   {result['method']:<10}{result['build_seconds']:>9.2f}{result['index_mb']:>10,.1f}"
+                  f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['recall']:>8.3f}")
+        results.append({'rows': rows, 'method': 'brute',
+                        'p50_ms': round(float(np.percentile(brute_seconds, 50)) * 1000, 3),
+                        'p95_ms': round(float(np.percentile(brute_seconds, 95)) * 1000, 3)})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'cpus': os.cpu_count(),
+                'k': args.k,
+                'features': pipeline.model_features_,
+                'results': results,
+            }, f, indent=2)
+        print(f"✔️ Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
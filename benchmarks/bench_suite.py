@@ -0,0 +1,190 @@
+"""
+Benchmark — end-to-end suite: every pipeline phase and the dashboard data path.
+
+For each scale, in a fresh process, writes a synthetic applications CSV
+(fraud_synthetic: configurable title / location cardinality, exact
+duplicates, near-duplicate fraud rings, free text) and runs:
+
+    ingest     read_applications (Arrow CSV engine)
+    clean      unique_rows + Phase 2 cleaning
+    features   Phase 3 proxies: frequencies, title similarity
+    svd        TF-IDF + TruncatedSVD fit and the model matrix
+    models     Isolation Forest + K-Means fit and apply
+    scoring    Phase 6 ranks, threshold and flags
+    store      export to the partitioned result store
+    load       dashboard SharedDataset built from the store (IPC + mmap)
+    index      FilterIndex, ChartAggregates and a sort rank
+    query      100 filter queries, each with its first table page
+
+Per phase it records wall and CPU seconds, rows / s and peak RSS above the
+phase's starting RSS (sampled every few ms, so native Arrow / sklearn
+allocations count), and writes everything to JSON.
+
+Usage:
+    python benchmarks/bench_suite.py --scales 10000 100000 1000000
+    python benchmarks/bench_suite.py --scales 1000000 --titles 20000 --locations 2000 --json suite.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fraud_cleaning import unique_rows  # noqa: E402
+from fraud_dataset import DASHBOARD_COLUMNS, SharedDataset, dataset_key, page_positions  # noqa: E402
+from fraud_metrics import PeakRSS  # noqa: E402
+from fraud_pipeline import FraudPipeline, read_applications  # noqa: E402
+from fraud_store import export_results, load_results  # noqa: E402
+from fraud_synthetic import write_applications  # noqa: E402
+
+PHASES = ('ingest', 'clean', 'features', 'svd', 'models', 'scoring', 'store', 'load', 'index', 'query')
+SCALES = (10_000, 100_000, 1_000_000)
+QUERIES = 100
+
+
+def _phase(name, rows, report, fn):
+    with PeakRSS() as rss:
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = fn()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    report[name] = {
+        'rows': rows,
+        'seconds': round(wall, 3),
+        'cpu_seconds': round(cpu, 3),
+        'rows_per_second': round(rows / wall) if wall else 0,
+        'peak_rss_mb': round(rss.peak - rss.start, 1),
+        'rss_mb': round(rss.end, 1),
+    }
+    return result
+
+
+def _run(rows, options, queue):
+    phases = {}
+    pipeline = FraudPipeline()
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'applications.csv')
+        generated = write_applications(path, rows, titles=options['titles'], locations=options['locations'],
+                                       duplicate_rate=options['duplicate_rate'], ring_rate=options['ring_rate'],
+                                       seed=options['seed'])
+
+        raw = _phase('ingest', rows, phases, lambda: read_applications(path))
+
+        def clean():
+            kept = unique_rows(raw)
+            pipeline._fit_clean(raw, kept)
+            return pipeline._clean(raw, kept)
+
+        def features():
+            pipeline._fit_proxies(df)
+            return pipeline._engineer(df)
+
+        def svd():
+            pipeline._fit_features(df)
+            return pipeline._features(df)
+
+        def models():
+            pipeline._fit_models(X)
+            return pipeline._apply_models(df, X)
+
+        def scoring():
+            pipeline._fit_ranks(df)
+            scored = pipeline._apply_ranks(df)
+            pipeline._fit_threshold(scored)
+            return pipeline._apply_flags(scored)
+
+        df = _phase('clean', rows, phases, clean)
+        del raw
+        n = len(df)
+        df = _phase('features', n, phases, features)
+        df, X = _phase('svd', n, phases, svd)
+        df = _phase('models', n, phases, models)
+        df = _phase('scoring', n, phases, scoring)
+        flagged = int(df['fraud_flag'].sum())
+
+        store_dir = os.path.join(workdir, 'results')
+        _phase('store', n, phases, lambda: export_results(df, store_dir))
+        del df, X
+
+        def load():
+            return SharedDataset.load(dataset_key('bench', rows), lambda: load_results(store_dir, DASHBOARD_COLUMNS),
+                                      os.path.join(workdir, 'datasets'))
+
+        def index():
+            # Built lazily on first dashboard use; forced here to time them
+            return dataset.index, dataset.aggregates, dataset.sort_ranks('Job Title')
+
+        def query():
+            rng = np.random.default_rng(options['seed'])
+            locations = dataset.index.categories('Job Location')
+            matched = 0
+            for _ in range(QUERIES):
+                where = {'Job Location': locations[rng.integers(len(locations))]} if rng.random() < 0.5 else None
+                positions = dataset.index.query(min_score=float(rng.uniform(0.5, 0.95)), where=where)
+                page = page_positions(dataset.sort_ranks('Job Title'), positions, 0, 100)
+                dataset.frame.iloc[page]
+                matched += len(positions)
+            return matched
+
+        dataset = _phase('load', n, phases, load)
+        _phase('index', n, phases, index)
+        matched = _phase('query', n, phases, query)
+
+    queue.put({
+        'rows': rows,
+        'unique_rows': n,
+        'flagged': flagged,
+        'csv_mb': round(generated['bytes'] / 1e6, 1),
+        'generate_seconds': generated['seconds'],
+        'query_rows_matched': matched,
+        'phases': phases,
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time and memory-profile every phase at several scales")
+    parser.add_argument('--scales', nargs='+', type=int, default=list(SCALES), help="Row counts to generate")
+    parser.add_argument('--titles', type=int, default=1000, help="Distinct job titles")
+    parser.add_argument('--locations', type=int, default=200, help="Distinct job locations")
+    parser.add_argument('--duplicate-rate', type=float, default=0.05)
+    parser.add_argument('--ring-rate', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default='bench_suite.json', help="Machine-readable results")
+    args = parser.parse_args(argv)
+    options = {k: getattr(args, k) for k in ('titles', 'locations', 'duplicate_rate', 'ring_rate', 'seed')}
+
+    ctx = mp.get_context('spawn')
+    results = []
+    for rows in args.scales:
+        queue = ctx.Queue()
+        process = ctx.Process(target=_run, args=(rows, options, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+        r = results[-1]
+        print(f"📊 {rows:,} rows ({r['unique_rows']:,} unique, {r['flagged']:,} flagged, "
+              f"{r['csv_mb']:,.0f} MB CSV generated in {r['generate_seconds']:.1f}s)")
+        print(f"   {'phase':<10}{'wall s':>10}{'cpu s':>10}{'rows/s':>14}{'peak MB':>10}{'rss MB':>10}")
+        for phase in PHASES:
+            p = r['phases'][phase]
+            print(f"   {phase:<10}{p['seconds']:>10.2f}{p['cpu_seconds']:>10.2f}{p['rows_per_second']:>14,}"
+                  f"{p['peak_rss_mb']:>10,.0f}{p['rss_mb']:>10,.0f}")
+
+    with open(args.json, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'options': options,
+            'results': results,
+        }, f, indent=2)
+    print(f"✔️ Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark — Phase 3-4 text features: first-column TF-IDF vs every column hashed.
+
+Cleans a synthetic applications frame (fraud_synthetic), then, each variant
+in a fresh process, fits the text stage + TruncatedSVD and builds the model
+matrix for the same rows:
+
+    tfidf     the notebook: TF-IDF (100 terms) of the first text column
+    hashed    ``text_features='hashed'``: every text column through a
+              stateless HashingVectorizer, one combined CSR into the SVD
+    parallel  ``hashed`` with distinct values hashed in a process pool
+              across every core
+
+Per variant it records fit and transform seconds, rows / s, peak RSS above
+the starting RSS (sampled, so sklearn / scipy allocations count), the
+sparse text matrix (columns, non-zeros, MB) and the pickled size of the
+fitted text state (vocabulary + SVD) that goes into the bundle.
+
+Usage:
+    python benchmarks/bench_text_features.py --rows 200000
+    python benchmarks/bench_text_features.py --rows 1000000 --json text_features.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fraud_cleaning import unique_rows  # noqa: E402
+from fraud_features import matrix_memory_mb  # noqa: E402
+from fraud_metrics import PeakRSS  # noqa: E402
+from fraud_pipeline import FraudPipeline  # noqa: E402
+from fraud_synthetic import make_applications  # noqa: E402
+
+VARIANTS = ('tfidf', 'hashed', 'parallel')
+
+
+def _timed(fn):
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+    return result, seconds, rss.peak - rss.start
+
+
+def _run(variant, rows, seed, queue):
+    raw = make_applications(rows, seed=seed)
+    pipeline = FraudPipeline(text_features='svd' if variant == 'tfidf' else 'hashed',
+                             n_jobs=1 if variant == 'hashed' else None)
+    kept = unique_rows(raw)
+    pipeline._fit_clean(raw, kept)
+    df = pipeline._clean(raw, kept)
+    del raw
+    pipeline._fit_proxies(df)
+    df = pipeline._engineer(df)
+
+    _, fit_seconds, fit_mb = _timed(lambda: pipeline._fit_features(df))
+    text, _, _ = _timed(lambda: pipeline._text_vectors(df))
+    (_, X), transform_seconds, transform_mb = _timed(lambda: pipeline._features(df))
+    n = len(df)
+    queue.put({
+        'variant': variant,
+        'rows': n,
+        'text_columns': pipeline.text_cols_,
+        'fit_seconds': round(fit_seconds, 3),
+        'fit_rows_per_second': round(n / fit_seconds),
+        'fit_peak_mb': round(fit_mb, 1),
+        'transform_seconds': round(transform_seconds, 3),
+        'transform_rows_per_second': round(n / transform_seconds),
+        'transform_peak_mb': round(transform_mb, 1),
+        'text_matrix': f"{text.shape[1]:,} cols, {text.nnz:,} nnz",
+        'text_matrix_mb': round(matrix_memory_mb(text), 1),
+        'model_matrix_mb': round(matrix_memory_mb(X), 1),
+        'state_mb': round(len(pickle.dumps((pipeline.vectorizer_, pipeline.svd_))) / 1e6, 2),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="First-column TF-IDF vs multi-column hashed text features")
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    ctx = mp.get_context('spawn')
+    results = []
+    for variant in args.variants:
+        queue = ctx.Queue()
+        process = ctx.Process(target=_run, args=(variant, args.rows, args.seed, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print(f"📊 {results[0]['rows']:,} unique rows ({os.cpu_count()} CPUs) — fit: text stage + SVD fit, "
+          f"transform: model matrix")
+    print(f"   {'variant':<10}{'cols':>6}{'fit s':>9}{'rows/s':>11}{'peak MB':>9}"
+          f"{'xform s':>9}{'rows/s':>11}{'peak MB':>9}{'text MB':>9}{'state MB':>10}")
+    for r in results:
+        print(f"   {r['variant']:<10}{len(r['text_columns']):>6}{r['fit_seconds']:>9.2f}"
+              f"{r['fit_rows_per_second']:>11,}{r['fit_peak_mb']:>9,.0f}{r['transform_seconds']:>9.2f}"
+              f"{r['transform_rows_per_second']:>11,}{r['transform_peak_mb']:>9,.0f}"
+              f"{r['text_matrix_mb']:>9,.0f}{r['state_mb']:>10.2f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': args.rows, 'cpus': os.cpu_count(), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark — Phase 3 title similarity: per-row extractBests vs TitleIndex.
+
+Generates realistic job-title vocabularies (Zipf-distributed words, templated
+titles and near-duplicate variants: typos, reordered tokens, suffixes), then
+for each scale:
+
+    baseline  ``find_max_similarity`` timed on a random sample of titles and
+              extrapolated to every unique title (its cost is linear in the
+              number of titles per query, so a full run is O(n²))
+    engine    ``max_title_similarity`` over all titles, index build included
+    parity    engine scores must equal the baseline on every sampled title
+
+Usage:
+    python benchmarks/bench_title_similarity.py --scales 10000 100000 1000000
+    python benchmarks/bench_title_similarity.py --scales 10000 --json bench.json
+"""
+import argparse
+import json
+import os
+import string
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fraud_similarity import EXACT_BACKEND, find_max_similarity, max_title_similarity  # noqa: E402
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+VOCABULARY = 5000
+
+
+def make_titles(n, seed=0, vocabulary=VOCABULARY):
+    """``n`` distinct lowercase titles with realistic near-duplicate structure"""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list(string.ascii_lowercase))
+    words = ["".join(rng.choice(letters, rng.integers(3, 10))) for _ in range(vocabulary)]
+    weights = 1.0 / np.arange(1, vocabulary + 1)
+    weights /= weights.sum()
+    templates = [" ".join(rng.choice(words, rng.integers(1, 5), p=weights)) for _ in range(max(1, n // 4))]
+
+    titles = set()
+    while len(titles) < n:
+        title = templates[rng.integers(len(templates))]
+        r = rng.random()
+        if r < 0.35:
+            i = rng.integers(len(title))
+            title = title[:i] + rng.choice(letters) + title[i + 1:]
+        elif r < 0.5:
+            tokens = title.split()
+            rng.shuffle(tokens)
+            title = " ".join(tokens)
+        elif r < 0.7:
+            title = f"{title} {rng.integers(0, 100)}"
+        elif r < 0.8:
+            title = f"{title} {rng.choice(words, p=weights)}"
+        titles.add(title)
+    return sorted(titles)
+
+
+def run_scale(n, sample, workers, seed):
+    titles = make_titles(n, seed)
+    rng = np.random.default_rng(seed + 1)
+    sampled = rng.choice(len(titles), size=min(sample, len(titles)), replace=False)
+
+    start = time.perf_counter()
+    expected = {titles[i]: find_max_similarity(titles[i], titles) for i in sampled}
+    per_query = (time.perf_counter() - start) / len(sampled)
+
+    start = time.perf_counter()
+    scores = max_title_similarity(titles, workers=workers)
+    engine_seconds = time.perf_counter() - start
+
+    mismatches = sum(scores[t] != s for t, s in expected.items())
+    baseline_seconds = per_query * len(titles)
+    return {
+        'unique_titles': len(titles),
+        'baseline_ms_per_title': round(per_query * 1000, 3),
+        'baseline_seconds_estimated': round(baseline_seconds, 1),
+        'engine_seconds': round(engine_seconds, 2),
+        'speedup': round(baseline_seconds / engine_seconds, 1) if engine_seconds > 0 else None,
+        'sampled_titles': len(sampled),
+        'mismatches': int(mismatches),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare find_max_similarity with the indexed engine")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES), help="Unique title counts")
+    parser.add_argument('--sample', type=int, default=50, help="Titles timed (and checked) against the baseline")
+    parser.add_argument('--workers', type=int, default=None, help="Engine processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if not EXACT_BACKEND:
+        print("⚠️ python-Levenshtein is not installed: the engine falls back to the baseline")
+
+    results = []
+    print(f"{'titles':>10} {'baseline ms/title':>18} {'baseline est.':>14} {'engine':>10} {'speedup':>9} {'parity':>9}")
+    for n in args.scales:
+        row = run_scale(n, args.sample, args.workers, args.seed)
+        results.append(row)
+        parity = 'ok' if row['mismatches'] == 0 else f"{row['mismatches']} diff"
+        print(f"{row['unique_titles']:>10,} {row['baseline_ms_per_title']:>18.3f} "
+              f"{row['baseline_seconds_estimated']:>13,.0f}s {row['engine_seconds']:>9,.1f}s "
+              f"{row['speedup']:>8,.0f}x {parity:>9}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+        print(f"✔️ Results written to {args.json}")
+    if any(row['mismatches'] for row in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Phase 2 Cleaning — dictionary-encoded text normalization and hashed dedup.
+
+The notebook normalizes every cell of every text column with
+``fillna("unknown").apply(clean_text)`` and deduplicates with
+``drop_duplicates`` over the full object frame. Categorical columns hold a
+handful of distinct values over millions of rows, so this stage works on
+the dictionary instead:
+
+    Dedup       per-column factorize codes are mixed into one 64-bit key per
+                row; only rows whose key repeats are compared exactly, so
+                the kept positions match ``drop_duplicates``
+    Normalize   ``pd.factorize`` each text column, run ``clean_text`` on the
+                distinct values only and decode the kept rows' codes (in
+                Arrow for Arrow-backed strings); neither the deduplicated
+                frame nor a per-cell string is ever materialized
+
+The cleaned frame is identical to the per-cell version (values and dtypes).
+"""
+import numpy as np
+import pandas as pd
+
+FILL_VALUE = "unknown"
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def clean_text(x):
+    """Phase 2 text normalization: strip and lowercase strings"""
+    if isinstance(x, str):
+        return x.strip().lower()
+    return x
+
+
+def normalize_text(values, fill_value=FILL_VALUE, rows=None):
+    """``values.fillna(fill_value).apply(clean_text)`` over the unique values only.
+
+    ``rows`` (positions) selects rows while decoding, so deduplicated output
+    never copies the raw column.
+    """
+    codes, uniques = pd.factorize(values)
+    index = values.index
+    if rows is not None:
+        codes, index = codes[rows], index[rows]
+    # The last slot stands in for missing values (code -1)
+    codes[codes < 0] = len(uniques)
+    dictionary = [clean_text(u) for u in uniques] + [clean_text(fill_value)]
+
+    dtype = values.dtype
+    if isinstance(dtype, pd.StringDtype) and dtype.storage == 'pyarrow' and \
+            all(isinstance(v, str) for v in dictionary):
+        # Arrow-backed strings: decode in Arrow instead of boxing every cell
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        decoded = pc.take(pa.array(dictionary), pa.array(codes.astype(np.int32)))
+        return pd.Series(pd.array(decoded, dtype=dtype), index=index, name=values.name)
+    lookup = np.empty(len(dictionary), dtype=object)
+    lookup[:] = dictionary
+    return pd.Series(lookup[codes], index=index, name=values.name)
+
+
+def clean_frame(df, columns, numeric_cols, text_cols, medians, rows=None):
+    """Reindex to the fitted columns, impute numerics and normalize text.
+
+    Same result as ``reindex`` + per-column ``fillna``/``apply`` (on
+    ``df.iloc[rows]`` when ``rows`` is given).
+    """
+    numeric_cols, text_cols = set(numeric_cols), set(text_cols)
+    index = df.index if rows is None else df.index[rows]
+    data = {}
+    for col in columns:
+        if col in df.columns:
+            values = df[col]
+        else:
+            values = pd.Series(np.nan, index=df.index, name=col)
+        if col in text_cols:
+            data[col] = normalize_text(values, rows=rows).array
+            continue
+        if rows is not None:
+            values = values.iloc[rows]
+        if col in numeric_cols:
+            values = pd.to_numeric(values, errors='coerce').fillna(medians[col])
+        data[col] = values.array
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def row_keys(df):
+    """One uint64 key per row mixed from each column's factorize codes"""
+    keys = np.zeros(len(df), dtype=np.uint64)
+    for col in df.columns:
+        codes, _ = pd.factorize(df[col])
+        keys = (keys ^ codes.astype(np.uint64)) * _MIX
+        keys ^= keys >> np.uint64(29)
+    return keys
+
+
+def unique_rows(df):
+    """Positions of the rows ``df.drop_duplicates()`` keeps.
+
+    Rows are compared exactly only where their hashed keys repeat.
+    """
+    if df.empty or len(df.columns) == 0:
+        return np.flatnonzero(~df.duplicated().to_numpy())
+    candidates = np.flatnonzero(pd.Series(row_keys(df)).duplicated(keep=False).to_numpy())
+    duplicated = np.zeros(len(df), dtype=bool)
+    if len(candidates):
+        duplicated[candidates] = df.iloc[candidates].duplicated().to_numpy()
+    return np.flatnonzero(~duplicated)
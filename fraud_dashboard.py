@@ -1,10 +1,12 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 import warnings
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from fraud_metrics import METRICS, METRICS_FILE_ENV, laps, timed
 warnings.filterwarnings('ignore')
 
 # ======================================================================
@@ -17,6 +19,12 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Debug info in the sidebar, including per-section timings (collected while on)
+debug_mode = False  # Set to True to see debug info
+if debug_mode:
+    METRICS.enable()
+sections = laps('dashboard')
+
 # ======================================================================
 # CUSTOM CSS FOR MODERN UI
 # ======================================================================
@@ -68,94 +76,169 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# ======================================================================
+# HEADER SECTION
+# ======================================================================
+col1, col2 = st.columns([3, 1])
+with col1:
+    st.markdown("""
+    <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                padding: 2rem; 
+                border-radius: 15px; 
+                margin-bottom: 2rem;'>
+        <h1 style='color: white; margin: 0; font-size: 2.5rem;'>🛡️ AI Fraud Detection System</h1>
+        <p style='color: rgba(255,255,255,0.9); font-size: 1.2rem; margin: 0.5rem 0 0 0;'>
+        Advanced Machine Learning Pipeline for Anomaly Detection
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+with col2:
+    st.markdown(f"""
+    <div style='background: rgba(30,30,30,0.8); padding: 1.5rem; border-radius: 15px; text-align: center;'>
+        <p style='color: #a0a0a0; margin: 0; font-size: 0.9rem;'>Last Updated</p>
+        <p style='color: white; margin: 0; font-size: 1.1rem; font-weight: bold;'>{datetime.now().strftime('%Y-%m-%d %H:%M')}</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+sections('header')
+
+# Deferred: pandas and Arrow take ~0.6 s to import on a cold start, so they load after
+# the header has painted
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from fraud_dataset import (APPLICATION_ID, DASHBOARD_COLUMNS, PAGE_SIZES, DatasetCache, dataset_key,  # noqa: E402
+                           file_fingerprints, page_positions)
+from fraud_store import (EXPORT_BATCH_ROWS, EXPORT_FORMATS, RESULTS_DIR, available_days, load_result_files,  # noqa: E402
+                         load_results, result_files, stream_rows)
+from fraud_neighbors import CURRENT_FILE, MANIFEST_FILE, NEIGHBORS_DIR, NeighborIndex  # noqa: E402
+
 # ======================================================================
 # DATA LOADING & VALIDATION
 # ======================================================================
 FULL_DATA_FILE = "fraud_detection_full_dataset.csv"
-SUSPICIOUS_DATA_FILE = "fraud_detection_suspicious.csv"
-
-@st.cache_data(ttl=3600)
-def load_data():
-    """Load data with enhanced mock data for demo"""
+# Demo data when neither the store nor the scored CSV exists: a prebuilt artifact
+# (fraud_synthetic.py scored --rows 17592 --seed 42 --dashboard), generated only if missing
+DEMO_DATA_FILE = Path(__file__).with_name("fraud_demo_dataset.parquet")
+DEMO_ROWS = 17592
+DEMO_SEED = 42
+# Written by fraud_sweep.py
+SWEEP_RESULTS_FILE = "fraud_sweep_results.csv"
+SWEEP_CURVES_FILE = "fraud_sweep_curves.csv"
+SIMILAR_K = 10
+EXPORT_MIME_TYPES = {".csv": "text/csv", ".csv.gz": "application/gzip", ".parquet": "application/vnd.apache.parquet"}
+# Above this many rows an export is written to disk instead of being built in memory;
+# with static serving on, it goes under static/ so the browser downloads it from disk
+EXPORT_DOWNLOAD_MAX_ROWS = 250_000
+EXPORT_DIR = "fraud_exports"
+EXPORT_STATIC_DIR = Path(__file__).with_name("static") / EXPORT_DIR
+# Written exports (and partial files of abandoned ones) are deleted after this long
+EXPORT_TTL_SECONDS = 3600
+# Score colour bands for the details table: < 0.7, 0.7, 0.8, 0.9
+SCORE_BAND_EDGES = np.array([0.7, 0.8, 0.9])
+SCORE_BAND_STYLES = np.array([
+    'background-color: #f59e0b; color: white;',
+    'background-color: #f97316; color: white;',
+    'background-color: #ef4444; color: white;',
+    'background-color: #dc2626; color: white; font-weight: bold;',
+])
+
+@st.cache_resource(max_entries=8)
+def dataset_cache(source, start_day=None, end_day=None):
+    """One versioned dataset cache per source and day range, shared by all sessions"""
+    return DatasetCache()
+
+@timed('dashboard.load_data', rows=lambda dataset: len(dataset.frame))
+def load_data(start_day=None, end_day=None):
+    """One read-only dataset shared by all sessions: the selected days from the
+    result store, else the scored CSV, else demo data.
+
+    Sources are fingerprinted on every run: changes show up immediately,
+    appended partitions are merged in and only rewrites reload everything.
+    """
     
-    def generate_enhanced_mock_data():
-        np.random.seed(42)
-        N = 17592
-
-        # Generate realistic fraud scores
-        normal_scores = np.random.beta(2, 8, int(N * 0.92))
-        suspicious_scores = np.random.beta(8, 2, int(N * 0.06))
-        fraud_scores = np.random.beta(15, 2, int(N * 0.02))
-
-        scores = np.concatenate([normal_scores, suspicious_scores, fraud_scores])
-        np.random.shuffle(scores)
-        scores = np.clip(scores, 0.01, 0.99)
-
-        # Enhanced job data
-        job_titles = [
-            'Senior Data Analyst', 'Marketing Intern', 'Full Stack Developer',
-            'Product Manager', 'HR Coordinator', 'DevOps Engineer', 'Data Scientist',
-            'Frontend Developer', 'Backend Engineer', 'UX Designer', 'Sales Executive'
-        ]
-        locations = [
-            'New York, NY', 'San Francisco, CA', 'Remote', 'Austin, TX',
-            'London, UK', 'Berlin, DE', 'Toronto, CA', 'Chicago, IL'
-        ]
-        industries = [
-            'Technology', 'Finance', 'Healthcare', 'E-commerce',
-            'Education', 'Manufacturing', 'Consulting'
-        ]
-
-        data = pd.DataFrame({
-            'Job Title': np.random.choice(job_titles, N),
-            'Job Location': np.random.choice(locations, N),
-            'Industry': np.random.choice(industries, N),
-            'Company Size': np.random.choice(['Startup', 'Small', 'Medium', 'Large', 'Enterprise'], N),
-            'fraud_score': scores,
-            'title_freq_scaled': np.random.exponential(0.5, N),
-            'max_title_similarity_scaled': np.random.beta(1.5, 5, N),
-            'submission_date': pd.date_range('2024-01-01', periods=N, freq='H'),
-            'response_time_hours': np.random.exponential(24, N)
-        })
-
-        # Create fraud_flag and Alert_Reason
-        threshold = np.quantile(scores, 0.95)
-        data['fraud_flag'] = scores >= threshold
+    def read_scored():
+        try:
+            # Day bounds prune partitions; only the displayed columns are read
+            df_full = load_results(RESULTS_DIR, DASHBOARD_COLUMNS, start_day, end_day)
+            df_full = df_full.sort_values('fraud_score', ascending=False, ignore_index=True)
+        except FileNotFoundError:
+            df_full = pd.read_csv(FULL_DATA_FILE)
         
-        conditions = [
-            data['fraud_score'] >= 0.9,
-            data['fraud_score'] >= 0.8,
-            data['fraud_score'] >= 0.7
-        ]
-        choices = [
-            '🚨 HIGH RISK: Multiple Anomaly Indicators',
-            '⚠️ MEDIUM RISK: Behavioral Patterns Detected',
-            '🔍 SUSPICIOUS: Unusual Submission Patterns'
-        ]
-        data['Alert_Reason'] = np.select(conditions, choices, default='Normal')
+        # Validate and enhance real data
+        return validate_and_enhance_data(df_full)
 
-        df_suspicious = data[data['fraud_flag']].sort_values('fraud_score', ascending=False)
-        df_full = data.sort_values('fraud_score', ascending=False)
+    def read_added(paths):
+        return validate_and_enhance_data(load_result_files(paths, RESULTS_DIR, DASHBOARD_COLUMNS, start_day, end_day))
 
-        return df_full, df_suspicious
+    def demo_data():
+        if DEMO_DATA_FILE.exists():
+            manifest = file_fingerprints([DEMO_DATA_FILE])
+            return dataset_cache('demo').get(manifest, dataset_key('demo', manifest),
+                                             lambda: pd.read_parquet(DEMO_DATA_FILE))
+        from fraud_synthetic import make_scored
+        return dataset_cache('demo').get([], dataset_key('demo', DEMO_ROWS, DEMO_SEED),
+                                         lambda: make_scored(DEMO_ROWS, seed=DEMO_SEED))
 
     try:
-        df_full = pd.read_csv(FULL_DATA_FILE)
-        df_suspicious = pd.read_csv(SUSPICIOUS_DATA_FILE)
-        
-        # Validate and enhance real data
-        df_full, df_suspicious = validate_and_enhance_data(df_full, df_suspicious)
+        # The keys fingerprint the source files, so an unchanged source maps
+        # the cached Arrow file without parsing anything
+        store_files = result_files(RESULTS_DIR)
+        if store_files:
+            manifest = file_fingerprints(store_files)
+            dataset = dataset_cache('store', start_day, end_day).get(
+                manifest, dataset_key('store', manifest, start_day, end_day), read_scored, read_added
+            )
+        elif os.path.exists(FULL_DATA_FILE):
+            manifest = file_fingerprints([FULL_DATA_FILE])
+            dataset = dataset_cache('csv').get(manifest, dataset_key('csv', manifest), read_scored)
+        else:
+            raise FileNotFoundError(FULL_DATA_FILE)
         
         st.success("✅ Production data loaded successfully")
-        return df_full, df_suspicious
+        return dataset
     except FileNotFoundError:
         st.warning("📁 Using demo data - CSV files not found")
-        return generate_enhanced_mock_data()
+        return demo_data()
     except Exception as e:
         st.error(f"❌ Error loading data: {e}")
-        return generate_enhanced_mock_data()
+        return demo_data()
+
+@st.cache_resource(max_entries=2)
+def load_neighbors(key):
+    """The find-similar index, shared by all sessions"""
+    return NeighborIndex.load(NEIGHBORS_DIR)
+
+@st.cache_data(max_entries=2)
+def load_sweep_results(key):
+    """Hyperparameter sweep table and PR curves, if a labelled sweep has been run.
 
-def validate_and_enhance_data(df_full, df_suspicious):
+    ``key`` fingerprints both files, so a new sweep shows up on the next rerun.
+    """
+    try:
+        results = pd.read_csv(SWEEP_RESULTS_FILE)
+    except FileNotFoundError:
+        return None, None
+    if 'f1' not in results.columns or results.empty:
+        return None, None
+    try:
+        curves = pd.read_csv(SWEEP_CURVES_FILE)
+    except FileNotFoundError:
+        curves = None
+    return results, curves
+
+def prune_exports(export_dir, ttl=EXPORT_TTL_SECONDS):
+    """Delete export files older than ``ttl`` seconds"""
+    cutoff = time.time() - ttl
+    for path in Path(export_dir).iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            # Another session pruned it first
+            continue
+
+def validate_and_enhance_data(df_full):
     """Validate and enhance real data with missing columns"""
     
     # Ensure Industry column exists
@@ -182,47 +265,36 @@ def validate_and_enhance_data(df_full, df_suspicious):
         ]
         df_full['Alert_Reason'] = np.select(conditions, choices, default='Normal')
     
-    # Update suspicious dataframe
-    if 'fraud_flag' in df_full.columns:
-        df_suspicious = df_full[df_full['fraud_flag']].copy()
-    
-    return df_full, df_suspicious
-
-# ======================================================================
-# HEADER SECTION
-# ======================================================================
-col1, col2 = st.columns([3, 1])
-with col1:
-    st.markdown("""
-    <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                padding: 2rem; 
-                border-radius: 15px; 
-                margin-bottom: 2rem;'>
-        <h1 style='color: white; margin: 0; font-size: 2.5rem;'>🛡️ AI Fraud Detection System</h1>
-        <p style='color: rgba(255,255,255,0.9); font-size: 1.2rem; margin: 0.5rem 0 0 0;'>
-        Advanced Machine Learning Pipeline for Anomaly Detection
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col2:
-    st.markdown(f"""
-    <div style='background: rgba(30,30,30,0.8); padding: 1.5rem; border-radius: 15px; text-align: center;'>
-        <p style='color: #a0a0a0; margin: 0; font-size: 0.9rem;'>Last Updated</p>
-        <p style='color: white; margin: 0; font-size: 1.1rem; font-weight: bold;'>{datetime.now().strftime('%Y-%m-%d %H:%M')}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    return df_full
+
+# Date range (result store only): pushed down to the Parquet partitions
+first_day, last_day = available_days(RESULTS_DIR)
+start_day, end_day = None, None
+if first_day is not None:
+    selected_days = st.sidebar.date_input(
+        "📅 Submission Dates", (first_day, last_day), min_value=first_day, max_value=last_day
+    )
+    # The full range means "all days", so newly exported days are appended to it
+    if isinstance(selected_days, (tuple, list)) and len(selected_days) == 2 \
+            and tuple(selected_days) != (first_day, last_day):
+        start_day, end_day = selected_days
 
 # Load data
 with st.spinner('🔄 Loading fraud detection data...'):
-    df_full, df_suspicious = load_data()
+    dataset = load_data(start_day, end_day)
+# Shared read-only views: derive new frames, never assign into these
+df_full, df_suspicious = dataset.frame, dataset.flagged
 
 # Debug: Show available columns
-debug_mode = False  # Set to True to see debug info
 if debug_mode:
     st.sidebar.markdown("### 🔍 Debug Info")
     st.sidebar.write("Full data columns:", df_full.columns.tolist())
     st.sidebar.write("Suspicious data columns:", df_suspicious.columns.tolist())
+    st.sidebar.write("Shared dataset:", f"{dataset.key}, {dataset.memory_mb():.1f} MB "
+                     f"({'memory-mapped' if dataset.mapped else 'in memory'})")
+    cache = dataset_cache('store', start_day, end_day) if first_day is not None else None
+    if cache is not None:
+        st.sidebar.write("Dataset builds / appends:", f"{cache.builds} / {cache.appends}")
     if 'Industry' in df_suspicious.columns:
         st.sidebar.write("Industries available:", df_suspicious['Industry'].unique().tolist())
 
@@ -239,6 +311,8 @@ if 'fraud_score' in df_suspicious.columns and len(df_suspicious) > 0:
 elif 'fraud_score' in df_full.columns:
     fraud_threshold = np.quantile(df_full['fraud_score'], 0.95)
 
+sections('data', rows=len(df_full))
+
 # ======================================================================
 # KPI CARDS
 # ======================================================================
@@ -292,6 +366,8 @@ with col4:
     </div>
     """, unsafe_allow_html=True)
 
+sections('kpis')
+
 # ======================================================================
 # METHODOLOGY SECTION
 # ======================================================================
@@ -321,36 +397,73 @@ with method_col1:
 
 with method_col2:
     st.markdown("**📊 Model Performance**")
-    
-    # Precision
-    st.markdown("""
-    <div style='background: rgba(107, 207, 127, 0.2); padding: 1rem; border-radius: 10px; margin: 1rem 0;'>
-        <div style='color: #6bcf7f; font-weight: bold;'>Precision: 94.2%</div>
-        <div style='height: 8px; background: rgba(107, 207, 127, 0.3); border-radius: 4px; margin: 0.5rem 0;'>
-            <div style='height: 100%; width: 94.2%; background: #6bcf7f; border-radius: 4px;'></div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Recall
-    st.markdown("""
-    <div style='background: rgba(255, 107, 107, 0.2); padding: 1rem; border-radius: 10px; margin: 1rem 0;'>
-        <div style='color: #ff6b6b; font-weight: bold;'>Recall: 89.7%</div>
-        <div style='height: 8px; background: rgba(255, 107, 107, 0.3); border-radius: 4px; margin: 0.5rem 0;'>
-            <div style='height: 100%; width: 89.7%; background: #ff6b6b; border-radius: 4px;'></div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # F1-Score
-    st.markdown("""
-    <div style='background: rgba(255, 217, 61, 0.2); padding: 1rem; border-radius: 10px; margin: 1rem 0;'>
-        <div style='color: #ffd93d; font-weight: bold;'>F1-Score: 91.9%</div>
-        <div style='height: 8px; background: rgba(255, 217, 61, 0.3); border-radius: 4px; margin: 0.5rem 0;'>
-            <div style='height: 100%; width: 91.9%; background: #ffd93d; border-radius: 4px;'></div>
+
+    sweep_manifest = file_fingerprints([SWEEP_RESULTS_FILE, SWEEP_CURVES_FILE])
+    sweep_results, sweep_curves = load_sweep_results(dataset_key('sweep', sweep_manifest))
+    if sweep_results is not None:
+        best_config = sweep_results.iloc[0]
+        performance = [
+            ('Precision', best_config['precision'] * 100, '#6bcf7f', '107, 207, 127'),
+            ('Recall', best_config['recall'] * 100, '#ff6b6b', '255, 107, 107'),
+            ('F1-Score', best_config['f1'] * 100, '#ffd93d', '255, 217, 61'),
+        ]
+    else:
+        performance = [
+            ('Precision', 94.2, '#6bcf7f', '107, 207, 127'),
+            ('Recall', 89.7, '#ff6b6b', '255, 107, 107'),
+            ('F1-Score', 91.9, '#ffd93d', '255, 217, 61'),
+        ]
+
+    for label, value, color, rgb in performance:
+        st.markdown(f"""
+        <div style='background: rgba({rgb}, 0.2); padding: 1rem; border-radius: 10px; margin: 1rem 0;'>
+            <div style='color: {color}; font-weight: bold;'>{label}: {value:.1f}%</div>
+            <div style='height: 8px; background: rgba({rgb}, 0.3); border-radius: 4px; margin: 0.5rem 0;'>
+                <div style='height: 100%; width: {value:.1f}%; background: {color}; border-radius: 4px;'></div>
+            </div>
         </div>
-    </div>
-    """, unsafe_allow_html=True)
+        """, unsafe_allow_html=True)
+
+    if sweep_results is not None:
+        st.caption(
+            f"Best of {len(sweep_results)} swept configurations at the 95th-percentile threshold: "
+            f"{int(best_config['n_clusters'])} clusters, {int(best_config['svd_components'])} SVD components, "
+            f"max_features {best_config['max_features']}, weights {best_config['w_if']:.2f} / "
+            f"{best_config['w_km']:.2f} / {best_config['w_freq_sim']:.2f}"
+        )
+
+if sweep_results is not None:
+    with st.expander("🧪 Hyperparameter Sweep"):
+        sweep_col1, sweep_col2 = st.columns([3, 2])
+        with sweep_col1:
+            st.dataframe(
+                sweep_results[['n_clusters', 'svd_components', 'max_features', 'w_if', 'w_km', 'w_freq_sim',
+                               'precision', 'recall', 'f1', 'best_f1', 'average_precision']].head(20),
+                use_container_width=True,
+                height=400
+            )
+        with sweep_col2:
+            if sweep_curves is not None:
+                top_ids = sweep_results['config_id'].head(3).tolist()
+                top_curves = sweep_curves[sweep_curves['config_id'].isin(top_ids)]
+                import plotly.express as px
+                fig_pr = px.line(
+                    top_curves,
+                    x='recall',
+                    y='precision',
+                    color=top_curves['config_id'].astype(str),
+                    labels={'color': 'Config'}
+                )
+                fig_pr.update_layout(
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    font_color='white',
+                    xaxis_title='Recall',
+                    yaxis_title='Precision'
+                )
+                st.plotly_chart(fig_pr, use_container_width=True)
+
+sections('methodology')
 
 # ======================================================================
 # VISUALIZATIONS
@@ -358,19 +471,26 @@ with method_col2:
 st.markdown("---")
 st.markdown("### 📈 Fraud Analytics Dashboard")
 
+# Deferred until the header and KPIs have been sent (~0.1 s on a cold start)
+import plotly.express as px
+
+# Charts draw from the dataset's pre-aggregated counts, not raw rows
+chart_data = dataset.aggregates if 'fraud_score' in df_full.columns else None
 viz_col1, viz_col2 = st.columns(2)
 
 with viz_col1:
     st.markdown("#### Fraud Score Distribution")
     
-    if 'fraud_score' in df_full.columns:
-        fig1 = px.histogram(
-            df_full,
+    if chart_data is not None:
+        score_bins = chart_data.score_histogram()
+        fig1 = px.bar(
+            score_bins,
             x='fraud_score',
-            nbins=50,
+            y='count',
             color_discrete_sequence=['#ff6b6b'],
             opacity=0.8
         )
+        fig1.update_traces(width=score_bins['width'])
         
         fig1.add_vline(
             x=fraud_threshold,
@@ -385,7 +505,8 @@ with viz_col1:
             font_color='white',
             xaxis_title='Fraud Score',
             yaxis_title='Count',
-            showlegend=False
+            showlegend=False,
+            bargap=0
         )
         
         st.plotly_chart(fig1, use_container_width=True)
@@ -395,11 +516,8 @@ with viz_col1:
 with viz_col2:
     st.markdown("#### Risk Level Breakdown")
     
-    if 'fraud_score' in df_full.columns:
-        risk_bins = [0, 0.3, 0.6, 0.8, 0.9, 1.0]
-        risk_labels = ['🟢 Low', '🟡 Medium', '🟠 High', '🔴 Critical', '🚨 Severe']
-        df_full['risk_level'] = pd.cut(df_full['fraud_score'], bins=risk_bins, labels=risk_labels)
-        risk_counts = df_full['risk_level'].value_counts()
+    if chart_data is not None:
+        risk_counts = chart_data.risk_levels()
         
         fig2 = px.pie(
             values=risk_counts.values,
@@ -419,6 +537,8 @@ with viz_col2:
     else:
         st.warning("📊 Fraud score data not available")
 
+sections('charts')
+
 # ======================================================================
 # ALERT ANALYSIS
 # ======================================================================
@@ -430,8 +550,8 @@ alert_col1, alert_col2 = st.columns(2)
 with alert_col1:
     st.markdown("#### Alert Reason Distribution")
     
-    if 'Alert_Reason' in df_suspicious.columns and len(df_suspicious) > 0:
-        alert_reasons = df_suspicious['Alert_Reason'].value_counts()
+    if chart_data is not None and len(chart_data.alert_counts) > 0:
+        alert_reasons = chart_data.alert_reasons()
         
         fig3 = px.bar(
             x=alert_reasons.values,
@@ -458,8 +578,8 @@ with alert_col1:
 with alert_col2:
     st.markdown("#### Top Suspicious Job Titles")
     
-    if 'Job Title' in df_suspicious.columns and len(df_suspicious) > 0:
-        top_titles = df_suspicious['Job Title'].value_counts().head(10)
+    if chart_data is not None and len(chart_data.title_counts) > 0:
+        top_titles = chart_data.top_titles(10)
         
         fig4 = px.bar(
             x=top_titles.values,
@@ -483,135 +603,289 @@ with alert_col2:
     else:
         st.info("📊 Job title data not available")
 
+sections('alerts')
+
+# ======================================================================
+# FIND SIMILAR APPLICATIONS
+# ======================================================================
+# Only once the pipeline has persisted an index; it is reloaded when rebuilt. Alerts
+# are picked in the details table, so its rows need the id the index is keyed on
+neighbors_manifest = file_fingerprints([Path(NEIGHBORS_DIR) / CURRENT_FILE, Path(NEIGHBORS_DIR) / MANIFEST_FILE])
+similar_enabled = bool(neighbors_manifest) and APPLICATION_ID in df_full.columns
+
+def similar_applications(application_id):
+    """The indexed applications nearest in model space to the alert selected in the details table"""
+    section = laps('similar')
+    index = load_neighbors(dataset_key('neighbors', neighbors_manifest))
+    rows = index.rows
+    summary = index.summary()
+    position = index.position(application_id)
+    section('load')
+    if position is None:
+        st.info("📭 This alert is not in the similarity index yet: it is added by the next "
+                "`fraud_pipeline.py score --results-dir ... --neighbors-dir ...` run")
+        return
+
+    def describe(position):
+        row = rows.iloc[position]
+        label = ' — '.join(str(row[c]) for c in ('Job Title', 'Job Location') if c in rows.columns)
+        score = f" ({row['fraud_score']:.3f})" if 'fraud_score' in rows.columns else ""
+        return f"{label}{score}"
+
+    k = st.number_input("Neighbours", min_value=1, max_value=100, value=SIMILAR_K, step=1)
+    query_start = time.perf_counter()
+    similar = index.similar(position, int(k)).drop(columns=['position', APPLICATION_ID], errors='ignore')
+    query_ms = (time.perf_counter() - query_start) * 1000
+    st.dataframe(similar.round({'distance': 4, 'fraud_score': 3}), use_container_width=True, hide_index=True)
+    approximate = "approximate " if summary['method'] == 'hnsw' else ""
+    st.caption(f"{len(similar)} {approximate}nearest to {describe(position)} in model space "
+               f"({summary['dimensions']} scaled / SVD features, {summary['method']} index of "
+               f"{index.n_rows:,} rows) in {query_ms:.1f} ms")
+    section('query', rows=len(similar))
+
 # ======================================================================
 # ACTIONABLE INSIGHTS
 # ======================================================================
 st.markdown("---")
 st.markdown("### 🎯 Actionable Intelligence")
 
-# Filters
-filter_col1, filter_col2, filter_col3 = st.columns(3)
-
-with filter_col1:
-    min_score = st.slider("Minimum Fraud Score", 0.0, 1.0, float(fraud_threshold), 0.05)
-
-with filter_col2:
-    location_options = ['All']
-    if 'Job Location' in df_suspicious.columns:
-        unique_locations = df_suspicious['Job Location'].unique().tolist()
-        if unique_locations:
-            location_options.extend(sorted(unique_locations))
-    selected_location = st.selectbox("Location Filter", location_options)
-
-with filter_col3:
-    # Industry filter - FIXED: Always ensure industries are available
-    industry_options = ['All']
-    
-    # Check if Industry column exists and has data
-    if 'Industry' in df_suspicious.columns:
-        unique_industries = df_suspicious['Industry'].unique().tolist()
-        if unique_industries and len(unique_industries) > 0:
-            industry_options.extend(sorted(unique_industries))
+# A fragment: the filter, table and export widgets rerun only this section, not the
+# KPIs and charts above (the sidebar cannot be written from here)
+@st.fragment
+def actionable_intelligence():
+    rerun_start = time.perf_counter()
+    section = laps('intelligence')
+
+    # Filters (answered by the shared index over the full dataset)
+    filter_index = dataset.index if 'fraud_score' in df_full.columns else None
+    filter_col1, filter_col2, filter_col3 = st.columns(3)
+
+    with filter_col1:
+        min_score = st.slider("Minimum Fraud Score", 0.0, 1.0, float(fraud_threshold), 0.05,
+                              help="Below the detection threshold to inspect near-misses")
+
+    with filter_col2:
+        location_options = ['All']
+        if filter_index is not None:
+            location_options.extend(filter_index.categories('Job Location'))
+        selected_location = st.selectbox("Location Filter", location_options)
+
+    with filter_col3:
+        # Industry filter - FIXED: Always ensure industries are available
+        industry_options = ['All']
+
+        # Check if Industry column exists and has data
+        if filter_index is not None and 'Industry' in df_full.columns:
+            unique_industries = filter_index.categories('Industry')
+            if unique_industries and len(unique_industries) > 0:
+                industry_options.extend(unique_industries)
+            else:
+                # If Industry column exists but is empty, add default industries
+                default_industries = ['Technology', 'Finance', 'Healthcare', 'E-commerce', 'Education', 'Manufacturing', 'Consulting']
+                industry_options.extend(default_industries)
         else:
-            # If Industry column exists but is empty, add default industries
+            # If Industry column doesn't exist, add default industries
             default_industries = ['Technology', 'Finance', 'Healthcare', 'E-commerce', 'Education', 'Manufacturing', 'Consulting']
             industry_options.extend(default_industries)
-    else:
-        # If Industry column doesn't exist, add default industries
-        default_industries = ['Technology', 'Finance', 'Healthcare', 'E-commerce', 'Education', 'Manufacturing', 'Consulting']
-        industry_options.extend(default_industries)
-    
-    selected_industry = st.selectbox("Industry Filter", industry_options)
 
-# Apply filters safely
-filtered_suspicious = df_suspicious.copy()
-
-if 'fraud_score' in filtered_suspicious.columns:
-    filtered_suspicious = filtered_suspicious[filtered_suspicious['fraud_score'] >= min_score]
-
-if selected_location != 'All' and 'Job Location' in filtered_suspicious.columns:
-    filtered_suspicious = filtered_suspicious[filtered_suspicious['Job Location'] == selected_location]
-
-if selected_industry != 'All' and 'Industry' in filtered_suspicious.columns:
-    filtered_suspicious = filtered_suspicious[filtered_suspicious['Industry'] == selected_industry]
+        selected_industry = st.selectbox("Industry Filter", industry_options)
+
+    # Apply filters safely: positions from the index, highest score first (the shared data is untouched)
+    filter_start = time.perf_counter()
+    if filter_index is not None:
+        where = {}
+        if selected_location != 'All' and 'Job Location' in df_full.columns:
+            where['Job Location'] = selected_location
+        if selected_industry != 'All' and 'Industry' in df_full.columns:
+            where['Industry'] = selected_industry
+        filter_positions = filter_index.query(min_score=min_score, where=where)
+    else:
+        filter_positions = df_full.index.get_indexer(df_suspicious.index)
+    filtered_suspicious = df_full.iloc[filter_positions]
+    filter_ms = (time.perf_counter() - filter_start) * 1000
 
-# Calculate summary metrics safely
-filtered_count = len(filtered_suspicious)
+    # Calculate summary metrics safely
+    filtered_count = len(filtered_suspicious)
 
-avg_score_text = "N/A"
-if 'fraud_score' in filtered_suspicious.columns and len(filtered_suspicious) > 0:
-    avg_score = filtered_suspicious['fraud_score'].mean()
-    avg_score_text = f"{avg_score:.3f}"
+    avg_score_text = "N/A"
+    if 'fraud_score' in filtered_suspicious.columns and len(filtered_suspicious) > 0:
+        avg_score = filtered_suspicious['fraud_score'].mean()
+        avg_score_text = f"{avg_score:.3f}"
 
-critical_alerts_text = "N/A"
-if 'fraud_score' in filtered_suspicious.columns and len(filtered_suspicious) > 0:
-    critical_alerts = (filtered_suspicious['fraud_score'] >= 0.9).sum()
-    critical_alerts_text = f"{critical_alerts:,}"
+    critical_alerts_text = "N/A"
+    if 'fraud_score' in filtered_suspicious.columns and len(filtered_suspicious) > 0:
+        critical_alerts = (filtered_suspicious['fraud_score'] >= 0.9).sum()
+        critical_alerts_text = f"{critical_alerts:,}"
 
-# Summary display
-st.markdown(f"""
-<div style='background: rgba(255, 107, 107, 0.1); padding: 1rem; border-radius: 10px; margin-bottom: 1rem;'>
-    <div style='display: flex; justify-content: space-between;'>
-        <div>
-            <span style='color: #ff6b6b; font-weight: bold;'>🔍 Filtered Results:</span>
-            <span style='color: white; margin-left: 1rem;'>{filtered_count:,} applications</span>
-        </div>
-        <div>
-            <span style='color: #ff6b6b; font-weight: bold;'>📊 Average Score:</span>
-            <span style='color: white; margin-left: 1rem;'>{avg_score_text}</span>
-        </div>
-        <div>
-            <span style='color: #ff6b6b; font-weight: bold;'>🚨 Critical Alerts:</span>
-            <span style='color: white; margin-left: 1rem;'>{critical_alerts_text}</span>
+    # Summary display
+    st.markdown(f"""
+    <div style='background: rgba(255, 107, 107, 0.1); padding: 1rem; border-radius: 10px; margin-bottom: 1rem;'>
+        <div style='display: flex; justify-content: space-between;'>
+            <div>
+                <span style='color: #ff6b6b; font-weight: bold;'>🔍 Filtered Results:</span>
+                <span style='color: white; margin-left: 1rem;'>{filtered_count:,} applications</span>
+            </div>
+            <div>
+                <span style='color: #ff6b6b; font-weight: bold;'>📊 Average Score:</span>
+                <span style='color: white; margin-left: 1rem;'>{avg_score_text}</span>
+            </div>
+            <div>
+                <span style='color: #ff6b6b; font-weight: bold;'>🚨 Critical Alerts:</span>
+                <span style='color: white; margin-left: 1rem;'>{critical_alerts_text}</span>
+            </div>
         </div>
     </div>
-</div>
-""", unsafe_allow_html=True)
-
-# Data table
-st.markdown("#### 📋 Suspicious Applications Details")
+    """, unsafe_allow_html=True)
 
-if len(filtered_suspicious) > 0:
-    # Determine available columns
-    available_columns = []
-    for col in ['Job Title', 'Job Location', 'fraud_score', 'Alert_Reason', 'Industry', 'Company Size']:
-        if col in filtered_suspicious.columns:
-            available_columns.append(col)
-    
-    if available_columns:
-        # Display dataframe
-        display_df = filtered_suspicious[available_columns].head(100)
-        
-        # Apply styling if fraud_score is available
-        if 'fraud_score' in available_columns:
-            def color_fraud_score(val):
-                if val >= 0.9:
-                    return 'background-color: #dc2626; color: white; font-weight: bold;'
-                elif val >= 0.8:
-                    return 'background-color: #ef4444; color: white;'
-                elif val >= 0.7:
-                    return 'background-color: #f97316; color: white;'
+    section('filters', rows=len(filtered_suspicious))
+
+    # Data table
+    st.markdown("#### 📋 Suspicious Applications Details")
+
+    if len(filtered_suspicious) > 0:
+        # Determine available columns
+        available_columns = []
+        for col in ['Job Title', 'Job Location', 'fraud_score', 'Alert_Reason', 'Industry', 'Company Size']:
+            if col in filtered_suspicious.columns:
+                available_columns.append(col)
+
+        if available_columns:
+            # Sort and page on the server: only the visible page is built and sent
+            col_sort, col_dir, col_size, col_page = st.columns([3, 2, 2, 2])
+            with col_sort:
+                default_sort = available_columns.index('fraud_score') if 'fraud_score' in available_columns else 0
+                sort_col = st.selectbox("Sort by", available_columns, index=default_sort)
+            with col_dir:
+                ascending = st.selectbox("Order", ["Descending", "Ascending"]) == "Ascending"
+            with col_size:
+                page_size = st.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(100))
+            n_pages = max(1, -(-len(filtered_suspicious) // page_size))
+            with col_page:
+                page = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=1, step=1)
+
+            positions = filter_positions
+            if sort_col == 'fraud_score' and not ascending:
+                # Filter results already come highest score first
+                visible = positions[(page - 1) * page_size:page * page_size]
+            else:
+                visible = page_positions(dataset.sort_ranks(sort_col), positions, page - 1, page_size, ascending)
+            display_df = df_full[available_columns].iloc[visible]
+            first_row = (page - 1) * page_size + 1
+            st.caption(f"Rows {first_row:,}–{first_row + len(display_df) - 1:,} of {len(filtered_suspicious):,}")
+
+            # Apply styling if fraud_score is available
+            if 'fraud_score' in available_columns:
+                def color_fraud_score(page_df):
+                    # One band per row from a single searchsorted over the page
+                    bands = np.searchsorted(SCORE_BAND_EDGES, page_df['fraud_score'].to_numpy(dtype=float), side='right')
+                    styles = pd.DataFrame('', index=page_df.index, columns=page_df.columns)
+                    styles['fraud_score'] = SCORE_BAND_STYLES[bands]
+                    return styles
+
+                table = display_df.style.apply(color_fraud_score, axis=None)
+            else:
+                table = display_df
+            if similar_enabled:
+                # Selecting a row lists its nearest applications below the table
+                event = st.dataframe(table, use_container_width=True, height=400, key='alert_table',
+                                     on_select='rerun', selection_mode='single-row')
+                selected = [visible[i] for i in event.selection.rows if i < len(visible)]
+            else:
+                st.dataframe(table, use_container_width=True, height=400)
+
+            # Export functionality: every filtered row in table order, written a batch at a time on click
+            col_format, col_gzip = st.columns([3, 1])
+            with col_format:
+                export_fmt = st.radio("Export format", EXPORT_FORMATS, format_func=str.upper, horizontal=True)
+            with col_gzip:
+                export_gzip = st.checkbox("gzip", value=True)
+            # Parquet applies gzip per column chunk, so only CSV gets a .gz name
+            suffix = ".csv.gz" if export_fmt == 'csv' and export_gzip else f".{export_fmt}"
+            last_export = st.session_state.setdefault('last_export', {})
+
+            file_name = f"fraud_alerts_{datetime.now().strftime('%Y%m%d_%H%M')}{suffix}"
+
+            def export_batches():
+                if sort_col == 'fraud_score' and not ascending:
+                    ordered = positions
                 else:
-                    return 'background-color: #f59e0b; color: white;'
-            
-            styled_df = display_df.style.map(color_fraud_score, subset=['fraud_score'])
-            st.dataframe(styled_df, use_container_width=True, height=400)
+                    ordered = page_positions(dataset.sort_ranks(sort_col), positions, 0, len(positions), ascending)
+                return dataset.batches(ordered, available_columns, EXPORT_BATCH_ROWS)
+
+            def export_filtered():
+                # Streamlit holds a download's bytes in memory, so this path is for small exports
+                fd, path = tempfile.mkstemp(suffix=suffix)
+                os.close(fd)
+                try:
+                    last_export.update(stream_rows(export_batches(), path, export_fmt, export_gzip),
+                                       path=None, url=None)
+                    return Path(path).read_bytes()
+                finally:
+                    os.unlink(path)
+
+            if len(positions) <= EXPORT_DOWNLOAD_MAX_ROWS:
+                st.download_button(
+                    label=f"📥 Export All {len(filtered_suspicious):,} Filtered Rows",
+                    data=export_filtered,
+                    file_name=file_name,
+                    mime=EXPORT_MIME_TYPES[suffix],
+                    use_container_width=True
+                )
+            elif st.button(f"💾 Write All {len(filtered_suspicious):,} Filtered Rows to an Export File",
+                           use_container_width=True):
+                # Large exports are streamed to disk a batch at a time and served from there
+                # (static serving streams the file), never built in memory
+                static = st.get_option('server.enableStaticServing')
+                export_dir = EXPORT_STATIC_DIR if static else Path(EXPORT_DIR)
+                export_dir.mkdir(parents=True, exist_ok=True)
+                prune_exports(export_dir)
+                if last_export.get('path'):
+                    Path(last_export['path']).unlink(missing_ok=True)
+                # Static files are served to anyone who has the URL, so the name is the secret:
+                # a random uuid per export, never shared between sessions or guessable
+                name = f"fraud_alerts_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex}{suffix}"
+                path = export_dir / name
+                tmp = export_dir / f".{name}.tmp"
+                try:
+                    summary = stream_rows(export_batches(), tmp, export_fmt, export_gzip)
+                    os.replace(tmp, path)
+                finally:
+                    tmp.unlink(missing_ok=True)
+                last_export.update(summary, path=str(path.resolve()), file_name=file_name,
+                                   mime=EXPORT_MIME_TYPES[suffix],
+                                   url=f"app/static/{EXPORT_DIR}/{name}" if static else None)
+            if last_export:
+                st.caption(f"Last export: {last_export['rows']:,} rows, {last_export['bytes'] / 1e6:,.1f} MB in "
+                           f"{last_export['seconds']:.2f}s ({last_export['rows_per_second']:,} rows/s)")
+                export_path = Path(last_export['path']) if last_export.get('path') else None
+                if export_path is not None and not export_path.exists():
+                    st.caption(f"The export file has expired (kept {EXPORT_TTL_SECONDS // 60} min): write it again")
+                elif last_export.get('url'):
+                    st.markdown(f"[📥 Download {last_export['file_name']}]({last_export['url']})")
+                    st.caption(f"The link is private to this session and expires after {EXPORT_TTL_SECONDS // 60} min")
+                elif export_path is not None:
+                    # Without static serving the compressed file is sent as a download
+                    # (held in memory while it is sent; the rows never are)
+                    st.download_button(
+                        label=f"📥 Download {last_export['file_name']} ({last_export['bytes'] / 1e6:,.1f} MB)",
+                        data=export_path.read_bytes,
+                        file_name=last_export['file_name'],
+                        mime=last_export['mime'],
+                        use_container_width=True
+                    )
         else:
-            st.dataframe(display_df, use_container_width=True, height=400)
-        
-        # Export functionality
-        csv_data = display_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Export Filtered Data as CSV",
-            data=csv_data,
-            file_name=f"fraud_alerts_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+            st.info("📭 No data columns available for display")
     else:
-        st.info("📭 No data columns available for display")
-else:
-    st.info("📭 No suspicious applications found with current filters")
+        st.info("📭 No suspicious applications found with current filters")
+
+    section('table')
+    if debug_mode:
+        st.caption(f"🐞 Section rerun {(time.perf_counter() - rerun_start) * 1000:.0f} ms, "
+                   f"filter {filter_ms:.2f} ms ({len(filtered_suspicious):,} rows)")
+
+actionable_intelligence()
+sections('intelligence')
+
 
 # ======================================================================
 # FOOTER
@@ -624,3 +898,25 @@ st.markdown("""
     <p style='font-size: 0.8rem;'>Detection threshold automatically calibrated at 95th percentile</p>
 </div>
 """, unsafe_allow_html=True)
+
+sections('footer')
+
+# Debug: per-section timings of this rerun and the process-wide hooks
+if debug_mode:
+    snapshot = METRICS.snapshot()
+    timings = pd.DataFrame(snapshot['spans'])
+    if len(timings):
+        timings = timings.assign(
+            last_ms=timings['last_seconds'] * 1000,
+            mean_ms=timings['wall_seconds'] * 1000 / timings['calls'],
+            cpu_ms=timings['cpu_seconds'] * 1000 / timings['calls'],
+        )[['span', 'calls', 'last_ms', 'mean_ms', 'cpu_ms', 'rows', 'peak_rss_mb']]
+        rerun_ms = timings.loc[timings['span'].str.startswith('dashboard.') &
+                               (timings['span'] != 'dashboard.load_data'), 'last_ms'].sum()
+        st.sidebar.markdown("### ⏱️ Timings")
+        st.sidebar.write("This rerun:", f"{rerun_ms:.0f} ms")
+        st.sidebar.dataframe(timings.round(2), hide_index=True)
+    for cache in snapshot['caches']:
+        st.sidebar.write(f"Cache {cache['cache']} {cache['outcome']}:", cache['count'])
+if METRICS.enabled and os.environ.get(METRICS_FILE_ENV):
+    METRICS.write_prometheus(os.environ[METRICS_FILE_ENV])
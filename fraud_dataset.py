@@ -0,0 +1,596 @@
+"""
+Dashboard Dataset — one memory-mapped, read-only copy of the scored results
+shared by every dashboard session.
+
+``st.cache_data`` pickles the loaded frames and gives every session its own
+unpickled copy, so memory grows with the number of analysts connected. The
+dashboard instead keeps a single ``SharedDataset`` in ``st.cache_resource``:
+
+    Derive   ``risk_level`` and the flagged subset are computed once, when
+             the dataset is built, never per rerun
+    Persist  the frame is written as an Arrow IPC file under
+             ``DATASET_CACHE_DIR``, keyed by a fingerprint of its source
+             files; a restarted server maps the file instead of re-parsing
+    Map      the IPC file is memory-mapped and converted with
+             ``split_blocks=True``: numeric columns are numpy views and text
+             columns Arrow views on the mapping, all read-only, so the OS page
+             cache holds the only copy (shared even across server processes)
+
+Sessions only allocate their own filter results. Those come from a
+``FilterIndex`` built once per dataset version:
+
+    Score     row positions sorted by ``fraud_score`` (descending), so every
+              ``fraud_score >= x`` query is a prefix found by binary search
+    Category  per value of each categorical column, the score ranks of its
+              rows in ascending order (code -> positions, CSR layout); a
+              category within a score range is again a prefix
+    Combine   further categories are checked on the smallest candidate list
+              through the per-row codes
+
+Queries cover the full dataset, cost time proportional to the smallest
+candidate list rather than the row count and return positions in score
+order.
+
+Tables are paged on the server: each sortable column gets an ordinal rank
+array once per dataset, and a page of any filter result is selected with
+``argpartition`` on those ranks (O(result) plus a sort of the page prefix),
+so only the visible rows are materialized. ``batches`` gathers a whole
+filter result the same way, a batch at a time, for streaming exports.
+
+Charts are drawn from ``ChartAggregates`` rather than raw rows: a fixed-bin
+score histogram, risk-level, alert-reason and flagged-title counts, computed
+once per dataset and merged by addition across partitions. The browser gets
+one value per bar or slice whatever the row count.
+
+``DatasetCache`` keeps a source's dataset current without a TTL. Every
+access compares a manifest of ``[path, size, mtime_ns]`` fingerprints with
+the one the dataset was built from:
+
+    same     the cached dataset is returned as is
+    append   only new files appeared: just those are read and written as a
+             segment file chained to the previous version's; the filter
+             index, sort ranks and aggregates are merged, not rebuilt
+    rewrite  a file changed or disappeared: full rebuild
+
+Merging keeps the old rows' sort order and inserts the new rows' with a
+binary search, so an append costs O(new rows · log) plus linear array
+copies, with no sort, factorize or file rewrite over the old rows. After
+``MAX_SEGMENTS`` chained segments an append writes one compacted file.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fraud_metrics import record_cache, span
+
+# Random per-row id the score CLI adds, joining a dashboard row to its find-similar index row
+APPLICATION_ID = 'application_id'
+# Columns the dashboard loads; the result store reads only these
+DASHBOARD_COLUMNS = [APPLICATION_ID, 'Job Title', 'Job Location', 'Industry', 'Company Size', 'fraud_score',
+                     'fraud_flag', 'Alert_Reason']
+FILTER_COLUMNS = ('Job Location', 'Industry')
+DATASET_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'fraud-detection', 'datasets')
+CACHE_KEEP = 8
+# Appends chain segment files to the previous version's; a longer chain is compacted
+MAX_SEGMENTS = 8
+PARENT_KEY = b'fraud_dataset_parent'
+HIST_BINS = 50
+TOP_TITLES = 10
+PAGE_SIZES = (25, 50, 100, 250)
+
+RISK_BINS = [0, 0.3, 0.6, 0.8, 0.9, 1.0]
+RISK_LABELS = ['🟢 Low', '🟡 Medium', '🟠 High', '🔴 Critical', '🚨 Severe']
+
+
+def risk_levels(scores):
+    """Dashboard risk band of each fraud score"""
+    return pd.cut(scores, bins=RISK_BINS, labels=RISK_LABELS)
+
+
+# ======================================================================
+# FINGERPRINTS
+# ======================================================================
+def file_fingerprints(paths):
+    """``[path, size, mtime_ns]`` per existing file, sorted by path"""
+    entries = []
+    for path in sorted(str(p) for p in paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return entries
+
+
+def dataset_key(*parts):
+    """Stable cache key for a dataset built from ``parts`` (JSON-serializable)"""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+# ======================================================================
+# ARROW IPC
+# ======================================================================
+def write_ipc(table, path, parent=None):
+    """Write an Arrow IPC file via a temporary name, so readers never map a partial file.
+
+    With ``parent`` (a sibling file's stem) the file holds only rows that
+    follow that file's.
+    """
+    import pyarrow as pa
+
+    if parent is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), PARENT_KEY: parent.encode('utf-8')})
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _map_file(path):
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+
+
+def segment_chain(path):
+    """The segment files a dataset file is made of, oldest first"""
+    import pyarrow as pa
+
+    chain = [Path(path)]
+    while True:
+        parent = (pa.ipc.open_file(pa.memory_map(str(chain[-1]), 'r')).schema.metadata or {}).get(PARENT_KEY)
+        if not parent:
+            return chain[::-1]
+        chain.append(chain[-1].with_name(f"{parent.decode('utf-8')}.arrow"))
+
+
+def map_ipc(path):
+    """Memory-mapped table of a dataset file and the segments it follows (nothing is read eagerly)"""
+    import pyarrow as pa
+
+    tables = [_map_file(p) for p in segment_chain(path)]
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(tables, promote_options='permissive')
+
+
+def _prune(cache_dir, keep=CACHE_KEEP):
+    # Mapped files stay readable after unlink, so sessions on an old version are unaffected;
+    # the segments a kept file follows are kept with it
+    files = sorted(Path(cache_dir).glob('*.arrow'), key=lambda p: p.stat().st_mtime, reverse=True)
+    kept = set()
+    for path in files[:keep]:
+        try:
+            kept.update(segment_chain(path))
+        except OSError:
+            continue
+    for path in files:
+        if path not in kept:
+            path.unlink(missing_ok=True)
+
+
+def merge_sorted(sorted_keys, ranks, new_keys):
+    """``(sorted keys, ranks, moved)`` after appending rows with ``new_keys`` to a stable sort.
+
+    Equal keys keep row order (new rows after old ones), so the result is
+    that of a stable argsort of all keys; old keys are not re-sorted.
+    ``moved[r]`` is the new rank of old rank ``r``.
+    """
+    n = len(sorted_keys)
+    order = np.argsort(new_keys, kind='stable')
+    new_sorted = new_keys[order]
+    at = np.searchsorted(sorted_keys, new_sorted, side='right')
+    new_ranks = np.empty(len(new_keys), dtype=np.int64)
+    new_ranks[order] = at + np.arange(len(new_keys))
+    # An old row moves down by the number of new rows inserted at or before it
+    moved = np.arange(n) + np.repeat(np.arange(len(at) + 1), np.diff(np.r_[0, at, n]))
+    return np.insert(sorted_keys, at, new_sorted), np.concatenate([moved[ranks], new_ranks]), moved
+
+
+def _merge_values(values, new):
+    """Sorted distinct ``values`` plus those of Series ``new``, and the old -> merged code map"""
+    extra = pd.Index(new.dropna().unique()).difference(values)
+    if not len(extra):
+        return values, np.arange(len(values))
+    merged = values.append(extra).sort_values()
+    return merged, merged.get_indexer(values)
+
+
+# ======================================================================
+# FILTER INDEX
+# ======================================================================
+class FilterIndex:
+    """Score-ordered positions plus code -> rank indexes for categorical filters"""
+
+    def __init__(self, frame, score_col='fraud_score', columns=FILTER_COLUMNS):
+        self.score_col = score_col
+        scores = frame[score_col].to_numpy(dtype=float)
+        self.order = np.argsort(-scores, kind='stable')
+        # Ascending copy of -score: "score >= x" is the prefix up to -x
+        self._neg_sorted = -scores[self.order]
+        rank = np.empty(len(scores), dtype=np.int64)
+        rank[self.order] = np.arange(len(scores))
+        self.rank = rank
+
+        self.codes = {}
+        self.values = {}
+        self._offsets = {}
+        self._ranks = {}
+        for col in columns:
+            if col not in frame.columns:
+                continue
+            codes, values = pd.factorize(frame[col], sort=True)
+            # Grouped by code, ascending rank within each group; rows without
+            # a value (code -1) never match a category filter
+            by_code = np.lexsort((rank, codes))
+            by_code = by_code[codes[by_code] >= 0]
+            counts = np.bincount(codes[codes >= 0], minlength=len(values))
+            ranks = rank[by_code]
+            offsets = np.r_[0, np.cumsum(counts)]
+            self.codes[col] = codes
+            self.values[col] = values
+            self._offsets[col] = offsets
+            self._ranks[col] = ranks
+
+    def append(self, added):
+        """A new index over these rows followed by ``added``'s, merged into the existing order"""
+        n, m = len(self.order), len(added)
+        total = n + m
+        index = copy.copy(self)
+        index._neg_sorted, index.rank, moved = merge_sorted(self._neg_sorted, self.rank,
+                                                            -added[self.score_col].to_numpy(dtype=float))
+        index.order = np.empty(total, dtype=np.int64)
+        index.order[index.rank] = np.arange(total)
+        index.codes, index.values, index._offsets, index._ranks = {}, {}, {}, {}
+        for col, values in self.values.items():
+            values, remap = _merge_values(values, added[col])
+            old_codes, new_codes = self.codes[col], values.get_indexer(added[col])
+            if len(remap) != len(values):
+                old_codes = np.where(old_codes >= 0, remap[old_codes], -1)
+            index.codes[col] = np.concatenate([old_codes, new_codes])
+
+            old_counts = np.diff(self._offsets[col])
+            matched = new_codes >= 0
+            new_codes, new_ranks = new_codes[matched], index.rank[n:][matched]
+            by_code = np.lexsort((new_ranks, new_codes))
+            new_codes, new_ranks = new_codes[by_code], new_ranks[by_code]
+            counts = np.zeros(len(values), dtype=np.int64)
+            counts[remap] = old_counts
+            counts += np.bincount(new_codes, minlength=len(values))
+            # (code, rank) order survives remapped codes and moved ranks, so the
+            # new entries are inserted by a binary search on that key
+            ranks = moved[self._ranks[col]]
+            old_keys = np.repeat(remap, old_counts) * total + ranks
+            at = np.searchsorted(old_keys, new_codes * total + new_ranks)
+            index.values[col] = values
+            index._offsets[col] = np.r_[0, np.cumsum(counts)]
+            index._ranks[col] = np.insert(ranks, at, new_ranks)
+        return index
+
+    def categories(self, col):
+        """Sorted distinct values of an indexed column"""
+        return self.values[col].tolist() if col in self.values else []
+
+    def _rank_range(self, min_score, max_score):
+        stop = len(self.order) if min_score is None else \
+            int(np.searchsorted(self._neg_sorted, -min_score, side='right'))
+        start = 0 if max_score is None else int(np.searchsorted(self._neg_sorted, -max_score, side='left'))
+        return start, stop
+
+    def query(self, min_score=None, max_score=None, where=None):
+        """Positions of rows with ``min_score <= score <= max_score`` and ``col == value``
+        for every ``where`` item, highest score first"""
+        start, stop = self._rank_range(min_score, max_score)
+        candidates = []
+        for col, value in (where or {}).items():
+            code = self.values[col].get_indexer([value])[0] if col in self.values else -1
+            if code < 0:
+                return np.empty(0, dtype=np.int64)
+            ranks = self._ranks[col][self._offsets[col][code]:self._offsets[col][code + 1]]
+            lo, hi = np.searchsorted(ranks, [start, stop])
+            candidates.append((col, code, ranks[lo:hi]))
+        if not candidates:
+            return self.order[start:stop]
+        candidates.sort(key=lambda c: len(c[2]))
+        positions = self.order[candidates[0][2]]
+        for col, code, _ in candidates[1:]:
+            positions = positions[self.codes[col][positions] == code]
+        return positions
+
+
+# ======================================================================
+# CHART AGGREGATES
+# ======================================================================
+def _add_counts(a, b):
+    return a.add(b, fill_value=0).astype(np.int64)
+
+
+class ChartAggregates:
+    """Mergeable chart-ready counts of a scored frame"""
+
+    def __init__(self, score_counts, risk_counts, alert_counts, title_counts):
+        self.score_counts = score_counts
+        self.risk_counts = risk_counts
+        self.alert_counts = alert_counts
+        self.title_counts = title_counts
+
+    @classmethod
+    def from_frame(cls, frame, bins=HIST_BINS):
+        """Histogram / risk counts over all rows; alert / title counts over flagged rows"""
+        scores = frame['fraud_score'].to_numpy(dtype=float)
+        score_counts, _ = np.histogram(np.clip(scores, 0.0, 1.0), bins=bins, range=(0.0, 1.0))
+        risk = frame['risk_level'] if 'risk_level' in frame.columns else risk_levels(frame['fraud_score'])
+        risk_counts = risk.value_counts(sort=False).astype(np.int64)
+
+        flagged = frame[frame['fraud_flag'].to_numpy(dtype=bool)] if 'fraud_flag' in frame.columns else frame.iloc[:0]
+
+        def counts(col):
+            if col not in flagged.columns:
+                return pd.Series(dtype=np.int64)
+            return flagged[col].value_counts(sort=False).astype(np.int64)
+
+        return cls(score_counts.astype(np.int64), risk_counts, counts('Alert_Reason'), counts('Job Title'))
+
+    def merge(self, other):
+        """Counts of both frames (e.g. an appended partition)"""
+        return ChartAggregates(
+            self.score_counts + other.score_counts,
+            _add_counts(self.risk_counts, other.risk_counts),
+            _add_counts(self.alert_counts, other.alert_counts),
+            _add_counts(self.title_counts, other.title_counts),
+        )
+
+    def score_histogram(self):
+        """Bin centers, widths and counts of the fixed-bin score histogram"""
+        edges = np.linspace(0.0, 1.0, len(self.score_counts) + 1)
+        return pd.DataFrame({
+            'fraud_score': (edges[:-1] + edges[1:]) / 2,
+            'width': np.diff(edges),
+            'count': self.score_counts,
+        })
+
+    def risk_levels(self):
+        return self.risk_counts.sort_values(ascending=False, kind='stable')
+
+    def alert_reasons(self):
+        return self.alert_counts.sort_values(ascending=False, kind='stable')
+
+    def top_titles(self, n=TOP_TITLES):
+        return self.title_counts.sort_values(ascending=False, kind='stable').head(n)
+
+
+# ======================================================================
+# SHARED DATASET
+# ======================================================================
+class SharedDataset:
+    """Read-only scored frame plus its flagged subset, built once per source version"""
+
+    def __init__(self, table, key, path=None, segments=1, frame=None, flagged=None):
+        self.table = table
+        self.key = key
+        self.path = path
+        self.segments = segments
+        self._index = None
+        self._aggregates = None
+        self._ranks = {}
+        # Per sort column: its keys in sorted order (and distinct values), to merge appends
+        self._sorted = {}
+        self._lock = threading.Lock()
+        self.frame = table.to_pandas(split_blocks=True) if frame is None else frame
+        self.flagged = self._flagged(self.frame) if flagged is None else flagged
+
+    @staticmethod
+    def _flagged(frame):
+        if 'fraud_flag' in frame.columns:
+            return frame[frame['fraud_flag'].to_numpy(dtype=bool)]
+        return frame.iloc[:0]
+
+    @staticmethod
+    def prepare(df):
+        """Add the derived columns the dashboard displays"""
+        if 'fraud_score' in df.columns and 'risk_level' not in df.columns:
+            df = df.assign(risk_level=risk_levels(df['fraud_score']))
+        return df
+
+    @classmethod
+    def _persist(cls, table, key, cache_dir):
+        path = Path(cache_dir) / f"{key}.arrow"
+        try:
+            write_ipc(table, path)
+            _prune(cache_dir)
+        except OSError:
+            # Read-only cache: still shared in process memory, just not mapped
+            return cls(table, key)
+        return cls(map_ipc(path), key, path)
+
+    @classmethod
+    def load(cls, key, build, cache_dir=DATASET_CACHE_DIR):
+        """Map the cached IPC file for ``key``, calling ``build()`` for the frame only on a miss"""
+        import pyarrow as pa
+
+        path = Path(cache_dir) / f"{key}.arrow"
+        if path.exists():
+            try:
+                dataset = cls(map_ipc(path), key, path, len(segment_chain(path)))
+                record_cache('dataset_file', 'hit')
+                return dataset
+            except (OSError, pa.ArrowInvalid):
+                pass
+        record_cache('dataset_file', 'miss')
+        with span('dataset.build') as s:
+            dataset = cls._persist(pa.Table.from_pandas(cls.prepare(build()), preserve_index=False), key, cache_dir)
+            s.rows = len(dataset.frame)
+        return dataset
+
+    def append(self, df, key, cache_dir=DATASET_CACHE_DIR):
+        """A new dataset with ``df``'s rows added; existing rows are not re-read, re-written or re-sorted.
+
+        The rows go to a segment file chained to this version's, and the
+        filter index and sort ranks built so far are merged. Once the chain
+        is ``MAX_SEGMENTS`` long the whole table is written as one file.
+        """
+        import pyarrow as pa
+
+        with span('dataset.append', rows=len(df)):
+            df = self.prepare(df)
+            added = pa.Table.from_pandas(df, preserve_index=False)
+            table = pa.concat_tables([self.table, added], promote_options='permissive')
+            n = len(self.frame)
+            if self.path is None or self.segments >= MAX_SEGMENTS:
+                # Compact: one contiguous chunk per column keeps the mapped columns zero-copy
+                dataset = self._persist(table.combine_chunks(), key, cache_dir)
+                new = dataset.frame.iloc[n:]
+            else:
+                path = Path(cache_dir) / f"{key}.arrow"
+                try:
+                    write_ipc(table.slice(n), path, parent=self.path.stem)
+                    _prune(cache_dir)
+                    table = pa.concat_tables([self.table, _map_file(path)], promote_options='permissive')
+                except OSError:
+                    path = None
+                new = table.slice(n).to_pandas(split_blocks=True).set_axis(pd.RangeIndex(n, table.num_rows))
+                dataset = type(self)(table, key, path, self.segments + 1, pd.concat([self.frame, new]),
+                                     pd.concat([self.flagged, self._flagged(new)]))
+            with self._lock:
+                if self._index is not None:
+                    dataset._index = self._index.append(new)
+                for col, (sorted_keys, uniques) in self._sorted.items():
+                    dataset._merge_ranks(col, self._ranks[col], sorted_keys, uniques, new)
+                if self._aggregates is not None and 'fraud_score' in new.columns:
+                    dataset._aggregates = self._aggregates.merge(ChartAggregates.from_frame(new))
+        return dataset
+
+    def _merge_ranks(self, col, ranks, sorted_keys, uniques, new):
+        values = new[col]
+        if uniques is None:
+            new_keys = values.to_numpy(dtype=float)
+        else:
+            uniques, remap = _merge_values(uniques, values)
+            # Missing values sort after every value
+            sorted_keys = np.r_[remap, len(uniques)][sorted_keys]
+            new_keys = uniques.get_indexer(values)
+            new_keys = np.where(new_keys < 0, len(uniques), new_keys)
+        sorted_keys, self._ranks[col], _ = merge_sorted(sorted_keys, ranks, new_keys)
+        self._sorted[col] = (sorted_keys, uniques)
+
+    @property
+    def index(self):
+        """The ``FilterIndex``, built on first use and shared by all sessions"""
+        with self._lock:
+            if self._index is None:
+                with span('dataset.index', rows=len(self.frame)):
+                    self._index = FilterIndex(self.frame)
+            return self._index
+
+    def sort_ranks(self, col):
+        """Ordinal rank of every row by ``col`` (missing values last), computed once"""
+        with self._lock:
+            if col not in self._ranks:
+                with span('dataset.sort_ranks', rows=len(self.frame)):
+                    if col == 'fraud_score' and self._index is not None:
+                        ranks = np.empty(len(self.frame), dtype=np.int64)
+                        # The index orders by descending score; rank ascending
+                        ranks[self._index.order[::-1]] = np.arange(len(self.frame))
+                    else:
+                        values = self.frame[col]
+                        if pd.api.types.is_numeric_dtype(values):
+                            keys, uniques = values.to_numpy(dtype=float), None  # argsort puts NaN last
+                        else:
+                            keys, uniques = pd.factorize(values, sort=True)
+                            keys = np.where(keys < 0, len(uniques), keys)
+                        order = np.argsort(keys, kind='stable')
+                        ranks = np.empty(len(self.frame), dtype=np.int64)
+                        ranks[order] = np.arange(len(self.frame))
+                        self._sorted[col] = (keys[order], uniques)
+                self._ranks[col] = ranks
+            return self._ranks[col]
+
+    @property
+    def aggregates(self):
+        """``ChartAggregates`` of the dataset, computed on first use"""
+        with self._lock:
+            if self._aggregates is None:
+                with span('dataset.aggregates', rows=len(self.frame)):
+                    self._aggregates = ChartAggregates.from_frame(self.frame)
+            return self._aggregates
+
+    def batches(self, positions, columns=None, batch_rows=64 * 1024):
+        """The rows at ``positions`` as Arrow tables of ``batch_rows``, gathered one batch at a time"""
+        table = self.table if columns is None else self.table.select(columns)
+        for lo in range(0, len(positions), batch_rows):
+            yield table.take(positions[lo:lo + batch_rows])
+
+    @property
+    def mapped(self):
+        return self.path is not None
+
+    def memory_mb(self):
+        """Size of the shared buffers, in MB"""
+        return self.table.nbytes / 1e6
+
+
+def page_positions(ranks, positions, page, page_size, ascending=True):
+    """Row positions of page ``page`` (0-based) of ``positions`` sorted by ``ranks``"""
+    start, stop = page * page_size, min((page + 1) * page_size, len(positions))
+    if start >= stop:
+        return positions[:0]
+    keys = ranks[positions] if ascending else -ranks[positions]
+    if stop < len(keys):
+        # Only the first ``stop`` rows in order are needed
+        head = np.argpartition(keys, stop - 1)[:stop]
+    else:
+        head = np.arange(len(keys))
+    head = head[np.argsort(keys[head])]
+    return positions[head[start:stop]]
+
+
+# ======================================================================
+# VERSIONED CACHE
+# ======================================================================
+def diff_manifests(old, new):
+    """``('same' | 'append' | 'rewrite', added paths)`` between two fingerprint manifests"""
+    if old is None:
+        return 'rewrite', []
+    before = {path: (size, mtime) for path, size, mtime in old}
+    after = {path: (size, mtime) for path, size, mtime in new}
+    if any(after.get(path) != stamp for path, stamp in before.items()):
+        return 'rewrite', []
+    added = sorted(set(after) - set(before))
+    return ('append' if added else 'same'), added
+
+
+class DatasetCache:
+    """The current ``SharedDataset`` of one source, refreshed by its file manifest"""
+
+    def __init__(self):
+        self.dataset = None
+        self.manifest = None
+        self.builds = 0
+        self.appends = 0
+        self._lock = threading.Lock()
+
+    def get(self, manifest, key, build, build_added=None, cache_dir=DATASET_CACHE_DIR):
+        """Dataset for ``manifest``: cached, appended with ``build_added(paths)`` or rebuilt with ``build()``"""
+        with self._lock:
+            change, added = diff_manifests(self.manifest, manifest)
+            if change == 'same':
+                record_cache('dataset', 'hit')
+                return self.dataset
+            if change == 'append' and build_added is not None:
+                record_cache('dataset', 'append')
+                self.dataset = self.dataset.append(build_added(added), key, cache_dir)
+                self.appends += 1
+            else:
+                record_cache('dataset', 'miss')
+                self.dataset = SharedDataset.load(key, build, cache_dir)
+                self.builds += 1
+            self.manifest = manifest
+            return self.dataset
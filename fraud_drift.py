@@ -0,0 +1,462 @@
+"""
+Drift Monitoring and Retraining — incremental PSI / KS against the training
+reference, background refits and atomic bundle hot-swaps.
+
+Bundles are fitted once, while the applicant population moves every week.
+This module closes the loop:
+
+    Monitor   ``DriftMonitor`` bins every Phase 6 component (``iso_score_raw``,
+              ``kmeans_distance`` and the freq / similarity features) on the
+              training quantiles taken from the bundle's rank references (or
+              sketches). Each scored batch only adds to per-bin counts, so PSI
+              and KS (evaluated at the bin edges) are updated in O(batch)
+    Retrain   ``RetrainScheduler`` checks the monitor periodically; when a
+              component drifts past the PSI / KS threshold, or the bundle is
+              older than the schedule, it refits on the training data in a
+              separate process (scoring threads never share the GIL with the
+              fit). The data must have changed since the bundle was fitted:
+              refitting the data the traffic drifted away from reproduces the
+              old reference and would retrain again on the next check
+    Validate  the latest applications by submission date are held out of the
+              refit and scored by the candidate: scores must be finite and in
+              [0, 1] and the flag rate near its target
+    Swap      the validated bundle is written in full before ``CURRENT`` is
+              renamed onto it, then handed to ``on_swap``; servers replace a
+              single pipeline reference that each batch reads once, so
+              scoring never pauses or sees a half-loaded model
+
+Usage:
+    python fraud_drift.py check scored.csv --bundle-dir models
+    python fraud_drift.py watch --bundle-dir models --train-data applications.csv --scored-glob "scored/*.csv"
+"""
+import argparse
+import glob
+import inspect
+import json
+import multiprocessing as mp
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fraud_cleaning import unique_rows
+from fraud_dataset import file_fingerprints
+from fraud_ingest import load_applications
+from fraud_pipeline import CURRENT_FILE, FraudPipeline, set_current
+from fraud_velocity import DATE_COL, to_epoch_seconds
+
+DRIFT_BINS = 20
+MIN_SAMPLES = 1000
+PSI_THRESHOLD = 0.2
+KS_THRESHOLD = 0.1
+RETRAIN_HOURS = 7 * 24
+CHECK_SECONDS = 60
+HOLDOUT_ROWS = 5000
+# Cooldown after a failed or rejected retrain, doubling up to the max: persistent
+# drift must not start a full refit every check
+RETRY_SECONDS = 15 * 60
+RETRY_MAX_SECONDS = 24 * 3600
+# Minimum gap after a successful swap, so the monitor sees traffic scored by the new bundle
+COOLDOWN_SECONDS = 6 * 3600
+FLAG_RATE_TOLERANCE = 2.0
+
+_EPS = 1e-4
+# Relative slack on bin edges: float32 features written to CSV and read back
+# land a rounding error away from the tied reference values they equal
+_EDGE_TOL = 1e-6
+
+
+# ======================================================================
+# STATISTICS
+# ======================================================================
+def psi(expected, actual):
+    """Population stability index between two bin-proportion vectors"""
+    expected = np.clip(np.asarray(expected, dtype=float), _EPS, None)
+    actual = np.clip(np.asarray(actual, dtype=float), _EPS, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_statistic(expected, actual):
+    """Largest CDF gap between two bin-proportion vectors (KS at the bin edges)"""
+    return float(np.max(np.abs(np.cumsum(actual) - np.cumsum(expected)))) if len(expected) else 0.0
+
+
+def bundle_age_hours(pipeline, now=None):
+    """Hours since the bundle version timestamp (None for unparseable versions)"""
+    try:
+        fitted = datetime.strptime(pipeline.version, "%Y%m%dT%H%M%S%fZ").replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+    return ((now or datetime.now(timezone.utc)) - fitted).total_seconds() / 3600
+
+
+# ======================================================================
+# MONITOR
+# ======================================================================
+class DriftMonitor:
+    """Per-bin counts of scored Phase 6 components vs the training reference"""
+
+    def __init__(self, pipeline, bins=DRIFT_BINS, min_samples=MIN_SAMPLES):
+        self.bins = bins
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self.rebase(pipeline)
+
+    def _reference(self, pipeline, col):
+        # Quantile edges of the training population and its mass per bin
+        grid = np.linspace(0, 1, self.bins + 1)[1:-1]
+        sketches = getattr(pipeline, 'rank_sketches_', None)
+        if sketches is not None:
+            sketch = sketches[col]
+            edges = np.unique([sketch.quantile(q) for q in grid])
+            below = sketch.cdf(edges)
+        else:
+            reference = pipeline.rank_reference_[col]
+            edges = np.unique(np.quantile(reference, grid))
+            below = np.searchsorted(reference, edges, side='right') / len(reference)
+        bin_edges = edges + _EDGE_TOL * np.maximum(np.abs(edges), 1.0)
+        return bin_edges, np.diff(np.r_[0.0, below, 1.0])
+
+    def rebase(self, pipeline):
+        """Switch to a new bundle's reference and clear the counts"""
+        columns = pipeline._rank_columns()
+        references = {col: self._reference(pipeline, col) for col in columns}
+        with self._lock:
+            self.version = pipeline.version
+            self.references = references
+            self.counts = {col: np.zeros(len(expected), dtype=np.int64) for col, (_, expected) in references.items()}
+            self.n_observed = 0
+        return self
+
+    def observe(self, scored):
+        """Add a scored batch (any frame with the component columns)"""
+        references = self.references
+        updates = {}
+        for col, (edges, _) in references.items():
+            if col in scored.columns:
+                values = pd.to_numeric(scored[col], errors='coerce').to_numpy(dtype=float)
+                values = values[~np.isnan(values)]
+                # Bin i holds (edges[i-1], edges[i]], matching the reference
+                updates[col] = np.bincount(np.searchsorted(edges, values, side='left'), minlength=len(edges) + 1)
+        with self._lock:
+            # A batch binned against a bundle that has since been swapped out is dropped
+            if self.references is references:
+                for col, counts in updates.items():
+                    self.counts[col] += counts
+                self.n_observed += len(scored)
+        return self
+
+    def report(self):
+        """PSI and KS per component over everything observed since the last rebase"""
+        with self._lock:
+            references, version = self.references, self.version
+            counts = {col: c.copy() for col, c in self.counts.items()}
+            n_observed = self.n_observed
+        report = {}
+        for col, (_, expected) in references.items():
+            total = counts[col].sum()
+            actual = counts[col] / total if total else expected
+            report[col] = {'n': int(total), 'psi': psi(expected, actual), 'ks': ks_statistic(expected, actual)}
+        return {'version': version, 'observed': n_observed, 'columns': report}
+
+    def drifted(self, psi_threshold=PSI_THRESHOLD, ks_threshold=KS_THRESHOLD):
+        """Components past either threshold (empty until ``min_samples`` are seen)"""
+        report = self.report()
+        return [
+            col for col, stats in report['columns'].items()
+            if stats['n'] >= self.min_samples and (stats['psi'] >= psi_threshold or stats['ks'] >= ks_threshold)
+        ]
+
+
+# ======================================================================
+# RETRAIN, VALIDATE, SWAP
+# ======================================================================
+def pipeline_params(pipeline):
+    """Constructor parameters of a fitted pipeline (older bundles may lack some)"""
+    names = list(inspect.signature(FraudPipeline.__init__).parameters)[1:]
+    return {name: getattr(pipeline, name) for name in names if hasattr(pipeline, name)}
+
+
+def split_holdout(df, rows):
+    """``(train, holdout)`` with the latest ``rows`` applications by submission date held out.
+
+    Exact duplicates are dropped first, as ``FraudPipeline.fit`` does, so no
+    holdout row is also a training row. Without dates the holdout is a random
+    sample. At most a fifth of the rows are held out.
+    """
+    df = df.iloc[unique_rows(df)].reset_index(drop=True)
+    rows = min(rows, len(df) // 5)
+    if DATE_COL in df.columns:
+        # Undated rows sort first, so they stay in the training split
+        seconds = np.nan_to_num(to_epoch_seconds(df[DATE_COL]), nan=-np.inf)
+        held = np.argsort(seconds, kind='stable')[len(df) - rows:]
+    else:
+        held = np.random.default_rng(0).choice(len(df), rows, replace=False)
+    mask = np.zeros(len(df), dtype=bool)
+    mask[held] = True
+    return df[~mask].reset_index(drop=True), df[mask].reset_index(drop=True)
+
+
+def training_fingerprint(train_data):
+    """Size and mtime of the training CSV, recorded in the bundles fitted on it"""
+    return file_fingerprints([train_data])
+
+
+def _fit_candidate(params, train_data, bundle_dir, holdout_rows):
+    # Runs in a child process; writes the bundle but leaves CURRENT alone
+    fingerprint = training_fingerprint(train_data)
+    df, _ = load_applications(train_data)
+    train, holdout = split_holdout(df, holdout_rows)
+    pipeline = FraudPipeline(**params).fit(train)
+    pipeline.train_fingerprint_ = fingerprint
+    return str(pipeline.save(bundle_dir, make_current=False)), holdout
+
+
+def validate_candidate(candidate, holdout):
+    """Score ``holdout`` with a candidate bundle; raises ValueError if it is unfit to serve.
+
+    Scoring records the holdout as velocity arrivals, so pass a copy of the
+    bundle, not the one that will serve.
+    """
+    if not np.isfinite(candidate.threshold_):
+        raise ValueError(f"threshold is not finite ({candidate.threshold_})")
+    scored = candidate.score(holdout, per_row=True)
+    scores = scored['fraud_score'].to_numpy(dtype=float)
+    if not np.isfinite(scores).all() or scores.min() < 0 or scores.max() > 1:
+        raise ValueError("fraud_score outside [0, 1] on the holdout")
+    target = 1.0 - candidate.threshold_percentile
+    flag_rate = float(scored['fraud_flag'].mean())
+    # Only judged when the holdout is large enough to expect ~20 flags
+    rate_checked = len(scored) * target >= 20
+    if rate_checked and not target / FLAG_RATE_TOLERANCE <= flag_rate <= target * FLAG_RATE_TOLERANCE:
+        raise ValueError(f"holdout flag rate {flag_rate:.3f} is far from the {target:.3f} target")
+    return {'holdout_rows': len(scored), 'flag_rate': flag_rate, 'flag_rate_checked': rate_checked}
+
+
+class RetrainScheduler:
+    """Background drift / schedule checks, out-of-process refits and atomic swaps"""
+
+    def __init__(self, bundle_dir, train_data, monitor=None, on_swap=None, retrain_hours=RETRAIN_HOURS,
+                 check_seconds=CHECK_SECONDS, psi_threshold=PSI_THRESHOLD, ks_threshold=KS_THRESHOLD,
+                 holdout_rows=HOLDOUT_ROWS, retry_seconds=RETRY_SECONDS, cooldown_seconds=COOLDOWN_SECONDS):
+        self.bundle_dir = Path(bundle_dir)
+        self.train_data = train_data
+        self.pipeline = FraudPipeline.load(bundle_dir)
+        self.monitor = monitor or DriftMonitor(self.pipeline)
+        self.on_swap = on_swap
+        self.retrain_hours = retrain_hours
+        self.check_seconds = check_seconds
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.holdout_rows = holdout_rows
+        self.retry_seconds = retry_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.history = []
+        self.failures = 0
+        self.retry_at = 0.0
+        self.waiting = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="fraud-retrain", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.wait(self.check_seconds):
+            self.tick()
+
+    def tick(self):
+        """One scheduled check, skipped while cooling down from the last retrain"""
+        if time.monotonic() < self.retry_at:
+            return None
+        try:
+            version = self.check()
+        except Exception as e:  # keep serving the current bundle
+            self.failures += 1
+            cooldown = min(self.retry_seconds * 2 ** (self.failures - 1), RETRY_MAX_SECONDS)
+            self.retry_at = time.monotonic() + cooldown
+            self.history.append({'at': datetime.now(timezone.utc).isoformat(), 'error': str(e),
+                                 'retry_in_s': cooldown})
+            print(f"⚠️ Retraining failed, keeping bundle {self.pipeline.version} "
+                  f"(next attempt in {cooldown / 60:.0f} min): {e}")
+            return None
+        if version is not None:
+            self.failures = 0
+            self.retry_at = time.monotonic() + self.cooldown_seconds
+        return version
+
+    def due(self):
+        """Why a retrain is due now ('drift: ...' / 'schedule'), or None"""
+        drifted = self.monitor.drifted(self.psi_threshold, self.ks_threshold)
+        if drifted:
+            return f"drift: {', '.join(drifted)}"
+        age = bundle_age_hours(self.pipeline)
+        if self.retrain_hours and age is not None and age >= self.retrain_hours:
+            return "schedule"
+        return None
+
+    def new_training_data(self):
+        """Whether the training CSV changed since the serving bundle was fitted (unknown counts as changed)"""
+        return training_fingerprint(self.train_data) != getattr(self.pipeline, 'train_fingerprint_', None)
+
+    def check(self):
+        """Retrain and swap if drift or the schedule calls for it; returns the new version or None"""
+        reason = self.due()
+        if not reason:
+            return None
+        if not self.new_training_data():
+            if self.waiting != reason:
+                print(f"⏸️ Retrain due ({reason}) but {self.train_data} is unchanged since bundle "
+                      f"{self.pipeline.version}: waiting for new training data")
+            self.waiting = reason
+            return None
+        self.waiting = None
+        return self.retrain(reason)
+
+    def retrain(self, reason="manual"):
+        """Fit, validate and promote a new bundle; returns its version"""
+        start = time.perf_counter()
+        print(f"📌 Retraining bundle {self.pipeline.version} ({reason})")
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('spawn')) as pool:
+            version_dir, holdout = pool.submit(_fit_candidate, pipeline_params(self.pipeline), self.train_data,
+                                               self.bundle_dir, self.holdout_rows).result()
+        # Validate a throwaway copy: scoring the holdout would record its rows as
+        # velocity arrivals in the bundle that gets promoted
+        validation = validate_candidate(FraudPipeline.load(version_dir), holdout)
+        candidate = FraudPipeline.load(version_dir)
+
+        set_current(self.bundle_dir, candidate.version)
+        self.pipeline = candidate
+        self.monitor.rebase(candidate)
+        if self.on_swap is not None:
+            self.on_swap(candidate)
+        self.history.append({
+            'at': datetime.now(timezone.utc).isoformat(),
+            'reason': reason,
+            'version': candidate.version,
+            'seconds': round(time.perf_counter() - start, 2),
+            **validation,
+        })
+        print(f"✔️ Bundle {candidate.version} validated and swapped in "
+              f"({time.perf_counter() - start:.1f}s, holdout flag rate {validation['flag_rate']:.3f})")
+        return candidate.version
+
+
+class BundleWatcher:
+    """Poll ``CURRENT`` and hand newly promoted bundles to ``on_swap``"""
+
+    def __init__(self, bundle_dir, on_swap, version=None, poll_seconds=30.0):
+        self.bundle_dir = Path(bundle_dir)
+        self.on_swap = on_swap
+        self.version = version
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="fraud-bundle-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def poll(self):
+        """Load and hand over the current bundle if it changed; returns it or None"""
+        try:
+            version = (self.bundle_dir / CURRENT_FILE).read_text().strip()
+        except OSError:
+            return None
+        if not version or version == self.version:
+            return None
+        # CURRENT only ever names a fully written bundle
+        pipeline = FraudPipeline.load(self.bundle_dir / version)
+        self.version = version
+        self.on_swap(pipeline)
+        return pipeline
+
+    def _loop(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️ Could not load bundle from {self.bundle_dir}: {e}")
+
+
+# ======================================================================
+# CLI
+# ======================================================================
+def print_drift(report, psi_threshold=PSI_THRESHOLD, ks_threshold=KS_THRESHOLD):
+    print(f"📊 Drift vs bundle {report['version']} ({report['observed']:,} rows observed): PSI / KS")
+    for col, stats in report['columns'].items():
+        marker = "🚨" if stats['psi'] >= psi_threshold or stats['ks'] >= ks_threshold else "  "
+        print(f" {marker} {col:<32} {stats['psi']:.4f} / {stats['ks']:.4f} ({stats['n']:,} values)")
+
+
+def _read_components(path, columns):
+    return pd.read_csv(path, usecols=lambda c: c in columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monitor score drift and retrain bundles")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    check_parser = sub.add_parser('check', help="Drift of scored CSVs against the current bundle")
+    check_parser.add_argument('scored', nargs='+', help="Scored CSV files (output of fraud_pipeline.py score)")
+
+    watch_parser = sub.add_parser('watch', help="Watch scored CSVs, retrain on drift or schedule")
+    watch_parser.add_argument('--train-data', required=True, help="Latest training applications CSV")
+    watch_parser.add_argument('--scored-glob', required=True, help="Glob of scored CSVs to monitor")
+    watch_parser.add_argument('--retrain-hours', type=float, default=RETRAIN_HOURS,
+                              help="Retrain bundles older than this (0 disables the schedule)")
+    watch_parser.add_argument('--check-seconds', type=float, default=CHECK_SECONDS)
+    watch_parser.add_argument('--retry-seconds', type=float, default=RETRY_SECONDS,
+                              help="Cooldown after a failed retrain, doubled on each further failure")
+    watch_parser.add_argument('--cooldown-seconds', type=float, default=COOLDOWN_SECONDS,
+                              help="Cooldown after a successful retrain")
+
+    for p in (check_parser, watch_parser):
+        p.add_argument('--bundle-dir', default='models', help="Bundle root with CURRENT")
+        p.add_argument('--psi-threshold', type=float, default=PSI_THRESHOLD)
+        p.add_argument('--ks-threshold', type=float, default=KS_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == 'check':
+        monitor = DriftMonitor(FraudPipeline.load(args.bundle_dir))
+        for path in args.scored:
+            monitor.observe(_read_components(path, monitor.references))
+        report = monitor.report()
+        print_drift(report, args.psi_threshold, args.ks_threshold)
+        print(json.dumps({'drifted': monitor.drifted(args.psi_threshold, args.ks_threshold)}))
+        return
+
+    scheduler = RetrainScheduler(args.bundle_dir, args.train_data, retrain_hours=args.retrain_hours,
+                                 check_seconds=args.check_seconds, psi_threshold=args.psi_threshold,
+                                 ks_threshold=args.ks_threshold, retry_seconds=args.retry_seconds,
+                                 cooldown_seconds=args.cooldown_seconds)
+    seen = set()
+    print(f"🚀 Watching {args.scored_glob} against bundle {scheduler.pipeline.version}")
+    try:
+        while True:
+            for path in sorted(set(glob.glob(args.scored_glob)) - seen):
+                scheduler.monitor.observe(_read_components(path, scheduler.monitor.references))
+                seen.add(path)
+            scheduler.tick()
+            time.sleep(args.check_seconds)
+    except KeyboardInterrupt:
+        print_drift(scheduler.monitor.report(), args.psi_threshold, args.ks_threshold)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,355 @@
+"""
+Record-Level Duplicate Clustering — MinHash LSH across several text fields.
+
+Bulk-submitted fake applications often vary a few fields of the same template,
+so ``title_freq`` / ``max_title_similarity`` miss them. ``DuplicateClusterer``
+groups records whose combined shingle sets are near-identical:
+
+    Shingles  word 1..k-grams of each configured column, hashed per column
+              (a title word never matches the same word in the description)
+    MinHash   ``num_perm`` multiply-shift hashes, min-reduced per record over
+              the sparse shingle matrix (vectorized, chunked)
+    LSH       signatures cut into ``bands`` bands of ``num_perm / bands`` rows;
+              records sharing any band bucket are linked and clusters are the
+              connected components of those links. With the defaults (8 x 8)
+              the link probability is ~3% at Jaccard 0.5 and ~99% at 0.9.
+
+Every step is linear in the number of records — there is no all-pairs
+comparison — so millions of records cluster in minutes. The fitted band
+tables are kept so new batches join training clusters at scoring time.
+
+Features:
+    duplicate_cluster_id  training cluster id (-1 for records with no duplicate)
+    cluster_size          records in the cluster (1 for unique records)
+"""
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix, hstack
+from scipy.sparse.csgraph import connected_components
+from sklearn.feature_extraction.text import HashingVectorizer
+
+DUPLICATE_COLUMNS = ['Job Title', 'Job Location', 'Department', 'Profile', 'Job Description', 'Requirements']
+CLUSTER_ID_COL = 'duplicate_cluster_id'
+CLUSTER_SIZE_COL = 'cluster_size'
+
+NUM_PERM = 64
+BANDS = 8
+SHINGLE_SIZE = 2
+SHINGLE_FEATURES = 2 ** 20
+SIGNATURE_CHUNK = 20_000
+
+NO_CLUSTER = -1
+_FNV_PRIME = np.uint64(0x100000001B3)
+
+
+class DuplicateClusterer:
+    """MinHash LSH clusters over the shingles of ``columns``"""
+
+    def __init__(self, columns=None, num_perm=NUM_PERM, bands=BANDS, shingle_size=SHINGLE_SIZE,
+                 random_state=42):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.columns = list(columns or DUPLICATE_COLUMNS)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.random_state = random_state
+
+        rng = np.random.default_rng(random_state)
+        # Multiply-shift hashing: ((a * x + b) mod 2^64) >> 32 with odd a
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    # ------------------------------------------------------------------
+    # Signatures
+    # ------------------------------------------------------------------
+    def _shingles(self, df):
+        vectorizer = HashingVectorizer(
+            n_features=SHINGLE_FEATURES,
+            ngram_range=(1, self.shingle_size),
+            token_pattern=r"(?u)\b\w+\b",
+            alternate_sign=False,
+            norm=None,
+            binary=True
+        )
+        blocks = []
+        for col in self.columns:
+            if col in df.columns:
+                # Hash each distinct value once; templated fields repeat a lot
+                codes, uniques = pd.factorize(df[col].fillna("unknown").astype(str))
+                blocks.append(vectorizer.transform(uniques)[codes])
+        if not blocks:
+            raise ValueError(f"None of the duplicate columns {self.columns} are present")
+        # One hash space per column: column i owns indices [i * F, (i + 1) * F)
+        return hstack(blocks, format='csr')
+
+    def signatures(self, df):
+        """MinHash signatures, one uint64 row per record (empty records are all-max)"""
+        shingles = self._shingles(df)
+        signatures = np.full((shingles.shape[0], self.num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, shingles.shape[0], SIGNATURE_CHUNK):
+            block = shingles[start:start + SIGNATURE_CHUNK]
+            nonempty = np.flatnonzero(np.diff(block.indptr))
+            if len(nonempty) == 0:
+                continue
+            ids = block.indices.astype(np.uint64)
+            starts = block.indptr[nonempty]
+            for i in range(self.num_perm):
+                hashes = (ids * self._a[i] + self._b[i]) >> np.uint64(32)
+                signatures[start + nonempty, i] = np.minimum.reduceat(hashes, starts)
+        return signatures
+
+    def band_keys(self, df):
+        """One uint64 bucket key per (record, band); 0 marks records with no shingles"""
+        signatures = self.signatures(df)
+        rows = self.num_perm // self.bands
+        keys = np.zeros((len(signatures), self.bands), dtype=np.uint64)
+        for band in range(self.bands):
+            key = np.full(len(signatures), np.uint64(0xCBF29CE484222325))
+            for j in range(band * rows, (band + 1) * rows):
+                key = (key ^ signatures[:, j]) * _FNV_PRIME
+            keys[:, band] = key | np.uint64(1)
+        keys[signatures[:, 0] == np.iinfo(np.uint64).max] = 0
+        return keys
+
+    # ------------------------------------------------------------------
+    # Clustering
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _link(keys):
+        """Connected components of records sharing a band bucket"""
+        return DuplicateClusterer._link_bands((keys[:, band] for band in range(keys.shape[1])), len(keys))
+
+    @staticmethod
+    def _link_bands(columns, n):
+        """Connected components of ``n`` records from their band key columns, one band at a time.
+
+        Each record is linked to the first record of its bucket, and a band's
+        links are merged into the components so far before the next column is
+        read, so only one band's keys and edges are held at once.
+        """
+        labels = np.arange(n)
+        tables = []
+        for column in columns:
+            records = np.flatnonzero(column)
+            records = records[np.argsort(column[records], kind='stable')]
+            sorted_keys = column[records]
+            first = np.ones(len(records), dtype=bool)
+            first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            heads = records[first][np.cumsum(first) - 1]
+            tables.append((sorted_keys[first], records[first]))
+            rows, cols = labels[records], labels[heads]
+            linked = rows != cols
+            m = int(labels.max()) + 1 if n else 0
+            graph = coo_matrix((np.ones(int(linked.sum()), dtype=np.int8), (rows[linked], cols[linked])), shape=(m, m))
+            _, merged = connected_components(graph, directed=False)
+            labels = merged[labels]
+        return labels, tables
+
+    @staticmethod
+    def _cluster_ids(labels, sizes, offset=0):
+        # Public ids: consecutive over multi-record components, -1 otherwise
+        multi = sizes >= 2
+        ids = np.full(len(sizes), NO_CLUSTER, dtype=np.int64)
+        ids[multi] = offset + np.arange(int(multi.sum()))
+        return ids[labels]
+
+    def _fit_components(self, component_sizes, tables, n_records):
+        self.component_sizes_ = component_sizes
+        self.component_ids_ = self._cluster_ids(np.arange(len(component_sizes)), component_sizes)
+        self.n_clusters_ = int((component_sizes >= 2).sum())
+        self.n_records_ = n_records
+        self.tables_ = tables
+        return self
+
+    def fit_keys(self, keys):
+        """Fit from precomputed ``band_keys``"""
+        labels, tables = self._link(keys)
+        return self._fit_components(np.bincount(labels).astype(np.int64),
+                                    [(bucket_keys, labels[heads].astype(np.int32)) for bucket_keys, heads in tables],
+                                    len(keys))
+
+    def fit_linker(self, linker):
+        """Fit from a ``BucketLinker`` fed the ``band_keys`` of every chunk of a stream.
+
+        Same clusters as ``fit_keys`` on the stacked keys; records without
+        shingles are left out of ``component_sizes_`` (they never match).
+        """
+        component_sizes, tables = linker.components()
+        return self._fit_components(component_sizes, tables, linker.n_records)
+
+    def fit(self, df):
+        return self.fit_keys(self.band_keys(df))
+
+    def assign(self, df, per_row=False):
+        """``(duplicate_cluster_id, cluster_size)`` arrays for a batch.
+
+        Records that hit a training bucket take that cluster (the largest one
+        when several match). The rest are clustered among themselves unless
+        ``per_row``, in which case each is its own singleton.
+        """
+        keys = self.band_keys(df)
+        n = len(keys)
+        components = np.full((n, self.bands), -1, dtype=np.int64)
+        for band, (bucket_keys, bucket_components) in enumerate(self.tables_):
+            column = keys[:, band]
+            if len(bucket_keys) == 0:
+                continue
+            pos = np.minimum(np.searchsorted(bucket_keys, column), len(bucket_keys) - 1)
+            hit = (bucket_keys[pos] == column) & (column != 0)
+            components[hit, band] = bucket_components[pos[hit]]
+
+        matched_sizes = np.where(components >= 0, self.component_sizes_[np.maximum(components, 0)], 0)
+        chosen = components[np.arange(n), np.argmax(matched_sizes, axis=1)] if n else np.empty(0, dtype=np.int64)
+        matched = chosen >= 0
+        cluster_ids = np.where(matched, self.component_ids_[np.maximum(chosen, 0)], NO_CLUSTER)
+        cluster_sizes = np.where(matched, self.component_sizes_[np.maximum(chosen, 0)], 1)
+
+        unmatched = np.flatnonzero(~matched)
+        if not per_row and len(unmatched) > 1:
+            labels, _ = self._link(keys[unmatched])
+            sizes = np.bincount(labels)
+            cluster_ids[unmatched] = self._cluster_ids(labels, sizes, offset=self.n_clusters_)
+            cluster_sizes[unmatched] = sizes[labels]
+        return cluster_ids, cluster_sizes
+
+    def transform(self, df, per_row=False):
+        """Add ``duplicate_cluster_id`` and ``cluster_size`` to ``df``"""
+        cluster_ids, cluster_sizes = self.assign(df, per_row)
+        df[CLUSTER_ID_COL] = cluster_ids
+        df[CLUSTER_SIZE_COL] = cluster_sizes
+        return df
+
+    def summary(self):
+        """Cluster counts for manifests and logs"""
+        sizes = self.component_sizes_
+        return {
+            'columns': self.columns,
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'records': self.n_records_,
+            'clusters': self.n_clusters_,
+            'clustered_records': int(sizes[sizes >= 2].sum()),
+            'largest_cluster': int(sizes.max()) if len(sizes) else 0,
+        }
+
+
+# ======================================================================
+# STREAMING
+# ======================================================================
+class BucketLinker:
+    """Connected components of records sharing a band bucket, fed a chunk of ``band_keys`` at a time.
+
+    The nodes are the distinct band buckets rather than the records: a record
+    joins the buckets of all its bands and adds one to their component's
+    size. Memory grows with the distinct buckets (20 bytes each; the fitted
+    tables keep 12) and not with the records. Each band's buckets are kept
+    as a few sorted runs that merge as they grow, so a chunk costs
+    O(chunk log buckets) rather than a pass over every bucket.
+    """
+
+    def __init__(self, bands):
+        self.runs = [[] for _ in range(bands)]
+        self.parent = np.empty(0, dtype=np.int32)
+        self.size = np.empty(0, dtype=np.int32)
+        self.n_records = 0
+
+    def _root(self, nodes):
+        roots = self.parent[nodes]
+        while True:
+            up = self.parent[roots]
+            if np.array_equal(up, roots):
+                break
+            roots = up
+        self.parent[nodes] = roots
+        return roots
+
+    def _lookup(self, band, column):
+        # Sorted needles: searchsorted then walks each run in order instead of at random
+        order = np.argsort(column)
+        column = column[order]
+        node = np.full(len(column), -1, dtype=np.int32)
+        for keys, nodes in self.runs[band]:
+            pos = np.minimum(np.searchsorted(keys, column), len(keys) - 1)
+            hit = keys[pos] == column
+            node[order[hit]] = nodes[pos[hit]]
+        return node
+
+    def _store(self, band, keys, nodes):
+        runs = self.runs[band]
+        runs.append((keys, nodes))
+        # Merge while the previous run is at most twice the last: O(log buckets) runs
+        while len(runs) > 1 and len(runs[-2][0]) <= 2 * len(runs[-1][0]):
+            (keys, nodes), (prev_keys, prev_nodes) = runs.pop(), runs.pop()
+            keys, nodes = np.concatenate([prev_keys, keys]), np.concatenate([prev_nodes, nodes])
+            order = np.argsort(keys, kind='stable')
+            runs.append((keys[order], nodes[order]))
+
+    def add(self, keys):
+        """Link one chunk of ``band_keys`` (records numbered after the previous chunks)"""
+        bands = len(self.runs)
+        node = np.column_stack([self._lookup(band, keys[:, band]) for band in range(bands)])
+        # band_keys are all zero or all set, so band 0 tells which records have shingles
+        live = keys[:, 0] != 0
+
+        # New buckets are numbered by (first record, band): the smallest node of a
+        # component then belongs to its earliest record, which orders components like _link
+        new = []
+        for band in range(bands):
+            missing = np.flatnonzero(live & (node[:, band] < 0))
+            bucket_keys, first, inverse = np.unique(keys[missing, band], return_index=True, return_inverse=True)
+            new.append((missing, bucket_keys, missing[first], inverse))
+        firsts = np.concatenate([first for _, _, first, _ in new])
+        in_band = np.repeat(np.arange(bands), [len(bucket_keys) for _, bucket_keys, _, _ in new])
+        ids = np.empty(len(firsts), dtype=np.int32)
+        ids[np.lexsort((in_band, firsts))] = len(self.parent) + np.arange(len(firsts), dtype=np.int32)
+        offset = 0
+        for band, (missing, bucket_keys, _, inverse) in enumerate(new):
+            band_ids = ids[offset:offset + len(bucket_keys)]
+            offset += len(bucket_keys)
+            node[missing, band] = band_ids[inverse]
+            if len(bucket_keys):
+                self._store(band, bucket_keys, band_ids)
+        self.parent = np.concatenate([self.parent, np.arange(len(self.parent), len(self.parent) + len(ids),
+                                                             dtype=np.int32)])
+        self.size = np.concatenate([self.size, np.zeros(len(ids), dtype=np.int32)])
+
+        roots = self._root(node[live])
+        if len(roots):
+            unique, inverse = np.unique(roots, return_inverse=True)
+            inverse = inverse.reshape(roots.shape)
+            rows = np.repeat(inverse[:, 0], bands - 1)
+            graph = coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, inverse[:, 1:].ravel())),
+                               shape=(len(unique),) * 2)
+            n_components, component = connected_components(graph, directed=False)
+            # Roots are the smallest node of their component, so the merged one keeps the smallest root
+            _, first = np.unique(component, return_index=True)
+            representative = unique[first]
+            sizes = np.bincount(component, weights=self.size[unique], minlength=n_components)
+            sizes += np.bincount(component[inverse[:, 0]], minlength=n_components)
+            self.size[unique] = 0
+            self.size[representative] = sizes
+            self.parent[unique] = representative[component]
+        self.n_records += len(keys)
+        return self
+
+    def components(self):
+        """``(component_sizes, tables)`` as ``DuplicateClusterer`` stores them"""
+        nodes = np.arange(len(self.parent), dtype=np.int32)
+        roots = np.flatnonzero(self._root(nodes) == nodes)
+        component = np.empty(len(nodes), dtype=np.int32)
+        component[roots] = np.arange(len(roots), dtype=np.int32)
+        component = component[self.parent]
+        tables = []
+        for runs in self.runs:
+            keys = np.concatenate([keys for keys, _ in runs] or [np.empty(0, dtype=np.uint64)])
+            band_nodes = np.concatenate([band_nodes for _, band_nodes in runs] or [np.empty(0, dtype=np.int32)])
+            order = np.argsort(keys, kind='stable')
+            tables.append((keys[order], component[band_nodes[order]]))
+        return self.size[roots].astype(np.int64), tables
+
+
+def duplicate_clusters(df, columns=None, **params):
+    """One-shot helper: cluster ``df`` and return it with both feature columns"""
+    return DuplicateClusterer(columns, **params).fit(df).transform(df)
+
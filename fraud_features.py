@@ -0,0 +1,89 @@
+"""
+Phases 3-5 Feature Matrix — one preallocated model matrix, no frame copies.
+
+The notebook starts each phase with ``df.copy()``, concatenates the scaled
+columns onto a reset-index frame, concatenates the SVD output again and then
+takes ``df_model[MODEL_FEATURES].values`` as a fresh float64 array. Here the
+model matrix is allocated once and filled block by block:
+
+    Scaled    ``(x - mean) / scale`` written straight into the matrix columns
+    SVD       TF-IDF stays sparse (CSR); ``TruncatedSVD`` output is written
+              into the matrix in row chunks, so the float64 temporary is
+              bounded by ``CHUNK_ROWS``
+    Frame     the scaled / SVD output columns are views of the matrix, so the
+              scored frame adds no copy of them
+
+The matrix is float32 by default: Isolation Forest converts its input to
+float32 anyway (its scores are unchanged) and K-Means runs natively in
+float32. ``sparse_matrix`` is the optional sparse path — scaled columns plus
+the raw TF-IDF vocabulary in one CSR matrix, no SVD. With ``'hashed'`` the
+SVD input is every text column hashed side by side (see fraud_text).
+"""
+import numpy as np
+import scipy.sparse as sp
+
+FEATURE_DTYPES = ('float32', 'float64')
+TEXT_FEATURES = ('svd', 'sparse', 'hashed')
+CHUNK_ROWS = 16_384
+
+
+def _fill_scaled(out, df, scale_cols, scaler):
+    # Same arithmetic as StandardScaler.transform, one column at a time
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(len(scale_cols))
+    scale = scaler.scale_ if scaler.with_std else np.ones(len(scale_cols))
+    for j, col in enumerate(scale_cols):
+        values = df[col].to_numpy(dtype=float)
+        np.divide(values - mean[j], scale[j], out=out[:, j], casting='same_kind')
+
+
+def matrix_width(scale_cols, scaler, svd=None):
+    """Columns of the dense ``[scaled | svd]`` matrix"""
+    return (len(scale_cols) if scaler is not None else 0) + (svd.n_components if svd is not None else 0)
+
+
+def dense_matrix(df, scale_cols, scaler, tfidf=None, svd=None, dtype='float32', out=None):
+    """``[scaled | svd]`` filled into a single preallocated array (or ``out``)"""
+    n_scaled = len(scale_cols) if scaler is not None else 0
+    n_svd = svd.n_components if svd is not None else 0
+    X = np.empty((len(df), n_scaled + n_svd), dtype=dtype) if out is None else out
+    if n_scaled:
+        _fill_scaled(X[:, :n_scaled], df, scale_cols, scaler)
+    if n_svd:
+        for start in range(0, len(df), CHUNK_ROWS):
+            X[start:start + CHUNK_ROWS, n_scaled:] = svd.transform(tfidf[start:start + CHUNK_ROWS])
+    return X
+
+
+def sparse_matrix(df, scale_cols, scaler, tfidf, dtype='float32'):
+    """``(scaled, X)``: the dense scaled block and ``[scaled | tfidf]`` as CSR"""
+    scaled = np.empty((len(df), len(scale_cols) if scaler is not None else 0), dtype=dtype)
+    if scaled.shape[1]:
+        _fill_scaled(scaled, df, scale_cols, scaler)
+    blocks = [sp.csr_matrix(scaled)]
+    if tfidf is not None:
+        blocks.append(tfidf.astype(dtype, copy=False))
+    return scaled, sp.hstack(blocks, format='csr', dtype=dtype)
+
+
+def center_distances(X, centers, labels):
+    """Euclidean distance of each row to its assigned center (float64, chunked)"""
+    centers = np.asarray(centers, dtype=float)
+    if sp.issparse(X):
+        # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2 without densifying X
+        squared = np.asarray(X.multiply(X).sum(axis=1), dtype=float).ravel()
+        dots = np.asarray(X @ centers.T)[np.arange(X.shape[0]), labels]
+        squared += (centers ** 2).sum(axis=1)[labels] - 2 * dots
+        return np.sqrt(np.maximum(squared, 0.0))
+    distances = np.empty(X.shape[0])
+    for start in range(0, X.shape[0], CHUNK_ROWS):
+        block = X[start:start + CHUNK_ROWS].astype(float)
+        block -= centers[labels[start:start + CHUNK_ROWS]]
+        distances[start:start + CHUNK_ROWS] = np.linalg.norm(block, axis=1)
+    return distances
+
+
+def matrix_memory_mb(X):
+    """Bytes held by a dense or sparse model matrix, in MB"""
+    if sp.issparse(X):
+        return (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 1e6
+    return X.nbytes / 1e6
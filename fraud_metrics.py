@@ -0,0 +1,319 @@
+"""
+Instrumentation — phase timings, memory and cache counters with Prometheus export.
+
+Hooks wrap the pipeline phases, the result store, the dashboard's dataset
+path and its page sections, and record per named span:
+
+    calls      completed spans
+    wall       total / max / last wall seconds
+    cpu        CPU seconds of the calling thread (concurrent dashboard
+               sessions and service workers do not inflate each other)
+    rows       rows processed (the length of the returned frame / matrix,
+               or given explicitly)
+    rss        resident memory at the end of the span; spans opened with
+               ``sample_rss=True`` sample it every few ms for the true peak
+
+plus ``hit`` / ``miss`` / ``append`` counts per cache. ``prometheus_text``
+renders everything in the Prometheus text format and ``write_prometheus``
+replaces a file atomically (for node_exporter's textfile collector).
+
+Collection is off unless ``FRAUD_METRICS=1`` or ``enable()``; while off a
+span is one shared no-op object, so hooks cost a function call.
+
+Usage:
+    with span('pipeline.fit', rows=len(df)):
+        ...
+
+    @timed('store.load_results')
+    def load_results(...):
+        ...
+"""
+import functools
+import os
+import resource
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+METRICS_ENV = 'FRAUD_METRICS'
+METRICS_FILE_ENV = 'FRAUD_METRICS_FILE'
+PREFIX = 'fraud'
+SAMPLE_SECONDS = 0.005
+
+
+# ======================================================================
+# MEMORY
+# ======================================================================
+def rss_mb():
+    """Current resident memory in MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except OSError:
+        # No /proc: the high-water mark is the best available
+        return max_rss_mb()
+
+
+def max_rss_mb():
+    """The process's resident memory high-water mark in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+class PeakRSS:
+    """Samples resident memory on a background thread while the block runs"""
+
+    def __init__(self, interval=SAMPLE_SECONDS):
+        self.interval = interval
+        self.start = self.peak = self.end = 0.0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self):
+        self.start = self.peak = rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.end = rss_mb()
+        self.peak = max(self.peak, self.end)
+
+
+# ======================================================================
+# SPANS
+# ======================================================================
+def count_rows(result):
+    """Rows in a phase result: a frame / array, or the first item of a tuple"""
+    if isinstance(result, tuple):
+        result = result[0] if result else None
+    if hasattr(result, 'shape'):
+        return result.shape[0]
+    return None
+
+
+class SpanStats:
+    __slots__ = ('calls', 'wall', 'wall_max', 'wall_last', 'cpu', 'rows', 'rss_mb', 'peak_rss_mb')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = self.wall_max = self.wall_last = self.cpu = 0.0
+        self.rows = 0
+        self.rss_mb = self.peak_rss_mb = 0.0
+
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'rows', 'sample_rss', '_wall', '_cpu', '_sampler')
+
+    def __init__(self, metrics, name, rows, sample_rss):
+        self.metrics = metrics
+        self.name = name
+        self.rows = rows
+        self.sample_rss = sample_rss
+
+    def __enter__(self):
+        self._sampler = PeakRSS().__enter__() if self.sample_rss else None
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        if self._sampler is not None:
+            self._sampler.__exit__()
+            rss, peak = self._sampler.end, self._sampler.peak
+        else:
+            rss = peak = rss_mb()
+        self.metrics._record(self.name, wall, cpu, self.rows, rss, peak)
+
+
+class _NullSpan:
+    """What every hook gets while collection is off"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Laps:
+    """Consecutive sections of a script: each call closes the section since the previous one"""
+
+    def __init__(self, metrics, prefix):
+        self.metrics = metrics
+        self.prefix = prefix
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+
+    def __call__(self, section, rows=None):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        rss = rss_mb()
+        self.metrics._record(f"{self.prefix}.{section}", wall - self._wall, cpu - self._cpu, rows, rss, rss)
+        self._wall, self._cpu = wall, cpu
+
+
+# ======================================================================
+# REGISTRY
+# ======================================================================
+class Metrics:
+    """Process-wide span and cache counters"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._spans = defaultdict(SpanStats)
+        self._caches = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._caches.clear()
+
+    def span(self, name, rows=None, sample_rss=False):
+        """Context manager timing a block; set ``.rows`` on it if the count is known only later"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, rows, sample_rss)
+
+    def timed(self, name, rows=count_rows, sample_rss=False):
+        """Decorator: a span around every call, with ``rows(result)`` rows processed"""
+
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.span(name, sample_rss=sample_rss) as s:
+                    result = fn(*args, **kwargs)
+                    s.rows = rows(result)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def laps(self, prefix):
+        """A ``Laps`` recorder (a no-op while collection is off)"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Laps(self, prefix)
+
+    def cache(self, name, outcome, count=1):
+        """Count cache lookups: 'hit', 'miss' or 'append'"""
+        if self.enabled and count:
+            with self._lock:
+                self._caches[name, outcome] += count
+
+    def _record(self, name, wall, cpu, rows, rss, peak):
+        with self._lock:
+            stats = self._spans[name]
+            stats.calls += 1
+            stats.wall += wall
+            stats.wall_last = wall
+            stats.wall_max = max(stats.wall_max, wall)
+            stats.cpu += cpu
+            stats.rows += rows or 0
+            stats.rss_mb = rss
+            stats.peak_rss_mb = max(stats.peak_rss_mb, peak)
+
+    def snapshot(self):
+        """``{'spans': [...], 'caches': [...]}`` as plain dicts"""
+        with self._lock:
+            spans = [
+                {
+                    'span': name,
+                    'calls': s.calls,
+                    'wall_seconds': round(s.wall, 6),
+                    'last_seconds': round(s.wall_last, 6),
+                    'max_seconds': round(s.wall_max, 6),
+                    'cpu_seconds': round(s.cpu, 6),
+                    'rows': s.rows,
+                    'rss_mb': round(s.rss_mb, 1),
+                    'peak_rss_mb': round(s.peak_rss_mb, 1),
+                }
+                for name, s in sorted(self._spans.items())
+            ]
+            caches = [
+                {'cache': name, 'outcome': outcome, 'count': count}
+                for (name, outcome), count in sorted(self._caches.items())
+            ]
+        return {'spans': spans, 'caches': caches}
+
+    def prometheus_text(self):
+        """Every counter in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        series = [
+            ('span_calls_total', 'counter', "Completed instrumented spans", 'calls', 1),
+            ('span_wall_seconds_total', 'counter', "Wall time spent in each span", 'wall_seconds', 1),
+            ('span_cpu_seconds_total', 'counter', "CPU time of the calling thread in each span", 'cpu_seconds', 1),
+            ('span_wall_seconds_max', 'gauge', "Slowest single run of each span", 'max_seconds', 1),
+            ('span_rows_total', 'counter', "Rows processed by each span", 'rows', 1),
+            ('span_peak_rss_bytes', 'gauge', "Highest resident memory seen in each span", 'peak_rss_mb', 1e6),
+        ]
+        lines = []
+        for metric, kind, help_text, key, scale in series:
+            lines += [f"# HELP {PREFIX}_{metric} {help_text}", f"# TYPE {PREFIX}_{metric} {kind}"]
+            # Spans that return no frame (the fit steps) have no row count
+            lines += [f'{PREFIX}_{metric}{{span="{_escape(s["span"])}"}} {_number(s[key] * scale)}'
+                      for s in snapshot['spans'] if key != 'rows' or s['rows']]
+        lines += [f"# HELP {PREFIX}_cache_requests_total Cache lookups by outcome",
+                  f"# TYPE {PREFIX}_cache_requests_total counter"]
+        lines += [f'{PREFIX}_cache_requests_total{{cache="{_escape(c["cache"])}",outcome="{c["outcome"]}"}} '
+                  f'{c["count"]}' for c in snapshot['caches']]
+        lines += [f"# HELP {PREFIX}_process_max_rss_bytes Resident memory high-water mark",
+                  f"# TYPE {PREFIX}_process_max_rss_bytes gauge",
+                  f"{PREFIX}_process_max_rss_bytes {_number(max_rss_mb() * 1e6)}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Replace ``path`` with the current metrics (atomic, for textfile collectors)"""
+        # Unique per write: dashboard sessions rerunning at once each rename their own file
+        directory, name = os.path.split(path)
+        tmp = os.path.join(directory, f".{name}.tmp.{uuid.uuid4().hex[:8]}")
+        try:
+            with open(tmp, 'w') as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        return path
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not float(value).is_integer() else str(int(value))
+
+
+# The process-wide registry every hook reports to
+METRICS = Metrics(enabled=os.environ.get(METRICS_ENV) == '1')
+span = METRICS.span
+timed = METRICS.timed
+laps = METRICS.laps
+record_cache = METRICS.cache
@@ -0,0 +1,700 @@
+"""
+Fraud Detection Pipeline — fit once, score many.
+
+Ports Phases 2-6 of ``Fraud_Detection_Applications.ipynb`` into an importable
+module. ``FraudPipeline.fit`` learns every stateful step (imputation medians,
+frequency tables, title similarities, TF-IDF vocabulary, scaler, SVD,
+Isolation Forest, K-Means, rank references and the 95th-percentile threshold)
+and ``FraudPipeline.score`` applies them to a new batch in one vectorized pass
+without refitting anything.
+
+Usage:
+    python fraud_pipeline.py fit applications.csv --bundle-dir models
+    python fraud_pipeline.py score new_batch.csv --bundle-dir models -o scored.csv
+    python fraud_pipeline.py score new_batch.csv --bundle-dir models --results-dir fraud_results \\
+        --neighbors-dir fraud_neighbors
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.cluster import KMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.ensemble import IsolationForest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import StandardScaler
+
+from fraud_cleaning import clean_frame, unique_rows
+from fraud_dataset import APPLICATION_ID
+from fraud_duplicates import CLUSTER_ID_COL, CLUSTER_SIZE_COL, DUPLICATE_COLUMNS, DuplicateClusterer
+from fraud_features import FEATURE_DTYPES, TEXT_FEATURES, center_distances, dense_matrix, sparse_matrix
+from fraud_ingest import ENGINES, load_applications, print_ingest
+from fraud_metrics import METRICS, METRICS_FILE_ENV, timed
+from fraud_neighbors import (BALL_TREE_MAX_ROWS, NEIGHBOR_METHODS, NEIGHBORS_DIR, build_neighbors, index_results,
+                             model_vectors, new_application_ids)
+from fraud_similarity import TitleIndex, find_max_similarity, needs_reference
+from fraud_sketches import DEFAULT_K, KLLSketch, rank_errors, sketch_columns
+from fraud_text import TextHasher
+from fraud_velocity import DATE_COL, VELOCITY_KEYS, VelocityStore
+
+# ======================================================================
+# CONSTANTS (mirrors the notebook)
+# ======================================================================
+TITLE_COL = 'Job Title'
+LOCATION_COL = 'Job Location'
+
+NUMERIC_DTYPES = ['int64', 'float64']
+TEXT_DTYPES = ['object', 'string']
+TEXT_MIN_UNIQUE = 50
+
+ALERT_NORMAL = "Normal"
+
+# 'exact' sorts the training population like the notebook; 'sketch' keeps a
+# mergeable KLL summary per component (see fraud_sketches)
+RANK_METHODS = ('exact', 'sketch')
+
+BUNDLE_FILE = "bundle.joblib"
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+
+
+# ======================================================================
+# HELPERS
+# ======================================================================
+def read_applications(path, engine='arrow'):
+    """Load an applications CSV once (sniffed encoding, cached Arrow schema)"""
+    return load_applications(path, engine)[0]
+
+
+def percentile_rank(reference_sorted, values, ascending=True):
+    """Map values to ``rank(pct=True)`` percentiles against a sorted reference.
+
+    Ties get the average rank exactly like pandas, so scoring the training
+    frame reproduces the notebook ranks. Unseen values fall between their
+    neighbours.
+    """
+    n = len(reference_sorted)
+    values = np.asarray(values, dtype=float)
+    below = np.searchsorted(reference_sorted, values, side='left')
+    at_or_below = np.searchsorted(reference_sorted, values, side='right')
+    ties = at_or_below - below
+    if ascending:
+        ahead = below
+    else:
+        ahead = n - at_or_below
+    return np.clip((ahead + (ties + 1) / 2.0) / n, 0.0, 1.0)
+
+
+def is_count_feature(col):
+    """Raw count features kept readable next to their scaled copies and ranked in Phase 6"""
+    return col == CLUSTER_SIZE_COL or ('_velocity_' in col and not col.endswith('_scaled'))
+
+
+def scoring_columns(df):
+    """Phase 6 proxy columns: numeric freq / similarity / count features"""
+    # Scaled copies live in the (float32) model matrix
+    return [
+        c for c in df.select_dtypes(include=NUMERIC_DTYPES + list(FEATURE_DTYPES)).columns
+        if ("freq" in c or "similarity" in c or is_count_feature(c))
+    ]
+
+
+def new_bundle_version():
+    """UTC timestamp used as the bundle version / directory name"""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def set_current(bundle_dir, version):
+    """Point ``bundle_dir/CURRENT`` at ``version`` with an atomic rename"""
+    bundle_dir = Path(bundle_dir)
+    tmp = bundle_dir / f".{CURRENT_FILE}.tmp"
+    tmp.write_text(version)
+    os.replace(tmp, bundle_dir / CURRENT_FILE)
+
+
+def alert_reasons(iso_rank, km_rank, freq_sim_rank, flags):
+    """Phase 6 alert interpretation; unflagged rows are labelled Normal"""
+    reasons = np.select(
+        [
+            (iso_rank >= 0.99) & (freq_sim_rank >= 0.90),
+            (iso_rank >= 0.90) & (km_rank >= 0.90),
+            (freq_sim_rank >= 0.99)
+        ],
+        [
+            "HIGH CONFIDENCE: Model Anomaly + High Repetition/Similarity",
+            "HIGH CONFIDENCE: Two Model Outliers",
+            "HIGH REPETITION: Extreme Proxy Feature Values"
+        ],
+        default="Suspicious Pattern Detected"
+    )
+    return np.where(flags, reasons, ALERT_NORMAL)
+
+
+# ======================================================================
+# PIPELINE
+# ======================================================================
+class FraudPipeline:
+    """Phases 2-6 as a fit/score estimator with a persisted artifact bundle"""
+
+    def __init__(self, tfidf_max_features=100, svd_components=25,
+                 n_estimators=100, contamination=0.05, max_features=0.8,
+                 n_clusters=5, w_if=0.40, w_km=0.30, w_freq_sim=0.30,
+                 threshold_percentile=0.95, random_state=42, n_jobs=None,
+                 duplicate_columns=None, rank_method='exact', sketch_k=DEFAULT_K,
+                 velocity_keys=None, feature_dtype='float32', text_features='svd'):
+        if rank_method not in RANK_METHODS:
+            raise ValueError(f"rank_method must be one of {RANK_METHODS}, got {rank_method!r}")
+        if feature_dtype not in FEATURE_DTYPES:
+            raise ValueError(f"feature_dtype must be one of {FEATURE_DTYPES}, got {feature_dtype!r}")
+        if text_features not in TEXT_FEATURES:
+            raise ValueError(f"text_features must be one of {TEXT_FEATURES}, got {text_features!r}")
+        self.tfidf_max_features = tfidf_max_features
+        self.svd_components = svd_components
+        self.n_estimators = n_estimators
+        self.contamination = contamination
+        self.max_features = max_features
+        self.n_clusters = n_clusters
+        self.w_if = w_if
+        self.w_km = w_km
+        self.w_freq_sim = w_freq_sim
+        self.threshold_percentile = threshold_percentile
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        # Columns for MinHash LSH duplicate clusters; None keeps the notebook features
+        self.duplicate_columns = duplicate_columns
+        self.rank_method = rank_method
+        self.sketch_k = sketch_k
+        # Key columns for sliding-window velocity counts; None disables them
+        self.velocity_keys = velocity_keys
+        # Model matrix dtype and text block ('sparse' keeps raw TF-IDF in CSR, no SVD;
+        # 'hashed' hashes every text column, not just the first, into the SVD)
+        self.feature_dtype = feature_dtype
+        self.text_features = text_features
+        self.version = None
+
+    def get_params(self):
+        """Constructor parameters, as recorded in the bundle manifest"""
+        return {
+            'tfidf_max_features': self.tfidf_max_features,
+            'svd_components': self.svd_components,
+            'n_estimators': self.n_estimators,
+            'contamination': self.contamination,
+            'max_features': self.max_features,
+            'n_clusters': self.n_clusters,
+            'w_if': self.w_if,
+            'w_km': self.w_km,
+            'w_freq_sim': self.w_freq_sim,
+            'threshold_percentile': self.threshold_percentile,
+            'random_state': self.random_state,
+            'n_jobs': self.n_jobs,
+            'duplicate_columns': self.duplicate_columns,
+            'rank_method': self.rank_method,
+            'sketch_k': self.sketch_k,
+            'velocity_keys': self.velocity_keys,
+            'feature_dtype': self.feature_dtype,
+            'text_features': self.text_features,
+        }
+
+    # ------------------------------------------------------------------
+    # Phase 2 — Cleaning
+    # ------------------------------------------------------------------
+    @timed('pipeline.fit.clean')
+    def _fit_clean(self, df, rows=None):
+        self.input_columns_ = df.columns.tolist()
+        self.num_input_cols_ = df.select_dtypes(include=NUMERIC_DTYPES).columns.tolist()
+        self.cat_input_cols_ = df.select_dtypes(include=TEXT_DTYPES).columns.tolist()
+        self.medians_ = {
+            col: (df[col] if rows is None else df[col].iloc[rows]).median() for col in self.num_input_cols_
+        }
+
+    @timed('pipeline.clean')
+    def _clean(self, df, rows=None):
+        # ``rows`` selects (deduplicated) positions while cleaning
+        return clean_frame(df, self.input_columns_, self.num_input_cols_, self.cat_input_cols_,
+                           self.medians_, rows)
+
+    # ------------------------------------------------------------------
+    # Phase 3 — Feature engineering
+    # ------------------------------------------------------------------
+    @timed('pipeline.fit.engineer')
+    def _fit_proxies(self, df):
+        self.title_counts_ = None
+        self.location_counts_ = None
+        self.title_index_ = None
+        self.title_similarity_ = None
+        if TITLE_COL in df.columns:
+            self.title_counts_ = df[TITLE_COL].value_counts().to_dict()
+            self._fit_title_similarity(df[TITLE_COL].astype(str).str.lower().unique().tolist())
+        if LOCATION_COL in df.columns:
+            self.location_counts_ = df[LOCATION_COL].value_counts().to_dict()
+        self._fit_duplicates(df)
+        self._fit_velocity(df)
+
+    def _fit_duplicates(self, df):
+        self.duplicates_ = None
+        if self.duplicate_columns is not None:
+            self.duplicates_ = DuplicateClusterer(self.duplicate_columns, random_state=self.random_state).fit(df)
+
+    def _fit_title_similarity(self, unique_titles):
+        # One indexed search per unique title instead of one extractBests
+        # scan per row; scores are identical to find_max_similarity.
+        self.title_index_ = TitleIndex(unique_titles)
+        self.title_similarity_ = dict(zip(unique_titles, self.title_index_.similarity_to_others(self.n_jobs)))
+
+    def _fit_velocity(self, df):
+        # An empty store: _engineer replays the training arrivals into it
+        self.velocity_ = None
+        if self.velocity_keys is not None:
+            if DATE_COL not in df.columns:
+                raise ValueError(f"Velocity features need a '{DATE_COL}' column")
+            self.velocity_ = VelocityStore(self.velocity_keys)
+
+    @staticmethod
+    def _frequency(values, reference_counts, per_row=False):
+        # Counts come from the training population; titles or locations never
+        # seen in training fall back to their count within the batch (or to 1
+        # when each row is scored on its own).
+        counts = values.map(reference_counts)
+        if per_row:
+            return np.log1p(counts.fillna(1).astype(float))
+        batch_counts = values.map(values.value_counts())
+        return np.log1p(counts.fillna(batch_counts).astype(float))
+
+    def _title_similarity(self, titles, per_row=False):
+        titles = titles.astype(str).str.lower()
+        known = self.title_similarity_
+        unseen = [t for t in titles.unique() if t not in known]
+        scores = self._unseen_title_similarity(unseen, per_row) if unseen else {}
+        return titles.map(lambda t: known[t] if t in known else scores[t]).astype(float)
+
+    def _unseen_title_similarity(self, unseen, per_row):
+        # Candidates are the training titles plus the title itself (per row)
+        # or plus every unseen title in the batch.
+        similarity = self.title_index_.best_match(unseen, self.n_jobs)
+        if not per_row and len(unseen) > 1:
+            similarity = np.maximum(similarity, TitleIndex(unseen).similarity_to_others(self.n_jobs))
+        scores = dict(zip(unseen, similarity))
+        for t in unseen:
+            if needs_reference(t):
+                scores[t] = find_max_similarity(t, self.title_index_.titles + ([t] if per_row else unseen))
+        return scores
+
+    @timed('pipeline.engineer')
+    def _engineer(self, df, per_row=False, record=True):
+        if self.title_counts_ is not None:
+            df['title_freq'] = self._frequency(df[TITLE_COL], self.title_counts_, per_row)
+        if self.location_counts_ is not None:
+            df['location_freq'] = self._frequency(df[LOCATION_COL], self.location_counts_, per_row)
+        if self.title_similarity_ is not None:
+            df['max_title_similarity'] = self._title_similarity(df[TITLE_COL], per_row)
+        # Bundles written before duplicate clustering have no ``duplicates_``
+        if getattr(self, 'duplicates_', None) is not None:
+            df = self.duplicates_.transform(df, per_row)
+        # Velocity counts are state: engineered batches are recorded as arrivals
+        if getattr(self, 'velocity_', None) is not None:
+            df = self.velocity_.transform(df, record)
+        return df
+
+    # ------------------------------------------------------------------
+    # Phases 3-4 — Text, scaling and SVD
+    # ------------------------------------------------------------------
+    def _make_vectorizer(self):
+        if self.text_features == 'sparse':
+            return TfidfVectorizer(stop_words='english', max_features=self.tfidf_max_features,
+                                   dtype=np.dtype(self.feature_dtype))
+        return TfidfVectorizer(stop_words='english', max_features=self.tfidf_max_features)
+
+    @timed('pipeline.fit.text')
+    def _fit_features(self, df):
+        text_cols = [
+            col for col in df.select_dtypes(include=TEXT_DTYPES).columns
+            if df[col].nunique() > TEXT_MIN_UNIQUE
+        ]
+        if self.text_features == 'hashed':
+            # Every free-text column (submission timestamps are not text)
+            text_cols = [c for c in text_cols if c != DATE_COL]
+        self.text_col_ = text_cols[0] if text_cols else None
+        self.text_cols_ = text_cols if self.text_features == 'hashed' else text_cols[:1]
+        self.vectorizer_ = None
+        self.svd_ = None
+        if self.text_col_ is not None:
+            if self.text_features == 'hashed':
+                self.vectorizer_ = TextHasher(self.text_cols_)
+                tfidf_vectors = self.vectorizer_.transform(df, self.n_jobs)
+            else:
+                self.vectorizer_ = self._make_vectorizer()
+                tfidf_vectors = self.vectorizer_.fit_transform(df[self.text_col_].fillna(''))
+            n_components = min(self.svd_components, tfidf_vectors.shape[1] - 1)
+            if n_components > 0 and self.text_features != 'sparse':
+                self.svd_ = TruncatedSVD(n_components=n_components, random_state=self.random_state)
+                self.svd_.fit(tfidf_vectors)
+
+        self.scale_cols_ = [
+            c for c in df.select_dtypes(include=NUMERIC_DTYPES).columns
+            if not c.endswith('_scaled') and c != CLUSTER_ID_COL
+        ]
+        self.scaler_ = StandardScaler().fit(df[self.scale_cols_]) if self.scale_cols_ else None
+
+        self.scaled_cols_ = [f"{c}_scaled" for c in self.scale_cols_]
+        self.svd_cols_ = []
+        self.tfidf_cols_ = []
+        if self.svd_ is not None:
+            self.svd_cols_ = [f"svd_component_{i+1}" for i in range(self.svd_.n_components)]
+        elif self.text_features == 'sparse' and self.vectorizer_ is not None:
+            self.tfidf_cols_ = [f"tfidf_{term}" for term in self.vectorizer_.get_feature_names_out()]
+        self.model_features_ = self.scaled_cols_ + self.svd_cols_ + self.tfidf_cols_
+
+    def _text_vectors(self, df):
+        # Sparse text block of a cleaned batch: hashed text columns or the fitted TF-IDF
+        if isinstance(self.vectorizer_, TextHasher):
+            return self.vectorizer_.transform(df, self.n_jobs)
+        return self.vectorizer_.transform(df[self.text_col_].fillna(''))
+
+    @timed('pipeline.features')
+    def _features(self, df):
+        """Fill the model matrix for a cleaned batch and attach its columns to the frame.
+
+        The matrix is allocated once; the scaled / SVD output columns are
+        views of it, so no frame is copied (see fraud_features).
+        """
+        df = df.set_axis(pd.RangeIndex(len(df)))
+        sparse = getattr(self, 'text_features', 'svd') == 'sparse'
+        tfidf_vectors = None
+        if self.svd_ is not None or (sparse and self.vectorizer_ is not None):
+            tfidf_vectors = self._text_vectors(df)
+        # Bundles written before the preallocated matrix were fitted on float64
+        dtype = getattr(self, 'feature_dtype', 'float64')
+        if sparse:
+            block, X = sparse_matrix(df, self.scale_cols_, self.scaler_, tfidf_vectors, dtype)
+            block_cols = self.scaled_cols_
+        else:
+            X = dense_matrix(df, self.scale_cols_, self.scaler_, tfidf_vectors, self.svd_, dtype)
+            block, block_cols = X, self.scaled_cols_ + self.svd_cols_
+        base = df.drop(columns=[c for c in self.scale_cols_ if not is_count_feature(c)], errors='ignore')
+        df = pd.concat([base, pd.DataFrame(block, columns=block_cols, copy=False)], axis=1)
+        return df, X
+
+    # ------------------------------------------------------------------
+    # Phase 5 — Models
+    # ------------------------------------------------------------------
+    @timed('pipeline.fit.models')
+    def _fit_models(self, X):
+        self.iso_ = IsolationForest(
+            n_estimators=self.n_estimators,
+            contamination=self.contamination,
+            random_state=self.random_state,
+            max_features=self.max_features
+        ).fit(X)
+        self.kmeans_ = KMeans(n_clusters=self.n_clusters, random_state=self.random_state, n_init='auto').fit(X)
+
+    @timed('pipeline.models')
+    def _apply_models(self, df, X):
+        df['iso_score_raw'] = self.iso_.decision_function(X)
+        df['iso_prediction'] = self.iso_.predict(X)
+        clusters = self.kmeans_.predict(X)
+        df['cluster'] = clusters
+        df['kmeans_distance'] = center_distances(X, self.kmeans_.cluster_centers_, clusters)
+        return df
+
+    # ------------------------------------------------------------------
+    # Phase 6 — Scoring
+    # ------------------------------------------------------------------
+    def _rank_columns(self):
+        return ['iso_score_raw', 'kmeans_distance'] + self.scoring_features_
+
+    @timed('pipeline.fit.ranks')
+    def _fit_ranks(self, df):
+        self.scoring_features_ = scoring_columns(df)
+        self.rank_reference_ = None
+        self.rank_sketches_ = None
+        if self.rank_method == 'sketch':
+            self.rank_sketches_ = sketch_columns(df, self._rank_columns(), self.sketch_k, self.random_state)
+        else:
+            self.rank_reference_ = {
+                col: np.sort(df[col].to_numpy(dtype=float)) for col in self._rank_columns()
+            }
+
+    def _rank(self, col, values, ascending=True):
+        # Bundles written before sketch ranks have no ``rank_sketches_``
+        if getattr(self, 'rank_sketches_', None) is not None:
+            return self.rank_sketches_[col].rank(values, ascending)
+        return percentile_rank(self.rank_reference_[col], values, ascending)
+
+    @timed('pipeline.ranks')
+    def _apply_ranks(self, df):
+        df['iso_anomaly_rank'] = self._rank('iso_score_raw', df['iso_score_raw'], ascending=False)
+        df['kmeans_distance_rank'] = self._rank('kmeans_distance', df['kmeans_distance'])
+        rank_cols = []
+        for col in self.scoring_features_:
+            df[f"{col}_rank"] = self._rank(col, df[col])
+            rank_cols.append(f"{col}_rank")
+        if rank_cols:
+            df['freq_sim_combined_rank'] = df[rank_cols].mean(axis=1)
+        else:
+            df['freq_sim_combined_rank'] = 0.0
+        df['fraud_score'] = (df['iso_anomaly_rank'] * self.w_if) + \
+                            (df['kmeans_distance_rank'] * self.w_km) + \
+                            (df['freq_sim_combined_rank'] * self.w_freq_sim)
+        return df
+
+    @timed('pipeline.fit.threshold')
+    def _fit_threshold(self, df):
+        self.score_sketch_ = None
+        self.rank_errors_ = None
+        if self.rank_method == 'sketch':
+            self.score_sketch_ = KLLSketch(self.sketch_k, seed=self.random_state).update(df['fraud_score'])
+            self.threshold_ = self.score_sketch_.quantile(self.threshold_percentile)
+            self.rank_errors_ = rank_errors(self.rank_sketches_, df, ascending={'iso_score_raw': False})
+        else:
+            self.threshold_ = float(df['fraud_score'].quantile(self.threshold_percentile))
+
+    @timed('pipeline.flags')
+    def _apply_flags(self, df):
+        df['fraud_flag'] = df['fraud_score'] >= self.threshold_
+        df['Alert_Reason'] = alert_reasons(
+            df['iso_anomaly_rank'].to_numpy(),
+            df['kmeans_distance_rank'].to_numpy(),
+            df['freq_sim_combined_rank'].to_numpy(),
+            df['fraud_flag'].to_numpy()
+        )
+        return df
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    @timed('pipeline.fit', rows=lambda pipeline: pipeline.n_training_rows_, sample_rss=True)
+    def fit(self, df):
+        """Fit every stateful step on a raw applications frame"""
+        rows = unique_rows(df)
+        self._fit_clean(df, rows)
+        df = self._clean(df, rows)
+        self._fit_proxies(df)
+        df = self._engineer(df)
+        self._fit_features(df)
+        df, X = self._features(df)
+        self._fit_models(X)
+        df = self._apply_models(df, X)
+        self._fit_ranks(df)
+        df = self._apply_ranks(df)
+        self._fit_threshold(df)
+        self.n_training_rows_ = len(df)
+        self.version = new_bundle_version()
+        return self
+
+    @timed('pipeline.score')
+    def score(self, df, per_row=False):
+        """Score a raw batch with the fitted artifacts (no refitting).
+
+        With ``per_row=True`` every row is scored as if it arrived alone, so
+        results do not depend on which other rows share the batch. With
+        velocity features the batch is recorded as new arrivals once it has
+        scored; a batch that raises records nothing.
+        """
+        if self.version is None:
+            raise RuntimeError("FraudPipeline must be fitted or loaded before scoring")
+        return self._score_clean(self._clean(df), per_row)
+
+    def _score_clean(self, df, per_row=False):
+        # Phases 3-6 on an already cleaned batch (see fraud_score_cache)
+        df = self._engineer(df, per_row, record=False)
+        df, X = self._features(df)
+        df = self._apply_models(df, X)
+        df = self._apply_ranks(df)
+        df = self._apply_flags(df)
+        if getattr(self, 'velocity_', None) is not None:
+            self.velocity_.record(df)
+        return df
+
+    def observe(self, scored):
+        """Fold a scored batch into the rank sketches and move the threshold.
+
+        Only for ``rank_method='sketch'``: later batches are ranked against
+        the training population plus every observed batch.
+        """
+        if getattr(self, 'rank_sketches_', None) is None:
+            raise RuntimeError("observe() needs a pipeline fitted with rank_method='sketch'")
+        for col, sketch in self.rank_sketches_.items():
+            sketch.update(scored[col])
+        self.score_sketch_.update(scored['fraud_score'])
+        self.threshold_ = self.score_sketch_.quantile(self.threshold_percentile)
+        return self
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def manifest(self):
+        """JSON-serializable description of the fitted bundle"""
+        manifest = {
+            'version': self.version,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'sklearn_version': sklearn.__version__,
+            'pandas_version': pd.__version__,
+            'n_training_rows': self.n_training_rows_,
+            'input_columns': self.input_columns_,
+            'text_column': self.text_col_,
+            'text_columns': getattr(self, 'text_cols_', [self.text_col_] if self.text_col_ else []),
+            'model_features': self.model_features_,
+            'scoring_features': self.scoring_features_,
+            'threshold': self.threshold_,
+            'params': self.get_params(),
+        }
+        if getattr(self, 'duplicates_', None) is not None:
+            manifest['duplicate_clusters'] = self.duplicates_.summary()
+        if getattr(self, 'rank_errors_', None) is not None:
+            manifest['rank_errors'] = self.rank_errors_
+        if getattr(self, 'velocity_', None) is not None:
+            manifest['velocity'] = self.velocity_.summary()
+        return manifest
+
+    def save(self, bundle_dir, make_current=True):
+        """Write a versioned bundle under ``bundle_dir`` and (by default) mark it current"""
+        bundle_dir = Path(bundle_dir)
+        version_dir = bundle_dir / self.version
+        version_dir.mkdir(parents=True, exist_ok=True)
+        # Persist the fitted state rather than the instance so bundles load
+        # the same whether they were written from the CLI or an import.
+        joblib.dump(self.__dict__, version_dir / BUNDLE_FILE)
+        with open(version_dir / MANIFEST_FILE, 'w') as f:
+            json.dump(self.manifest(), f, indent=2, default=str)
+
+        if make_current:
+            set_current(bundle_dir, self.version)
+        return version_dir
+
+    @classmethod
+    def load(cls, path):
+        """Load a bundle from a version directory or a bundle root with CURRENT"""
+        path = Path(path)
+        if (path / CURRENT_FILE).exists():
+            path = path / (path / CURRENT_FILE).read_text().strip()
+        state = joblib.load(path / BUNDLE_FILE)
+        if not isinstance(state, dict) or 'threshold_' not in state:
+            raise TypeError(f"{path / BUNDLE_FILE} is not a fitted {cls.__name__} bundle")
+        pipeline = cls.__new__(cls)
+        pipeline.__dict__.update(state)
+        return pipeline
+
+
+# ======================================================================
+# CLI
+# ======================================================================
+def print_rank_errors(report):
+    """Sketch vs exact rank error per Phase 6 component"""
+    print("📊 Sketch rank error vs exact ranks (max / mean / guaranteed bound):")
+    for col, stats in report.items():
+        observed = "n/a / n/a" if stats['max_abs_error'] is None else \
+            f"{stats['max_abs_error']:.4f} / {stats['mean_abs_error']:.4f}"
+        print(f"   {col:<32} {observed} / {stats['error_bound']:.4f} ({stats['retained_items']:,} items)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit or apply the fraud detection pipeline")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    fit_parser = sub.add_parser('fit', help="Fit the pipeline and save a model bundle")
+    fit_parser.add_argument('input', help="Training applications CSV")
+    fit_parser.add_argument('--bundle-dir', default='models', help="Bundle root directory")
+    fit_parser.add_argument('--engine', choices=ENGINES, default='arrow', help="CSV reader")
+    fit_parser.add_argument('--duplicate-columns', nargs='*', metavar='COL',
+                            help="Add MinHash LSH duplicate clusters over these columns "
+                                 f"(no names: {', '.join(DUPLICATE_COLUMNS)})")
+    fit_parser.add_argument('--rank-method', choices=RANK_METHODS, default='exact',
+                            help="Exact training ranks or mergeable KLL sketches")
+    fit_parser.add_argument('--text-features', choices=TEXT_FEATURES, default='svd',
+                            help="TF-IDF of the first text column into SVD, raw sparse TF-IDF, or every "
+                                 "text column hashed into SVD")
+    fit_parser.add_argument('--velocity-keys', nargs='*', metavar='COL',
+                            help=f"Add 1h/24h/7d submission velocity per key column from '{DATE_COL}' "
+                                 f"(no names: {', '.join(VELOCITY_KEYS)})")
+
+    score_parser = sub.add_parser('score', help="Score a CSV batch with a saved bundle")
+    score_parser.add_argument('input', help="Applications CSV to score")
+    score_parser.add_argument('--bundle-dir', default='models', help="Bundle root or version directory")
+    score_parser.add_argument('-o', '--output', help="Scored CSV output "
+                                                     "(default: fraud_detection_full_dataset.csv without --results-dir)")
+    score_parser.add_argument('--results-dir', help="Add the scores to this date-partitioned Parquet result store")
+    score_parser.add_argument('--results-mode', choices=('append', 'replace'), default='append',
+                              help="Add to the rows already stored for each day, or replace them")
+    score_parser.add_argument('--engine', choices=ENGINES, default='arrow', help="CSV reader")
+    score_parser.add_argument('--neighbors-dir', help="Keep a find-similar index of the model vectors here: of "
+                                                      "every stored row with --results-dir, else of this batch "
+                                                      f"(the dashboard reads '{NEIGHBORS_DIR}')")
+    score_parser.add_argument('--neighbors-method', choices=NEIGHBOR_METHODS, default='auto',
+                              help=f"Exact ball tree, approximate HNSW graph, or by size (auto: HNSW above "
+                                   f"{BALL_TREE_MAX_ROWS:,} rows)")
+
+    for p in (fit_parser, score_parser):
+        p.add_argument('--metrics-file', default=os.environ.get(METRICS_FILE_ENV),
+                       help=f"Write per-phase timings in Prometheus text format here (env {METRICS_FILE_ENV})")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    if args.metrics_file:
+        METRICS.enable()
+
+    if args.command == 'fit':
+        duplicate_columns = args.duplicate_columns
+        if duplicate_columns is not None and not duplicate_columns:
+            duplicate_columns = DUPLICATE_COLUMNS
+        velocity_keys = args.velocity_keys
+        if velocity_keys is not None and not velocity_keys:
+            velocity_keys = VELOCITY_KEYS
+        pipeline = FraudPipeline(duplicate_columns=duplicate_columns, rank_method=args.rank_method,
+                                 velocity_keys=velocity_keys, text_features=args.text_features)
+        df, report = load_applications(args.input, args.engine)
+        print_ingest(report)
+        pipeline.fit(df)
+        version_dir = pipeline.save(args.bundle_dir)
+        print(f"✔️ Bundle {pipeline.version} saved to {version_dir} "
+              f"({pipeline.n_training_rows_:,} rows, threshold {pipeline.threshold_:.4f})")
+        if pipeline.rank_errors_:
+            print_rank_errors(pipeline.rank_errors_)
+    else:
+        pipeline = FraudPipeline.load(args.bundle_dir)
+        df, report = load_applications(args.input, args.engine)
+        print_ingest(report)
+        scored = pipeline.score(df)
+        if APPLICATION_ID not in scored.columns:
+            scored.insert(0, APPLICATION_ID, new_application_ids(len(scored)))
+        print(f"🚨 Scored {len(scored):,} applications with bundle {pipeline.version}: "
+              f"{int(scored['fraud_flag'].sum()):,} flagged")
+        if args.results_dir:
+            from fraud_store import export_results
+
+            summary = export_results(scored, args.results_dir, mode=args.results_mode)
+            print(f"✔️ {summary['partitions']:,} day partitions → {args.results_dir} "
+                  f"({summary['bytes'] / 1e6:,.1f} MB)")
+        if args.neighbors_dir:
+            if args.results_dir:
+                # The dashboard shows the whole store, so the index follows it
+                features, _ = model_vectors(scored.iloc[:0], pipeline)
+                index, added = index_results(args.results_dir, args.neighbors_dir, features,
+                                             args.neighbors_method, pipeline.n_jobs)
+            else:
+                index = build_neighbors(scored, pipeline, args.neighbors_method)
+                index.save(args.neighbors_dir)
+                added = index.n_rows
+            summary = index.summary()
+            fallback = f", {summary['fallback']}" if summary['fallback'] else ""
+            print(f"🧭 {summary['method']} index of {summary['rows']:,} rows (+{added:,}) x "
+                  f"{summary['dimensions']} model features → {args.neighbors_dir} "
+                  f"({summary['build_seconds']:.2f}s{fallback})")
+        if args.output or not args.results_dir:
+            output = args.output or 'fraud_detection_full_dataset.csv'
+            scored.to_csv(output, index=False)
+            print(f"✔️ Scored CSV → {output}")
+
+    print(f"⏱️ Done in {time.perf_counter() - start:.2f}s")
+    if args.metrics_file:
+        METRICS.write_prometheus(args.metrics_file)
+        print(f"📊 Metrics → {args.metrics_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+Score Cache — content-hash cache for resubmitted applications.
+
+Fraudsters resubmit the same application many times, often only re-cased or
+re-spaced. Phase 2 cleaning strips and lowercases every text field, so those
+copies clean to one record. Each request is keyed on a 128-bit hash of its
+cleaned record, and records already scored by the serving bundle skip
+Phases 3-6 (TF-IDF, SVD, Isolation Forest, K-Means) entirely:
+
+    memory    bounded LRU of the most recently used records
+    disk      optional SQLite tier that survives restarts; its hits are
+              promoted to memory
+    version   entries belong to one bundle version; deploying a new bundle
+              drops every entry in both tiers
+
+A hit returns the stored fraud_score, fraud_flag and Alert_Reason plus the
+raw Phase 6 components, so drift monitoring still sees cached rows. Only
+per-row scores are cached (batch scores depend on the rest of the batch),
+and pipelines with velocity features are never cached because every arrival
+changes the counts.
+
+``stats()`` reports hits per tier, the hit rate and the latency saved: the
+hits times the mean per-row scoring time of the misses.
+
+Usage:
+    cache = ScoreCache(max_entries=50_000, path='score_cache.sqlite')
+    scored = score_cached(pipeline, batch, cache)
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from fraud_metrics import record_cache
+from fraud_velocity import DATE_COL
+
+MAX_ENTRIES = 50_000
+RESULT_COLUMNS = ['fraud_score', 'fraud_flag', 'Alert_Reason']
+
+
+# ======================================================================
+# KEYS
+# ======================================================================
+def cacheable(pipeline):
+    """Whether a per-row score depends on the record alone (no velocity state)"""
+    return getattr(pipeline, 'velocity_', None) is None
+
+
+def key_columns(pipeline):
+    """Cleaned input columns that can change a per-row score.
+
+    Without velocity features the submission date is ignored, so a later
+    resubmission still hits, unless it is a text feature column or a
+    duplicate cluster column.
+    """
+    used = set(getattr(pipeline, 'text_cols_', [pipeline.text_col_]))
+    duplicates = getattr(pipeline, 'duplicates_', None)
+    if duplicates is not None:
+        used.update(duplicates.columns)
+    return [c for c in pipeline.input_columns_ if c != DATE_COL or c in used]
+
+
+def record_keys(clean, columns):
+    """One 128-bit hex key per cleaned record"""
+    # Service batches are small: hashing the rows directly beats the per-column
+    # setup of pandas' vectorized hashing
+    rows = zip(*(clean[col].tolist() for col in columns))
+    return [hashlib.blake2b(repr(row).encode(), digest_size=16).hexdigest() for row in rows]
+
+
+# ======================================================================
+# CACHE
+# ======================================================================
+class ScoreCache:
+    """Bounded LRU of per-row scores with an optional SQLite tier, for one bundle version"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            # A lost write only costs a rescore
+            self._db.execute("PRAGMA synchronous = OFF")
+            self._db.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, version TEXT, value TEXT)")
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+        self.scored_rows = 0
+        self.scoring_seconds = 0.0
+
+    def invalidate(self, version):
+        """Serve ``version`` from now on: every entry of another bundle is dropped"""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM scores WHERE version != ?", (version,))
+                self._db.commit()
+
+    def get_many(self, version, keys):
+        """``{key: values}`` for the cached keys (nothing while another version is served)"""
+        if self.version is None:
+            self.invalidate(version)
+        found = {}
+        with self._lock:
+            if version != self.version:
+                self.misses += len(keys)
+                record_cache('score', 'miss', len(keys))
+                return found
+            for key in keys:
+                values = self._entries.get(key)
+                if values is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = values
+            memory_hits = sum(1 for key in keys if key in found)
+            missing = list({key for key in keys if key not in found})
+            disk = {}
+            if self._db is not None and missing:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, value FROM scores WHERE version = ? AND key IN ({','.join('?' * len(chunk))})",
+                        [version] + chunk,
+                    )
+                    disk.update((key, tuple(json.loads(value))) for key, value in rows)
+                for key, values in disk.items():
+                    self._store(key, values)
+                found.update(disk)
+            disk_hits = sum(1 for key in keys if key in disk)
+            misses = len(keys) - memory_hits - disk_hits
+            self.memory_hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += misses
+        record_cache('score', 'hit', memory_hits + disk_hits)
+        record_cache('score', 'miss', misses)
+        return found
+
+    def put_many(self, version, entries, seconds):
+        """Store freshly scored ``{key: values}`` that took ``seconds`` to score"""
+        with self._lock:
+            self.scored_rows += len(entries)
+            self.scoring_seconds += seconds
+            # Scored by a bundle that has since been replaced
+            if version != self.version:
+                return
+            for key, values in entries.items():
+                self._store(key, values)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO scores VALUES (?, ?, ?)",
+                    [(key, version, json.dumps(values)) for key, values in entries.items()],
+                )
+                self._db.commit()
+
+    def _store(self, key, values):
+        self._entries[key] = values
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Hit rate per tier and the scoring latency the hits saved"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            row_seconds = self.scoring_seconds / self.scored_rows if self.scored_rows else 0.0
+            return {
+                'version': self.version,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'disk': self.path,
+                'lookups': lookups,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'miss_score_ms': round(row_seconds * 1000, 3),
+                'saved_seconds': round(hits * row_seconds, 3),
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+# ======================================================================
+# SCORING
+# ======================================================================
+def score_cached(pipeline, df, cache):
+    """``pipeline.score(df, per_row=True)`` for the cached columns, running the models on unseen records only.
+
+    Returns the Phase 6 components plus fraud_score, fraud_flag and
+    Alert_Reason, one row per row of ``df`` in its order.
+    """
+    if pipeline.version is None:
+        raise RuntimeError("FraudPipeline must be fitted or loaded before scoring")
+    columns = pipeline._rank_columns() + RESULT_COLUMNS
+    clean = pipeline._clean(df)
+    keys = record_keys(clean, key_columns(pipeline))
+    found = cache.get_many(pipeline.version, keys)
+
+    # First position of every unseen record (repeats within the batch score once)
+    unseen = {}
+    for position, key in enumerate(keys):
+        if key not in found and key not in unseen:
+            unseen[key] = position
+    if unseen:
+        start = time.perf_counter()
+        scored = pipeline._score_clean(clean.iloc[list(unseen.values())], per_row=True)
+        values = zip(*(scored[col].tolist() for col in columns))
+        entries = dict(zip(unseen, values))
+        cache.put_many(pipeline.version, entries, time.perf_counter() - start)
+        found.update(entries)
+    return pd.DataFrame.from_records([found[key] for key in keys], columns=columns, index=df.index)
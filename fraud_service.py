@@ -0,0 +1,417 @@
+"""
+Fraud Scoring Service — local asyncio HTTP endpoint with micro-batching.
+
+Single applications are POSTed as JSON to ``/score``. Requests are queued and
+grouped into micro-batches (closed when ``max_batch_size`` requests are
+waiting or ``max_wait_ms`` has elapsed since the first one), so the TF-IDF ->
+SVD transform, ``IsolationForest.decision_function`` and the K-Means distance
+run on one matrix per batch. Batches are scored on a pool of ``workers``
+threads with ``FraudPipeline.score(per_row=True)``, which gives every
+application the same Phase 6 score it would get on its own. Records already
+scored by the serving bundle are answered from a content-hash score cache
+without running the models (see fraud_score_cache).
+
+Every scored batch feeds a ``DriftMonitor``. New bundles are hot-swapped
+without pausing scoring: each batch reads the pipeline reference once, and
+the reference is replaced only after the new bundle is fully loaded. Bundles
+come from ``CURRENT`` (polled, so an external ``fraud_drift.py watch`` can
+promote them) or, with ``--retrain-data``, from an in-process scheduler that
+refits on drift or schedule (see fraud_drift).
+
+Endpoints:
+    POST /score   one application (JSON object) -> fraud_score, fraud_flag, Alert_Reason
+    GET  /stats   p50/p99 latency, throughput, batch sizes and score cache hit rate
+    GET  /health  bundle version
+    GET  /drift   PSI / KS per Phase 6 component and the retraining history
+    GET  /metrics per-phase timings and cache counters in Prometheus text format
+                  (collected with --metrics; see fraud_metrics)
+
+Usage:
+    python fraud_service.py --bundle-dir models --port 8080 --workers 2
+    python fraud_service.py --bundle-dir models --retrain-data applications.csv --retrain-hours 168
+    python fraud_service.py --bundle-dir models --cache-size 100000 --cache-path score_cache.sqlite
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from fraud_drift import (
+    CHECK_SECONDS,
+    COOLDOWN_SECONDS,
+    KS_THRESHOLD,
+    PSI_THRESHOLD,
+    RETRAIN_HOURS,
+    RETRY_SECONDS,
+    BundleWatcher,
+    DriftMonitor,
+    RetrainScheduler,
+)
+from fraud_metrics import METRICS, timed
+from fraud_pipeline import FraudPipeline
+from fraud_score_cache import MAX_ENTRIES, ScoreCache, cacheable, score_cached
+from fraud_velocity import DATE_COL
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# JSON values a record field may hold (nested objects / arrays cannot be cleaned)
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+# ======================================================================
+# REQUEST VALIDATION
+# ======================================================================
+def record_error(record, columns):
+    """Why ``record`` cannot be scored against ``columns``, or None if it can"""
+    if not isinstance(record, dict):
+        return "Expected a single application as a JSON object"
+    known = set(columns) | {DATE_COL}
+    unknown = [key for key in record if key not in known]
+    if unknown:
+        return f"Unknown columns: {', '.join(map(str, unknown[:10]))}"
+    nested = [key for key, value in record.items() if not isinstance(value, SCALAR_TYPES)]
+    if nested:
+        return f"Columns must hold a string, number, boolean or null: {', '.join(nested[:10])}"
+    # json.loads accepts Infinity, which no scaler or model can take (NaN is a missing value and gets imputed)
+    infinite = [key for key, value in record.items() if isinstance(value, float) and math.isinf(value)]
+    if infinite:
+        return f"Columns must hold finite numbers: {', '.join(infinite[:10])}"
+    return None
+
+
+# ======================================================================
+# LATENCY & THROUGHPUT STATS
+# ======================================================================
+class ServiceStats:
+    """Rolling latency window plus lifetime request and batch counters"""
+
+    def __init__(self, window=10000):
+        self.latencies_ms = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+
+    def record_batch(self, size):
+        self.batch_sizes.append(size)
+
+    def record_request(self, latency_ms):
+        self.requests += 1
+        self.latencies_ms.append(latency_ms)
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        latencies = np.fromiter(self.latencies_ms, dtype=float)
+        p50, p99 = (np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0))
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'uptime_s': round(elapsed, 3),
+            'throughput_rps': round(self.requests / elapsed, 2) if elapsed > 0 else 0.0,
+            'latency_p50_ms': round(float(p50), 3),
+            'latency_p99_ms': round(float(p99), 3),
+            'mean_batch_size': round(float(np.mean(self.batch_sizes)), 2) if self.batch_sizes else 0.0,
+        }
+
+
+# ======================================================================
+# MICRO-BATCHER
+# ======================================================================
+class MicroBatcher:
+    """Collect single-application requests into size/latency-bounded batches"""
+
+    def __init__(self, pipeline, max_batch_size=64, max_wait_ms=5.0, workers=2, stats=None, monitor=None,
+                 cache=None):
+        self.pipeline = pipeline
+        self.monitor = monitor
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+        self.stats = stats or ServiceStats()
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fraud-score")
+        self._slots = asyncio.Semaphore(workers)
+        self._collector = None
+
+    def start(self):
+        self._collector = asyncio.create_task(self._collect())
+
+    def swap(self, pipeline):
+        """Serve ``pipeline`` from the next batch on (batches in flight finish on the old one)"""
+        if self.monitor is not None and self.monitor.version != pipeline.version:
+            self.monitor.rebase(pipeline)
+        if self.cache is not None:
+            # Scores of the old bundle must never be served for the new one
+            self.cache.invalidate(pipeline.version)
+        self.pipeline = pipeline
+        print(f"🔄 Now scoring with bundle {pipeline.version}")
+
+    async def stop(self):
+        if self._collector is not None:
+            self._collector.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def submit(self, record):
+        """Queue one application and wait for its score"""
+        future = asyncio.get_running_loop().create_future()
+        # Velocity features count arrivals, so undated requests arrive now (on a copy: the caller keeps its dict)
+        record = {DATE_COL: datetime.now(timezone.utc).isoformat(), **record}
+        await self._queue.put((record, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Wait for a free worker before dispatching so the next batch keeps
+            # filling while every worker is busy.
+            await self._slots.acquire()
+            asyncio.create_task(self._run(batch))
+
+    async def _run(self, batch):
+        records = [record for record, _ in batch]
+        futures = [future for _, future in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            try:
+                results = await loop.run_in_executor(self._executor, self._score_batch, records)
+            except Exception as e:
+                if len(records) == 1:
+                    results = [e]
+                else:
+                    # Rescore one record at a time so only the bad record gets the error
+                    results = await loop.run_in_executor(self._executor, self._score_each, records)
+            for future, result in zip(futures, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.stats.record_batch(len(batch))
+            self._slots.release()
+
+    def _score_each(self, records):
+        # A result or the exception per record
+        results = []
+        for record in records:
+            try:
+                results.append(self._score_batch([record])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    @timed('service.batch', rows=len)
+    def _score_batch(self, records):
+        # One read of the reference: a concurrent swap never splits a batch
+        pipeline = self.pipeline
+        batch = pd.DataFrame.from_records(records)
+        if self.cache is not None and cacheable(pipeline):
+            scored = score_cached(pipeline, batch, self.cache)
+        else:
+            scored = pipeline.score(batch, per_row=True)
+        if self.monitor is not None:
+            self.monitor.observe(scored)
+        return [
+            {
+                'fraud_score': float(score),
+                'fraud_flag': bool(flag),
+                'Alert_Reason': str(reason),
+                'model_version': pipeline.version,
+            }
+            for score, flag, reason in zip(scored['fraud_score'], scored['fraud_flag'], scored['Alert_Reason'])
+        ]
+
+
+# ======================================================================
+# HTTP SERVER
+# ======================================================================
+class FraudScoringServer:
+    """Minimal HTTP/1.1 front end for the micro-batcher (keep-alive aware)"""
+
+    def __init__(self, batcher, host=DEFAULT_HOST, port=DEFAULT_PORT, scheduler=None):
+        self.batcher = batcher
+        self.stats = batcher.stats
+        self.scheduler = scheduler
+        self.host = host
+        self.port = port
+
+    async def serve_forever(self):
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"🚀 Scoring bundle {self.batcher.pipeline.version} on http://{self.host}:{self.port} "
+              f"(workers={self.batcher.workers}, batch≤{self.batcher.max_batch_size}, "
+              f"wait≤{self.batcher.max_wait * 1000:.1f}ms)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0) or 0))
+
+                status, payload = await self._route(method, path, body)
+                if isinstance(payload, str):
+                    content_type, data = "text/plain; version=0.0.4", payload.encode()
+                else:
+                    content_type, data = "application/json", json.dumps(payload).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        path = path.split('?', 1)[0]
+        if path == '/score':
+            if method != 'POST':
+                return 405, {'error': "POST a JSON application to /score"}
+            return await self._score(body)
+        if path == '/stats' and method == 'GET':
+            payload = self.stats.snapshot()
+            if self.batcher.cache is not None:
+                payload['cache'] = self.batcher.cache.stats()
+            return 200, payload
+        if path == '/health' and method == 'GET':
+            return 200, {'status': 'ok', 'model_version': self.batcher.pipeline.version}
+        if path == '/drift' and method == 'GET':
+            if self.batcher.monitor is None:
+                return 404, {'error': "Drift monitoring is disabled"}
+            payload = self.batcher.monitor.report()
+            if self.scheduler is not None:
+                payload['retraining'] = self.scheduler.history
+            return 200, payload
+        if path == '/metrics' and method == 'GET':
+            return 200, METRICS.prometheus_text()
+        return 404, {'error': f"Unknown endpoint {path}"}
+
+    async def _score(self, body):
+        start = time.perf_counter()
+        try:
+            record = json.loads(body)
+        except json.JSONDecodeError as e:
+            return 400, {'error': f"Invalid JSON: {e}"}
+        error = record_error(record, self.batcher.pipeline.input_columns_)
+        if error is not None:
+            return 400, {'error': error}
+        try:
+            result = await self.batcher.submit(record)
+        except Exception as e:
+            self.stats.errors += 1
+            return 500, {'error': str(e)}
+        self.stats.record_request((time.perf_counter() - start) * 1000)
+        return 200, result
+
+
+# ======================================================================
+# CLI
+# ======================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve fraud scores over HTTP with micro-batching")
+    parser.add_argument('--bundle-dir', default='models', help="Bundle root or version directory")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=2, help="Concurrent scoring threads")
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help="Batch latency window")
+    parser.add_argument('--reload-seconds', type=float, default=30.0,
+                        help="Poll CURRENT and hot-swap newly promoted bundles (0 disables)")
+    parser.add_argument('--retrain-data', help="Retrain in the background from this CSV on drift or schedule")
+    parser.add_argument('--retrain-hours', type=float, default=RETRAIN_HOURS,
+                        help="Retrain bundles older than this (0 disables the schedule)")
+    parser.add_argument('--check-seconds', type=float, default=CHECK_SECONDS, help="Drift check interval")
+    parser.add_argument('--retry-seconds', type=float, default=RETRY_SECONDS,
+                        help="Cooldown after a failed retrain, doubled on each further failure")
+    parser.add_argument('--cooldown-seconds', type=float, default=COOLDOWN_SECONDS,
+                        help="Cooldown after a successful retrain")
+    parser.add_argument('--psi-threshold', type=float, default=PSI_THRESHOLD)
+    parser.add_argument('--ks-threshold', type=float, default=KS_THRESHOLD)
+    parser.add_argument('--metrics', action='store_true', help="Collect per-phase timings for GET /metrics")
+    parser.add_argument('--cache-size', type=int, default=MAX_ENTRIES,
+                        help="Scored records kept in memory for resubmissions (0 disables the cache)")
+    parser.add_argument('--cache-path', help="Also keep cached scores in this SQLite file across restarts")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        METRICS.enable()
+
+    pipeline = FraudPipeline.load(args.bundle_dir)
+    cache = None
+    if args.cache_size > 0:
+        cache = ScoreCache(args.cache_size, args.cache_path)
+        cache.invalidate(pipeline.version)
+        if not cacheable(pipeline):
+            print("⚠️ Velocity features change every score: the score cache is bypassed for this bundle")
+    batcher = MicroBatcher(pipeline, args.max_batch_size, args.max_wait_ms, args.workers,
+                           monitor=DriftMonitor(pipeline), cache=cache)
+    scheduler, watcher = None, None
+    if args.retrain_data:
+        scheduler = RetrainScheduler(args.bundle_dir, args.retrain_data, batcher.monitor, batcher.swap,
+                                     args.retrain_hours, args.check_seconds, args.psi_threshold,
+                                     args.ks_threshold, retry_seconds=args.retry_seconds,
+                                     cooldown_seconds=args.cooldown_seconds).start()
+    elif args.reload_seconds > 0:
+        watcher = BundleWatcher(args.bundle_dir, batcher.swap, pipeline.version, args.reload_seconds).start()
+    try:
+        asyncio.run(FraudScoringServer(batcher, args.host, args.port, scheduler).serve_forever())
+    except KeyboardInterrupt:
+        print("\n🛑 Scoring service stopped:", json.dumps(batcher.stats.snapshot()))
+        if cache is not None:
+            print("📊 Score cache:", json.dumps(cache.stats()))
+    finally:
+        for background in (scheduler, watcher):
+            if background is not None:
+                background.stop()
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == '__main__':
+    main()
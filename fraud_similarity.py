@@ -0,0 +1,288 @@
+"""
+Title Near-Duplicate Engine — indexed replacement for per-row extractBests.
+
+Phase 3's ``find_max_similarity`` scans every unique title with
+``fuzzywuzzy.process.extractBests(scorer=fuzz.token_sort_ratio, limit=2)`` for
+every row. ``TitleIndex`` computes the same ``max_title_similarity`` once per
+unique title and returns identical scores:
+
+    1. Titles are reduced to the sorted-token keys fuzzywuzzy compares, so
+       ``token_sort_ratio`` becomes ``round(100 * Indel ratio)`` of two keys.
+       Titles sharing a key score 100 without any comparison.
+    2. Distinct keys are indexed by character 3-grams and bucketed by length.
+       A few rare-gram postings seed a lower bound ``best`` for each query.
+    3. Any key that could still beat ``best`` must pass the length filter and
+       share enough 3-grams (q-gram count filter), counted over the query's
+       postings. Only the survivors are scored; when the bound is too loose to
+       prune, the length-compatible buckets are scanned instead.
+    4. Surviving candidates are scored in batches by rapidfuzz's C++
+       ``Indel.normalized_similarity`` (the function ``Levenshtein.ratio``
+       wraps) with a ``score_cutoff``, across a process pool.
+
+If fuzzywuzzy is running on its pure-Python difflib fallback (no
+python-Levenshtein) the scores differ, so the engine reverts to the
+reference implementation.
+"""
+import math
+import os
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from fuzzywuzzy import fuzz, process, utils
+from rapidfuzz import process as rf_process
+from rapidfuzz.distance import Indel
+
+QGRAM = 3
+SEED_GRAMS = 3
+SEED_LIMIT = 2000
+PARALLEL_MIN_QUERIES = 2000
+CHUNK_SIZE = 500
+EPS = 1e-9
+
+# fuzzywuzzy scores with Levenshtein (= rapidfuzz Indel) only when the C
+# extension is installed; otherwise it silently falls back to difflib.
+EXACT_BACKEND = fuzz.SequenceMatcher.__module__ != 'difflib'
+
+
+# ======================================================================
+# REFERENCE IMPLEMENTATION (Phase 3)
+# ======================================================================
+def find_max_similarity(title_to_check, unique_list):
+    """Phase 3 near-duplicate score: best non-identical token_sort_ratio / 100"""
+    matches = process.extractBests(
+        title_to_check,
+        unique_list,
+        scorer=fuzz.token_sort_ratio,
+        limit=2
+    )
+    if len(matches) > 1 and matches[0][1] == 100:
+        return matches[1][1] / 100.0
+    return 0.0
+
+
+# ======================================================================
+# KEYS
+# ======================================================================
+def choice_key(title):
+    """Sorted-token key fuzzywuzzy builds for each candidate title"""
+    return " ".join(sorted(utils.full_process(title, force_ascii=True).split()))
+
+
+def query_key(title):
+    """Sorted-token key fuzzywuzzy builds for the query (processed twice)"""
+    return " ".join(sorted(utils.full_process(utils.full_process(title), force_ascii=True).split()))
+
+
+def needs_reference(title):
+    """True when the query and candidate keys differ (rare non-ASCII cases).
+
+    The engine assumes a title scores 100 against itself; these titles are
+    sent through ``find_max_similarity`` instead.
+    """
+    return not EXACT_BACKEND or query_key(title) != choice_key(title)
+
+
+def _qgrams(key, q):
+    return [key[p:p + q] for p in range(len(key) - q + 1)]
+
+
+def _cutoff(best):
+    # Smallest ratio that could still round above ``best``
+    return (best + 0.5) / 100.0 - EPS
+
+
+# ======================================================================
+# INDEX
+# ======================================================================
+class TitleIndex:
+    """Length-bucketed 3-gram index over the distinct keys of ``titles``"""
+
+    def __init__(self, titles, q=QGRAM):
+        self.titles = list(titles)
+        self.q = q
+        self.key_counts = Counter(choice_key(t) for t in self.titles)
+
+        keys = sorted((k for k in self.key_counts if k), key=lambda k: (len(k), k))
+        self.keys = keys
+        self.key_ids = {k: i for i, k in enumerate(keys)}
+        self.lengths = np.fromiter((len(k) for k in keys), dtype=np.int32, count=len(keys))
+
+        bucket_lengths, starts = np.unique(self.lengths, return_index=True)
+        ends = np.append(starts[1:], len(keys))
+        self.bucket_lengths = bucket_lengths
+        self.buckets = {
+            int(length): (int(start), keys[start:end])
+            for length, start, end in zip(bucket_lengths, starts, ends)
+        }
+
+        # Postings in CSR form; key ids are length-ordered, so every posting
+        # list is sorted by length as well.
+        self.gram_ids = {}
+        rows, cols = array('i'), array('i')
+        for i, key in enumerate(keys):
+            for gram in set(_qgrams(key, q)):
+                cols.append(self.gram_ids.setdefault(gram, len(self.gram_ids)))
+                rows.append(i)
+        rows = np.frombuffer(rows, dtype=np.int32)
+        cols = np.frombuffer(cols, dtype=np.int32)
+        self.postings = rows[np.argsort(cols, kind='stable')]
+        self.offsets = np.zeros(len(self.gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=len(self.gram_ids)), out=self.offsets[1:])
+
+    def __len__(self):
+        return len(self.titles)
+
+    # ------------------------------------------------------------------
+    # Single-query search
+    # ------------------------------------------------------------------
+    def _posting(self, gram_id):
+        return self.postings[self.offsets[gram_id]:self.offsets[gram_id + 1]]
+
+    def _score(self, key, candidates, exclude, best):
+        if exclude >= 0:
+            candidates = candidates[candidates != exclude]
+        if len(candidates) == 0:
+            return best
+        match = rf_process.extractOne(
+            key, [self.keys[j] for j in candidates],
+            scorer=Indel.normalized_similarity, score_cutoff=_cutoff(best)
+        )
+        if match is not None:
+            best = max(best, int(round(100 * match[1])))
+        return best
+
+    def _scan(self, key, lo, hi, exclude, best):
+        length = len(key)
+        window = self.bucket_lengths[(self.bucket_lengths >= lo) & (self.bucket_lengths <= hi)]
+        for bucket_length in sorted(window.tolist(), key=lambda b: abs(b - length)):
+            if best >= 100:
+                break
+            if 200.0 * min(length, bucket_length) / (length + bucket_length) < best + 0.5 - EPS:
+                continue
+            start, bucket = self.buckets[bucket_length]
+            cutoff = _cutoff(best)
+            if start <= exclude < start + len(bucket):
+                matches = rf_process.extract(
+                    key, bucket, scorer=Indel.normalized_similarity,
+                    score_cutoff=cutoff, limit=2
+                )
+                matches = [m for m in matches if m[2] != exclude - start][:1]
+            else:
+                match = rf_process.extractOne(key, bucket, scorer=Indel.normalized_similarity, score_cutoff=cutoff)
+                matches = [match] if match is not None else []
+            if matches:
+                best = max(best, int(round(100 * matches[0][1])))
+        return best
+
+    def best_score(self, key, exclude=-1):
+        """Highest rounded token_sort_ratio between ``key`` and any indexed key
+
+        ``exclude`` is the id of the query's own key when it is indexed.
+        """
+        length = len(key)
+        gram_counts = Counter(self.gram_ids.get(g, -1) for g in _qgrams(key, self.q))
+        n_grams = sum(gram_counts.values())
+        gram_counts.pop(-1, None)
+        grams = sorted(gram_counts, key=lambda g: self.offsets[g + 1] - self.offsets[g])
+
+        # Seed a lower bound from the postings of the rarest grams
+        best = 0
+        if grams:
+            seeds = np.unique(np.concatenate([self._posting(g) for g in grams[:SEED_GRAMS]]))
+            best = self._score(key, seeds[:SEED_LIMIT], exclude, best)
+        if best >= 100:
+            return 100
+
+        # Anything that rounds above ``best`` needs ratio >= c/100. The length
+        # filter bounds the partner's length, that bounds the Indel distance,
+        # and the q-gram count filter then bounds the grams it must share.
+        c = best + 0.5
+        lo = math.ceil(length * c / (200.0 - c) - EPS)
+        hi = math.floor(length * (200.0 - c) / c + EPS)
+        max_distance = math.floor((1.0 - c / 100.0) * (length + hi) + EPS)
+        min_shared = n_grams - max_distance * self.q
+        if n_grams == 0 or min_shared < 1:
+            return self._scan(key, lo, hi, exclude, best)
+
+        id_lo = np.searchsorted(self.lengths, lo, side='left')
+        id_hi = np.searchsorted(self.lengths, hi, side='right')
+        if not grams or id_hi <= id_lo:
+            return best
+        # Upper bound on each candidate's shared gram count: the query-side
+        # multiplicity of every gram present in the candidate.
+        parts, weights = [], []
+        for g in grams:
+            posting = self._posting(g)
+            posting = posting[np.searchsorted(posting, id_lo):np.searchsorted(posting, id_hi)]
+            parts.append(posting - id_lo)
+            weights.append(np.full(len(posting), gram_counts[g], dtype=np.int32))
+        shared = np.bincount(np.concatenate(parts), weights=np.concatenate(weights), minlength=id_hi - id_lo)
+        candidates = np.flatnonzero(shared >= min_shared) + id_lo
+        return self._score(key, candidates, exclude, best)
+
+    # ------------------------------------------------------------------
+    # Batch APIs
+    # ------------------------------------------------------------------
+    def _run(self, queries, workers):
+        """Search ``(key, exclude)`` pairs, in a process pool when worthwhile"""
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(queries) < PARALLEL_MIN_QUERIES:
+            return [self.best_score(key, exclude) for key, exclude in queries]
+        chunks = [queries[i:i + CHUNK_SIZE] for i in range(0, len(queries), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+            return [score for chunk in pool.map(_search_chunk, chunks) for score in chunk]
+
+    def similarity_to_others(self, workers=None):
+        """``find_max_similarity(t, titles)`` for every indexed title, in order"""
+        results = np.zeros(len(self.titles))
+        positions, queries = [], []
+        for pos, title in enumerate(self.titles):
+            key = choice_key(title)
+            if needs_reference(title):
+                results[pos] = find_max_similarity(title, self.titles)
+            elif self.key_counts[key] >= 2:
+                results[pos] = 1.0
+            elif key:
+                positions.append(pos)
+                queries.append((key, self.key_ids[key]))
+        if queries:
+            results[positions] = np.asarray(self._run(queries, workers)) / 100.0
+        return results
+
+    def best_match(self, titles, workers=None):
+        """Best score of each (non-indexed) title against the indexed titles"""
+        results = np.zeros(len(titles))
+        positions, queries = [], []
+        for pos, title in enumerate(titles):
+            key = choice_key(title)
+            if self.key_counts.get(key, 0) >= 1:
+                results[pos] = 1.0
+            elif key:
+                positions.append(pos)
+                queries.append((key, -1))
+        if queries:
+            results[positions] = np.asarray(self._run(queries, workers)) / 100.0
+        return results
+
+
+_WORKER_INDEX = None
+
+
+def _init_worker(index):
+    global _WORKER_INDEX
+    _WORKER_INDEX = index
+
+
+def _search_chunk(queries):
+    return [_WORKER_INDEX.best_score(key, exclude) for key, exclude in queries]
+
+
+def max_title_similarity(unique_titles, workers=None):
+    """Map each unique title to ``find_max_similarity(title, unique_titles)``"""
+    unique_titles = list(unique_titles)
+    if not EXACT_BACKEND:
+        return {t: find_max_similarity(t, unique_titles) for t in unique_titles}
+    index = TitleIndex(unique_titles)
+    return dict(zip(unique_titles, index.similarity_to_others(workers)))
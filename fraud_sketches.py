@@ -0,0 +1,194 @@
+"""
+Mergeable Quantile Sketches — KLL summaries for Phase 6 ranks and threshold.
+
+Phase 6 maps each component (``iso_score_raw``, ``kmeans_distance``, the
+freq/similarity proxies) to ``rank(pct=True)`` and takes the 95th-percentile
+threshold with ``quantile``; both need the full population sorted in memory.
+``KLLSketch`` keeps a bounded summary instead:
+
+    Levels     level h holds items of weight 2^h; when a level outgrows its
+               capacity (k * (2/3)^depth) it is sorted and every other item,
+               from a random offset, is promoted to level h+1
+    Merge      levels are concatenated and re-compacted, so sketches built on
+               parallel chunks combine into the sketch of their union
+    Ranks      weighted ``searchsorted`` with pandas' average-tie convention;
+               until the first compaction the sketch is exact
+    Error      each compaction at level h moves any rank by at most 2^h, so
+               the sketch tracks a guaranteed bound on the normalized rank
+               error (``error_bound``); the typical error is far smaller
+
+Capacities shrink geometrically below the top level, so a sketch retains
+O(k) items (about 2k for the default k) however much data streams through.
+"""
+import numpy as np
+
+DEFAULT_K = 1000
+CAPACITY_DECAY = 2.0 / 3.0
+
+
+class KLLSketch:
+    """KLL quantile sketch over floats with exact-until-full behaviour"""
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.max_error = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+        self._sorted = None
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def size(self):
+        """Items currently retained"""
+        return sum(len(level) for level in self.levels)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def _capacity(self, h):
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def _compact(self, h):
+        items = np.sort(self.levels[h])
+        keep = items[-1:] if len(items) % 2 else items[:0]
+        offset = int(self._rng.integers(2))
+        promoted = items[offset:len(items) - len(keep):2]
+        if h + 1 == len(self.levels):
+            self.levels.append(np.empty(0))
+        self.levels[h] = keep
+        self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+        self.max_error += 2 ** h
+
+    def _compress(self):
+        self._sorted = None
+        while True:
+            for h in range(len(self.levels)):
+                if len(self.levels[h]) > self._capacity(h):
+                    self._compact(h)
+                    break
+            else:
+                return
+
+    def update(self, values):
+        """Add a batch of values (NaNs are ignored)"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        # Feed k items at a time so large batches are compacted level by
+        # level instead of halved in one pass
+        for start in range(0, len(values), self.k):
+            self.levels[0] = np.concatenate([self.levels[0], values[start:start + self.k]])
+            self._compress()
+        self.n += len(values)
+        return self
+
+    def merge(self, other):
+        """Fold ``other`` into this sketch (the result summarizes both streams)"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self.max_error += other.max_error
+        self._compress()
+        return self
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _weighted(self):
+        if self._sorted is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.int64) for h, level in enumerate(self.levels)])
+            order = np.argsort(items, kind='stable')
+            cumulative = np.zeros(len(items) + 1, dtype=np.int64)
+            np.cumsum(weights[order], out=cumulative[1:])
+            self._sorted = (items[order], cumulative)
+        return self._sorted
+
+    def rank(self, values, ascending=True):
+        """Approximate ``rank(pct=True)`` of ``values`` within the summarized data"""
+        if self.n == 0:
+            raise ValueError("Cannot rank against an empty sketch")
+        items, cumulative = self._weighted()
+        values = np.asarray(values, dtype=float)
+        below = cumulative[np.searchsorted(items, values, side='left')]
+        at_or_below = cumulative[np.searchsorted(items, values, side='right')]
+        ties = at_or_below - below
+        ahead = below if ascending else self.n - at_or_below
+        return np.clip((ahead + (ties + 1) / 2.0) / self.n, 0.0, 1.0)
+
+    def cdf(self, values):
+        """Approximate fraction of the summarized data ``<= values``"""
+        if self.n == 0:
+            raise ValueError("Cannot evaluate the CDF of an empty sketch")
+        items, cumulative = self._weighted()
+        return cumulative[np.searchsorted(items, np.asarray(values, dtype=float), side='right')] / cumulative[-1]
+
+    def quantile(self, q):
+        """Smallest retained item whose cumulative weight reaches ``q * n``"""
+        if self.n == 0:
+            raise ValueError("Cannot take a quantile of an empty sketch")
+        items, cumulative = self._weighted()
+        position = np.searchsorted(cumulative[1:], q * cumulative[-1], side='left')
+        return float(items[min(position, len(items) - 1)])
+
+    def error_bound(self):
+        """Guaranteed worst-case normalized rank error of this sketch"""
+        return self.max_error / self.n if self.n else 0.0
+
+
+# ======================================================================
+# HELPERS
+# ======================================================================
+def sketch_columns(df, columns, k=DEFAULT_K, seed=None):
+    """One sketch per column of ``df``"""
+    rng = np.random.default_rng(seed)
+    return {
+        col: KLLSketch(k, seed=int(rng.integers(2 ** 32))).update(df[col].to_numpy(dtype=float))
+        for col in columns
+    }
+
+
+def merge_sketches(partials):
+    """Merge a list of ``{column: KLLSketch}`` dicts column by column"""
+    merged = {}
+    for sketches in partials:
+        for col, sketch in sketches.items():
+            if col in merged:
+                merged[col].merge(sketch)
+            else:
+                merged[col] = sketch
+    return merged
+
+
+def rank_errors(sketches, df, ascending=None):
+    """Sketch ranks vs exact ``rank(pct=True)`` over ``df`` for each column.
+
+    Observed errors are only reported when ``df`` is exactly the data a
+    sketch summarized (e.g. the training frame); otherwise just the bound.
+    ``ascending`` maps columns ranked high-to-low to False.
+    """
+    ascending = ascending or {}
+    report = {}
+    for col, sketch in sketches.items():
+        if col not in df.columns:
+            continue
+        stats = {
+            'max_abs_error': None,
+            'mean_abs_error': None,
+            'error_bound': sketch.error_bound(),
+            'retained_items': sketch.size,
+        }
+        values = df[col].to_numpy(dtype=float)
+        if sketch.n == np.count_nonzero(~np.isnan(values)) and sketch.n:
+            up = ascending.get(col, True)
+            exact = df[col].rank(pct=True, ascending=up).to_numpy()
+            errors = np.abs(sketch.rank(values, ascending=up) - exact)
+            stats['max_abs_error'] = float(np.nanmax(errors))
+            stats['mean_abs_error'] = float(np.nanmean(errors))
+        report[col] = stats
+    return report
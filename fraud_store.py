@@ -0,0 +1,354 @@
+"""
+Phase 7 Result Store — date-partitioned Parquet with predicate pushdown.
+
+The notebook exports the scored frame as ``fraud_detection_full_dataset.csv``
+plus a ``fraud_detection_suspicious.csv`` subset, and the dashboard parses
+both in full on every load. The store keeps scored results as one Parquet
+dataset instead:
+
+    Partition  hive directories ``submission_day=YYYY-MM-DD`` from
+               ``submission_date`` (rows without one go to the scoring day);
+               each export adds its own part file to every day it touches,
+               or with ``mode='replace'`` swaps those days' files for its own
+    Order      rows are sorted by ``fraud_score`` (descending) within each
+               day's part file, so the row-group min / max of ``fraud_score`` and
+               ``fraud_flag`` are narrow and flagged rows sit in the first
+               row groups
+    Load       ``load_results`` reads only the requested columns; day bounds
+               prune whole directories and score / flag predicates skip row
+               groups by their statistics
+
+``scan_plan`` reports the bytes a query touches, so the saving is visible.
+
+``stream_rows`` writes any number of rows to CSV or Parquet (optionally
+gzip-compressed) one record batch at a time, so exporting millions of rows
+holds a single batch in memory; ``scan_batches`` feeds it straight from the
+store and the dashboard feeds it from its shared table.
+
+Usage:
+    python fraud_store.py export scored.csv --results-dir fraud_detection_results
+    python fraud_store.py query --results-dir fraud_detection_results --start 2024-06-01 --end 2024-06-07 --flagged
+    python fraud_store.py query --results-dir fraud_detection_results --flagged --output alerts.csv.gz
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from fraud_metrics import timed
+from fraud_velocity import DATE_COL
+
+RESULTS_DIR = "fraud_detection_results"
+PARTITION_COL = 'submission_day'
+STATS_COLUMNS = ['fraud_score', 'fraud_flag', DATE_COL]
+ROW_GROUP_ROWS = 64 * 1024
+EXPORT_FORMATS = ('csv', 'parquet')
+# 'append' keeps the rows already stored for a day; 'replace' drops them
+EXPORT_MODES = ('append', 'replace')
+EXPORT_BATCH_ROWS = 64 * 1024
+# Level 3 writes ~5x faster than Arrow's default of 9 for ~14% larger files
+GZIP_LEVEL = 3
+
+
+# ======================================================================
+# EXPORT
+# ======================================================================
+def _partitioning():
+    return ds.partitioning(pa.schema([(PARTITION_COL, pa.date32())]), flavor='hive')
+
+
+def _submission_days(scored, date_col):
+    # Scoring day for rows with no (or an unparseable) submission date
+    today = datetime.now(timezone.utc).date()
+    if date_col not in scored.columns:
+        return pd.Series(today, index=scored.index, dtype='object')
+    days = pd.to_datetime(scored[date_col], errors='coerce').dt.date
+    return days.where(days.notna(), today)
+
+
+def _write_day(day_dir, table, basename, statistics, row_group_rows, replace=False):
+    # Write beside the old files, then rename: readers never see a partial file. With
+    # replace the old files are unlinked after the rename, so a scan listing the day in
+    # between sees old and new rows (a rename cannot swap a non-empty directory)
+    day_dir.mkdir(parents=True, exist_ok=True)
+    old = list(day_dir.glob('*.parquet')) if replace else []
+    tmp = day_dir / f".{basename}.tmp"
+    pq.write_table(table, tmp, row_group_size=row_group_rows, write_statistics=statistics)
+    os.replace(tmp, day_dir / basename)
+    for path in old:
+        path.unlink(missing_ok=True)
+    return (day_dir / basename).stat().st_size
+
+
+@timed('store.export', rows=lambda summary: summary['rows'])
+def export_results(scored, results_dir=RESULTS_DIR, date_col=DATE_COL, row_group_rows=ROW_GROUP_ROWS,
+                   mode='append'):
+    """Write a scored frame into the partitioned dataset; returns a summary dict.
+
+    ``mode='append'`` adds a new part file to each day in the batch, so
+    earlier exports of those days are kept; ``mode='replace'`` makes the
+    batch the only content of its days. Replacing is not atomic per day: the
+    new file appears before the old ones are removed, and a reader listing
+    the day in that window returns both (the dashboard's next rerun sees the
+    removal and reloads).
+    """
+    if mode not in EXPORT_MODES:
+        raise ValueError(f"mode must be one of {EXPORT_MODES}, got {mode!r}")
+    start = time.perf_counter()
+    table = pa.Table.from_pandas(scored, preserve_index=False)
+    days = pa.array(_submission_days(scored, date_col), type=pa.date32())
+    sort_keys = [('day', 'ascending')]
+    if 'fraud_score' in table.column_names:
+        sort_keys.append(('fraud_score', 'descending'))
+    order = pc.sort_indices(table.append_column('day', days), sort_keys)
+    table, days = table.take(order), days.take(order)
+
+    # Days are contiguous after the sort: one zero-copy slice per partition
+    values = days.to_numpy(zero_copy_only=False)
+    bounds = np.flatnonzero(values[1:] != values[:-1]) + 1
+    statistics = [c for c in STATS_COLUMNS if c in table.column_names]
+    # Unique per export, so concurrent or same-millisecond exports never share a file
+    basename = f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+    written = 0
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(values)]):
+        day_dir = Path(results_dir) / f"{PARTITION_COL}={values[lo]}"
+        written += _write_day(day_dir, table.slice(lo, hi - lo), basename, statistics, row_group_rows,
+                              replace=mode == 'replace')
+    return {
+        'rows': len(table),
+        'partitions': len(bounds) + 1 if len(values) else 0,
+        'bytes': written,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+# ======================================================================
+# LOAD
+# ======================================================================
+def open_results(results_dir=RESULTS_DIR):
+    """The partitioned dataset (raises FileNotFoundError if nothing was exported)"""
+    if not Path(results_dir).is_dir():
+        raise FileNotFoundError(f"No result store at {results_dir}")
+    return ds.dataset(results_dir, format='parquet', partitioning=_partitioning())
+
+
+def _as_date(value):
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def results_filter(start=None, end=None, min_score=None, flagged_only=False):
+    """Pushdown expression: inclusive day bounds, minimum score, flagged rows"""
+
+    conditions = []
+    if start is not None:
+        conditions.append(ds.field(PARTITION_COL) >= _as_date(start))
+    if end is not None:
+        conditions.append(ds.field(PARTITION_COL) <= _as_date(end))
+    if min_score is not None:
+        conditions.append(ds.field('fraud_score') >= float(min_score))
+    if flagged_only:
+        conditions.append(ds.field('fraud_flag') == True)  # noqa: E712 (Arrow expression)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def result_files(results_dir=RESULTS_DIR):
+    """Every Parquet file in the store"""
+    return sorted(Path(results_dir).glob(f"{PARTITION_COL}=*/*.parquet"))
+
+
+def available_days(results_dir=RESULTS_DIR):
+    """``(first, last)`` exported day from the partition directory names alone"""
+    days = []
+    for path in Path(results_dir).glob(f"{PARTITION_COL}=*"):
+        try:
+            days.append(date.fromisoformat(path.name.split('=', 1)[1]))
+        except ValueError:
+            continue
+    return (min(days), max(days)) if days else (None, None)
+
+
+def _read(dataset, columns, expression):
+    if columns is not None:
+        columns = [c for c in columns if c in dataset.schema.names]
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+@timed('store.load_results')
+def load_results(results_dir=RESULTS_DIR, columns=None, start=None, end=None, min_score=None,
+                 flagged_only=False):
+    """Scored rows for a day range, reading only ``columns`` and matching row groups"""
+    return _read(open_results(results_dir), columns, results_filter(start, end, min_score, flagged_only))
+
+
+@timed('store.load_result_files')
+def load_result_files(paths, results_dir=RESULTS_DIR, columns=None, start=None, end=None):
+    """Like ``load_results``, restricted to some of the store's files (e.g. newly appended ones)"""
+    dataset = ds.dataset([str(p) for p in paths], format='parquet', partitioning=_partitioning(),
+                         partition_base_dir=str(results_dir))
+    return _read(dataset, columns, results_filter(start, end))
+
+
+def scan_plan(results_dir=RESULTS_DIR, columns=None, start=None, end=None, min_score=None, flagged_only=False):
+    """Compressed column-chunk bytes a ``load_results`` call touches vs the whole dataset"""
+    dataset = open_results(results_dir)
+    expression = results_filter(start, end, min_score, flagged_only)
+    wanted = set(dataset.schema.names if columns is None else columns)
+
+    def column_bytes(metadata, row_groups, names=None):
+        return sum(
+            metadata.row_group(i).column(j).total_compressed_size
+            for i in row_groups
+            for j in range(metadata.num_columns)
+            if names is None or metadata.row_group(i).column(j).path_in_schema in names
+        )
+
+    total = sum(column_bytes(f.metadata, range(f.metadata.num_row_groups)) for f in dataset.get_fragments())
+    files, row_groups, scanned = 0, 0, 0
+    for fragment in dataset.get_fragments(filter=expression):
+        pieces = fragment.split_by_row_group(expression, schema=dataset.schema)
+        kept = [rg.id for piece in pieces for rg in piece.row_groups]
+        if kept:
+            files += 1
+            row_groups += len(kept)
+            scanned += column_bytes(fragment.metadata, kept, wanted)
+    return {
+        'files': files,
+        'row_groups': row_groups,
+        'bytes_scanned': scanned,
+        'bytes_total': total,
+        'fraction': round(scanned / total, 4) if total else 0.0,
+    }
+
+
+# ======================================================================
+# STREAMING EXPORT
+# ======================================================================
+def scan_batches(results_dir=RESULTS_DIR, columns=None, start=None, end=None, min_score=None,
+                 flagged_only=False, batch_rows=EXPORT_BATCH_ROWS):
+    """Record batches of a ``load_results`` query, read lazily with the same pushdown"""
+    dataset = open_results(results_dir)
+    if columns is not None:
+        columns = [c for c in columns if c in dataset.schema.names]
+    scanner = dataset.scanner(columns=columns, filter=results_filter(start, end, min_score, flagged_only),
+                              batch_size=batch_rows)
+    return scanner.to_batches()
+
+
+@timed('store.stream_rows', rows=lambda summary: summary['rows'])
+def stream_rows(batches, path, fmt='csv', compress=False):
+    """Write record batches / tables to ``path`` one at a time; returns rows, bytes and throughput
+
+    ``compress`` gzips the whole CSV stream, or selects the gzip codec (instead of snappy) for Parquet.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r} (expected one of {EXPORT_FORMATS})")
+    start = time.perf_counter()
+    rows, writer, sink = 0, None, None
+    try:
+        for batch in batches:
+            if writer is None:
+                if fmt == 'parquet':
+                    writer = pq.ParquetWriter(str(path), batch.schema, compression='gzip' if compress else 'snappy',
+                                              compression_level=GZIP_LEVEL if compress else None)
+                else:
+                    sink = gzip.open(path, 'wb', compresslevel=GZIP_LEVEL) if compress else pa.OSFile(str(path), 'wb')
+                    writer = pacsv.CSVWriter(sink, batch.schema,
+                                             write_options=pacsv.WriteOptions(quoting_style='needed'))
+            if isinstance(batch, pa.RecordBatch):
+                writer.write_batch(batch)
+            else:
+                writer.write_table(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+        if sink is not None:
+            sink.close()
+    if writer is None:
+        # No batches at all: still leave a valid (empty) file behind
+        Path(path).write_bytes(b'')
+    seconds = time.perf_counter() - start
+    size = Path(path).stat().st_size
+    return {
+        'rows': rows,
+        'bytes': size,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds) if seconds else 0,
+        'mb_per_second': round(size / 1e6 / seconds, 2) if seconds else 0.0,
+    }
+
+
+# ======================================================================
+# CLI
+# ======================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export scored results to / query the partitioned result store")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = sub.add_parser('export', help="Add scored CSVs to the result store")
+    export_parser.add_argument('scored', nargs='+', help="Scored CSV files (output of fraud_pipeline.py score)")
+    export_parser.add_argument('--mode', choices=EXPORT_MODES, default='append',
+                               help="Add to the rows stored for each day, or replace them")
+
+    query_parser = sub.add_parser('query', help="Load a day range with pushdown and report bytes scanned")
+    query_parser.add_argument('--start', help="First day (YYYY-MM-DD)")
+    query_parser.add_argument('--end', help="Last day (YYYY-MM-DD)")
+    query_parser.add_argument('--min-score', type=float)
+    query_parser.add_argument('--flagged', action='store_true', help="Flagged rows only")
+    query_parser.add_argument('--columns', nargs='+', help="Columns to read (default: all)")
+    query_parser.add_argument('--json', help="Write the scan plan to this JSON file")
+    query_parser.add_argument('--output', help="Stream the matching rows to this file instead of loading them "
+                                               "(.csv, .csv.gz or .parquet)")
+    query_parser.add_argument('--gzip', action='store_true', help="gzip the output (implied by a .gz name)")
+
+    for p in (export_parser, query_parser):
+        p.add_argument('--results-dir', default=RESULTS_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        for path in args.scored:
+            summary = export_results(pd.read_csv(path), args.results_dir, mode=args.mode)
+            print(f"✔️ {path}: {summary['rows']:,} rows → {summary['partitions']:,} day partitions, "
+                  f"{summary['bytes'] / 1e6:,.1f} MB in {summary['seconds']:.2f}s")
+        return
+
+    if args.output:
+        fmt = 'parquet' if args.output.lower().endswith('.parquet') else 'csv'
+        compress = args.gzip or args.output.lower().endswith('.gz')
+        batches = scan_batches(args.results_dir, args.columns, args.start, args.end, args.min_score, args.flagged)
+        summary = stream_rows(batches, args.output, fmt, compress)
+        print(f"✔️ {summary['rows']:,} rows → {args.output} ({summary['bytes'] / 1e6:,.1f} MB) in "
+              f"{summary['seconds']:.2f}s — {summary['rows_per_second']:,} rows/s, {summary['mb_per_second']} MB/s")
+        return
+
+    start = time.perf_counter()
+    df = load_results(args.results_dir, args.columns, args.start, args.end, args.min_score, args.flagged)
+    seconds = time.perf_counter() - start
+    plan = scan_plan(args.results_dir, args.columns, args.start, args.end, args.min_score, args.flagged)
+    print(f"📊 {len(df):,} rows x {len(df.columns)} columns in {seconds:.3f}s — scanned "
+          f"{plan['bytes_scanned'] / 1e6:,.2f} of {plan['bytes_total'] / 1e6:,.2f} MB ({plan['fraction']:.1%}; "
+          f"{plan['files']} files, {plan['row_groups']} row groups)")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': len(df), 'seconds': round(seconds, 4), **plan}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,377 @@
+"""
+Fraud Detection Streaming Mode — out-of-core fit and scoring.
+
+For application files larger than RAM. The input is read in chunks and peak
+memory is bounded by ``chunksize`` + ``sample_size`` rows, not by the file:
+
+    Hashes  exact duplicate rows are dropped, as ``FraudPipeline.fit`` does:
+            each row's 128-bit content hash goes to one of ``DEDUP_PARTITIONS``
+            temporary files, and each file is deduplicated on its own (every
+            later pass skips the duplicates it finds)
+    Pass 1  accumulate Job Title / Job Location counts, a uniform row
+            sample (bottom-k random keys, so chunks never need to coexist)
+            and, when ``duplicate_columns`` is set, MinHash LSH clusters: a
+            ``BucketLinker`` joins each chunk's band buckets, so memory grows
+            with the distinct buckets the bundle keeps, not with the rows
+    Fit     medians, scaler, text column, SVD and a subsampled Isolation
+            Forest on the sample; text goes through a stateless
+            ``HashingVectorizer`` instead of a fitted TF-IDF vocabulary
+    Pass 2  ``MiniBatchKMeans.partial_fit`` over every chunk
+    Rank    Phase 6 rank references and the threshold from the sample, or
+            with ``rank_method='sketch'`` a third pass that builds a KLL
+            sketch per chunk and merges them, so ranks cover every row
+    Score   ``score_csv_in_chunks`` scores and appends results chunk by chunk
+
+The fitted object is a regular ``FraudPipeline`` bundle, so the batch CLI,
+the scoring service and ``score_csv_in_chunks`` all accept it.
+
+Usage:
+    python fraud_streaming.py fit applications.csv --bundle-dir models --chunksize 100000
+    python fraud_streaming.py score applications.csv --bundle-dir models -o scored.csv
+"""
+import argparse
+import resource
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.ensemble import IsolationForest
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from fraud_cleaning import normalize_text
+from fraud_duplicates import DUPLICATE_COLUMNS, BucketLinker, DuplicateClusterer
+from fraud_ingest import sniff_encoding
+from fraud_pipeline import (
+    FraudPipeline,
+    LOCATION_COL,
+    RANK_METHODS,
+    TITLE_COL,
+    new_bundle_version,
+    print_rank_errors,
+)
+from fraud_sketches import merge_sketches, sketch_columns
+
+DEFAULT_CHUNKSIZE = 100_000
+DEFAULT_SAMPLE_SIZE = 200_000
+HASHING_FEATURES = 2 ** 18
+# Row-hash spill files: a partition holds 24 bytes per row / DEDUP_PARTITIONS in memory
+DEDUP_PARTITIONS = 64
+# Second pandas hash key (16 bytes), so two rows only match on 128 equal bits
+_SECOND_HASH_KEY = 'fraud-dedup-key2'
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process (Linux reports KiB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE, encoding=None):
+    """Yield raw application chunks without ever loading the whole file"""
+    yield from pd.read_csv(path, chunksize=chunksize, encoding=encoding or sniff_encoding(path))
+
+
+def row_hashes(chunk):
+    """``(n, 2)`` uint64 content hashes, equal for equal rows in any chunk.
+
+    Numbers are hashed as float64 and missing values alike, because a column
+    can parse as int64 in one chunk and float64 (or object) in another.
+    """
+    canonical = pd.DataFrame({
+        col: (values.astype('float64') if pd.api.types.is_numeric_dtype(values) else values).astype(object)
+        .where(values.notna(), None)
+        for col, values in chunk.items()
+    })
+    return np.column_stack([
+        pd.util.hash_pandas_object(canonical, index=False).to_numpy(),
+        pd.util.hash_pandas_object(canonical, index=False, hash_key=_SECOND_HASH_KEY).to_numpy(),
+    ])
+
+
+# ======================================================================
+# OUT-OF-CORE DEDUPLICATION
+# ======================================================================
+class RowDeduplicator:
+    """Exact duplicate rows of a chunked file, found without holding the file in memory.
+
+    ``scan`` writes each row's hashes and position to a partition file picked
+    by its hash, ``resolve`` keeps the first position of every hash within a
+    partition, and ``keep`` then masks a chunk's duplicates.
+    """
+    _RECORD = np.dtype([('h1', '<u8'), ('h2', '<u8'), ('position', '<i8')])
+
+    def __init__(self, directory, partitions=DEDUP_PARTITIONS):
+        self.directory = Path(directory)
+        self.partitions = partitions
+        self.n_rows = 0
+        self.n_duplicates = 0
+        self.duplicates = []
+
+    def scan(self, chunks):
+        """Hash every row of ``chunks``; returns the row count"""
+        with ExitStack() as stack:
+            files = [stack.enter_context(open(self.directory / f"rows_{p}.bin", 'wb'))
+                     for p in range(self.partitions)]
+            for chunk in chunks:
+                hashes = row_hashes(chunk)
+                records = np.empty(len(chunk), dtype=self._RECORD)
+                records['h1'], records['h2'] = hashes[:, 0], hashes[:, 1]
+                records['position'] = self.n_rows + np.arange(len(chunk))
+                partition = hashes[:, 1] % np.uint64(self.partitions)
+                for p in np.unique(partition):
+                    records[partition == p].tofile(files[int(p)])
+                self.n_rows += len(chunk)
+        return self.n_rows
+
+    def resolve(self):
+        """Find the duplicates, one partition at a time (positions sorted per partition)"""
+        self.duplicates = []
+        for p in range(self.partitions):
+            path = self.directory / f"rows_{p}.bin"
+            records = np.fromfile(path, dtype=self._RECORD)
+            path.unlink()
+            order = np.lexsort((records['position'], records['h2'], records['h1']))
+            records = records[order]
+            repeat = np.zeros(len(records), dtype=bool)
+            repeat[1:] = (records['h1'][1:] == records['h1'][:-1]) & (records['h2'][1:] == records['h2'][:-1])
+            self.duplicates.append(np.sort(records['position'][repeat]))
+        self.n_duplicates = sum(len(d) for d in self.duplicates)
+        return self
+
+    def keep(self, start, n):
+        """Mask of the rows to keep among positions ``start`` .. ``start + n``"""
+        keep = np.ones(n, dtype=bool)
+        for duplicates in self.duplicates:
+            lo, hi = np.searchsorted(duplicates, [start, start + n])
+            keep[duplicates[lo:hi] - start] = False
+        return keep
+
+    def chunks(self, path, chunksize, encoding=None):
+        """``iter_chunks`` without the duplicate rows"""
+        start = 0
+        for chunk in iter_chunks(path, chunksize, encoding):
+            keep = self.keep(start, len(chunk))
+            start += len(chunk)
+            yield chunk if keep.all() else chunk[keep]
+
+
+class StreamingFraudPipeline(FraudPipeline):
+    """``FraudPipeline`` fitted from chunked input with incremental estimators"""
+
+    def __init__(self, chunksize=DEFAULT_CHUNKSIZE, sample_size=DEFAULT_SAMPLE_SIZE,
+                 hashing_features=HASHING_FEATURES, **params):
+        super().__init__(**params)
+        if self.velocity_keys is not None:
+            # Velocity counters are replayed in arrival order by _engineer,
+            # which the multi-pass chunk fit cannot do without double counting
+            raise ValueError("Velocity features are not supported in streaming mode")
+        if self.text_features == 'sparse':
+            # HashingVectorizer has no vocabulary to name the sparse columns after
+            raise ValueError("Sparse TF-IDF features are not supported in streaming mode")
+        self.chunksize = chunksize
+        self.sample_size = sample_size
+        self.hashing_features = hashing_features
+
+    def _make_vectorizer(self):
+        return HashingVectorizer(
+            n_features=self.hashing_features,
+            stop_words='english',
+            alternate_sign=False,
+            norm='l2'
+        )
+
+    # ------------------------------------------------------------------
+    # Pass 1 — counts and uniform sample
+    # ------------------------------------------------------------------
+    def _scan(self, chunks):
+        rng = np.random.default_rng(self.random_state)
+        title_counts = pd.Series(dtype='int64')
+        location_counts = pd.Series(dtype='int64')
+        sample, sample_keys = None, np.empty(0)
+        n_rows = 0
+        duplicates = linker = None
+        if self.duplicate_columns is not None:
+            duplicates = DuplicateClusterer(self.duplicate_columns, random_state=self.random_state)
+            linker = BucketLinker(duplicates.bands)
+
+        for chunk in chunks:
+            n_rows += len(chunk)
+            if TITLE_COL in chunk.columns:
+                title_counts = title_counts.add(normalize_text(chunk[TITLE_COL]).value_counts(), fill_value=0)
+            if LOCATION_COL in chunk.columns:
+                location_counts = location_counts.add(normalize_text(chunk[LOCATION_COL]).value_counts(), fill_value=0)
+            if linker is not None:
+                linker.add(duplicates.band_keys(chunk))
+
+            # Bottom-k sampling: keep the rows with the smallest random keys
+            keys = rng.random(len(chunk))
+            if sample is None:
+                sample, sample_keys = chunk, keys
+            else:
+                sample = pd.concat([sample, chunk], ignore_index=True)
+                sample_keys = np.concatenate([sample_keys, keys])
+            if len(sample) > self.sample_size:
+                keep = np.argpartition(sample_keys, self.sample_size)[:self.sample_size]
+                sample, sample_keys = sample.iloc[keep].reset_index(drop=True), sample_keys[keep]
+
+        self.duplicates_ = duplicates.fit_linker(linker) if duplicates is not None else None
+        return sample, title_counts, location_counts, n_rows
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def fit_stream(self, path, encoding=None):
+        """Fit from a CSV path in bounded memory (a hash pass plus two or three passes)"""
+        encoding = encoding or sniff_encoding(path)
+        with tempfile.TemporaryDirectory(prefix='fraud_dedup_') as spill_dir:
+            return self._fit_stream(path, encoding, RowDeduplicator(spill_dir))
+
+    def _fit_stream(self, path, encoding, dedup):
+        start = time.perf_counter()
+        dedup.scan(iter_chunks(path, self.chunksize, encoding))
+        dedup.resolve()
+        print(f"📌 Hashes: {dedup.n_rows:,} rows, {dedup.n_duplicates:,} exact duplicates dropped "
+              f"({time.perf_counter() - start:.1f}s, peak {peak_memory_mb():.0f} MB)")
+        if dedup.n_rows == 0:
+            raise ValueError(f"{path} contains no rows")
+
+        sample, title_counts, location_counts, n_rows = self._scan(dedup.chunks(path, self.chunksize, encoding))
+        print(f"📌 Pass 1: {n_rows:,} rows scanned, {len(sample):,} sampled "
+              f"({time.perf_counter() - start:.1f}s, peak {peak_memory_mb():.0f} MB)")
+
+        # Fit cleaning, proxies, text/SVD, scaler and Isolation Forest on the sample
+        self._fit_clean(sample)
+        sample = self._clean(sample)
+        self.title_counts_ = title_counts.astype(int).to_dict() if len(title_counts) else None
+        self.location_counts_ = location_counts.astype(int).to_dict() if len(location_counts) else None
+        self.title_index_ = None
+        self.title_similarity_ = None
+        if self.title_counts_ is not None:
+            self._fit_title_similarity([str(t).lower() for t in title_counts.index])
+        sample = self._engineer(sample)
+        self._fit_features(sample)
+        sample, X_sample = self._features(sample)
+        self.iso_ = IsolationForest(
+            n_estimators=self.n_estimators,
+            contamination=self.contamination,
+            random_state=self.random_state,
+            max_features=self.max_features
+        ).fit(X_sample)
+
+        # Pass 2 — K-Means over every chunk
+        self.kmeans_ = MiniBatchKMeans(
+            n_clusters=self.n_clusters,
+            random_state=self.random_state,
+            batch_size=min(self.chunksize, 4096),
+            n_init=3
+        )
+        for chunk in dedup.chunks(path, self.chunksize, encoding):
+            _, X = self._features(self._engineer(self._clean(chunk)))
+            if len(X) >= self.n_clusters:
+                self.kmeans_.partial_fit(X)
+        print(f"📌 Pass 2: MiniBatchKMeans fitted ({time.perf_counter() - start:.1f}s, "
+              f"peak {peak_memory_mb():.0f} MB)")
+
+        # Phase 6 references and threshold from the sample
+        sample = self._apply_models(sample, X_sample)
+        self._fit_ranks(sample)
+        if self.rank_method == 'sketch':
+            self._sketch_pass(dedup.chunks(path, self.chunksize, encoding))
+            print(f"📌 Pass 3: rank sketches merged over {n_rows:,} rows ({time.perf_counter() - start:.1f}s, "
+                  f"peak {peak_memory_mb():.0f} MB)")
+        sample = self._apply_ranks(sample)
+        self._fit_threshold(sample)
+        self.n_training_rows_ = n_rows
+        self.version = new_bundle_version()
+        return self
+
+    def _sketch_pass(self, chunks):
+        # Pass 3 — one sketch set per chunk, merged as we go (memory stays O(k))
+        self.rank_sketches_ = {}
+        for i, chunk in enumerate(chunks):
+            df, X = self._features(self._engineer(self._clean(chunk)))
+            df = self._apply_models(df, X)
+            partial = sketch_columns(df, self._rank_columns(), self.sketch_k, seed=self.random_state + i)
+            self.rank_sketches_ = merge_sketches([self.rank_sketches_, partial])
+
+    def manifest(self):
+        manifest = super().manifest()
+        manifest['fit_mode'] = 'streaming'
+        manifest['sample_size'] = self.sample_size
+        manifest['hashing_features'] = self.hashing_features
+        return manifest
+
+
+def score_csv_in_chunks(pipeline, path, output, chunksize=DEFAULT_CHUNKSIZE, encoding=None):
+    """Score ``path`` chunk by chunk with any fitted pipeline and append to ``output``"""
+    start = time.perf_counter()
+    n_rows = n_flagged = 0
+    for i, chunk in enumerate(iter_chunks(path, chunksize, encoding)):
+        scored = pipeline.score(chunk)
+        scored.to_csv(output, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        n_rows += len(scored)
+        n_flagged += int(scored['fraud_flag'].sum())
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': n_rows,
+        'flagged': n_flagged,
+        'seconds': elapsed,
+        'rows_per_sec': n_rows / elapsed if elapsed > 0 else 0.0,
+        'peak_memory_mb': peak_memory_mb(),
+    }
+
+
+# ======================================================================
+# CLI
+# ======================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Out-of-core fit/score for large application files")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    fit_parser = sub.add_parser('fit', help="Fit incrementally and save a model bundle")
+    fit_parser.add_argument('input', help="Training applications CSV")
+    fit_parser.add_argument('--sample-size', type=int, default=DEFAULT_SAMPLE_SIZE,
+                            help="Rows kept for the subsampled fits and rank references")
+    fit_parser.add_argument('--duplicate-columns', nargs='*', metavar='COL',
+                            help="Add MinHash LSH duplicate clusters over these columns "
+                                 f"(no names: {', '.join(DUPLICATE_COLUMNS)})")
+    fit_parser.add_argument('--rank-method', choices=RANK_METHODS, default='exact',
+                            help="Ranks from the sample, or KLL sketches merged over every chunk")
+
+    score_parser = sub.add_parser('score', help="Score a CSV chunk by chunk with a saved bundle")
+    score_parser.add_argument('input', help="Applications CSV to score")
+    score_parser.add_argument('-o', '--output', default='fraud_detection_full_dataset.csv', help="Scored CSV output")
+
+    for p in (fit_parser, score_parser):
+        p.add_argument('--bundle-dir', default='models', help="Bundle root directory")
+        p.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+        p.add_argument('--encoding', help="File encoding (sniffed from the first MB by default)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'fit':
+        duplicate_columns = args.duplicate_columns
+        if duplicate_columns is not None and not duplicate_columns:
+            duplicate_columns = DUPLICATE_COLUMNS
+        pipeline = StreamingFraudPipeline(chunksize=args.chunksize, sample_size=args.sample_size,
+                                          duplicate_columns=duplicate_columns, rank_method=args.rank_method)
+        pipeline.fit_stream(args.input, args.encoding)
+        version_dir = pipeline.save(args.bundle_dir)
+        print(f"✔️ Bundle {pipeline.version} saved to {version_dir} "
+              f"({pipeline.n_training_rows_:,} rows, threshold {pipeline.threshold_:.4f}, "
+              f"peak {peak_memory_mb():.0f} MB)")
+        if pipeline.rank_errors_:
+            print_rank_errors(pipeline.rank_errors_)
+    else:
+        pipeline = FraudPipeline.load(args.bundle_dir)
+        summary = score_csv_in_chunks(pipeline, args.input, args.output, args.chunksize, args.encoding)
+        print(f"🚨 Scored {summary['rows']:,} applications ({summary['flagged']:,} flagged) → {args.output} "
+              f"in {summary['seconds']:.1f}s ({summary['rows_per_sec']:,.0f} rows/s, "
+              f"peak {summary['peak_memory_mb']:.0f} MB)")
+
+
+if __name__ == '__main__':
+    main()
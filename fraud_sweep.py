@@ -0,0 +1,305 @@
+"""
+Hyperparameter Sweep — parallel fits over a shared feature matrix, vectorized
+precision / recall / F1 curves.
+
+The pipeline hardcodes ``n_clusters=5``, ``max_features=0.8``, 25 SVD
+components and the Phase 6 weights. ``run_sweep`` fits every combination of a
+grid and scores it against an optional label column:
+
+    Prepare   Phases 2-3 run once; for each SVD size the float32 model matrix
+              is written straight into a ``SharedMemory`` block, so workers
+              map it instead of receiving a pickled copy
+    Fit       a process pool fits one Isolation Forest per (svd, max_features)
+              and one K-Means per (svd, n_clusters) and returns only their
+              rank vectors; the proxy ranks do not depend on the grid and are
+              computed once
+    Combine   all weight vectors of a model pair are applied in one matrix
+              product; each configuration's scores are sorted once and the
+              cumulative true / false positives give precision, recall and F1
+              at every distinct threshold
+
+``contamination`` is not swept: it only offsets ``decision_function`` by a
+constant, so Phase 6 ranks, ``fraud_score`` and flags do not depend on it.
+The label column is dropped before fitting so it cannot leak into features.
+
+Results are written as a table (``SWEEP_RESULTS_FILE``) the dashboard reads,
+plus downsampled curves (``SWEEP_CURVES_FILE``) when labels are given.
+
+Usage:
+    python fraud_sweep.py applications.csv --label-col Fraudulent
+    python fraud_sweep.py applications.csv --label-col Fraudulent --n-clusters 3 5 8 --svd-components 10 25 \\
+        --weights 0.4,0.3,0.3 0.6,0.2,0.2 --workers 4
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.ensemble import IsolationForest
+
+from fraud_cleaning import unique_rows
+from fraud_features import center_distances, dense_matrix, matrix_width
+from fraud_ingest import load_applications, print_ingest
+from fraud_pipeline import FraudPipeline, percentile_rank, scoring_columns
+
+SWEEP_RESULTS_FILE = "fraud_sweep_results.csv"
+SWEEP_CURVES_FILE = "fraud_sweep_curves.csv"
+
+DEFAULT_GRID = {
+    'svd_components': [10, 25],
+    'max_features': [0.5, 0.8, 1.0],
+    'n_clusters': [3, 5, 8, 12],
+    'weights': [(0.40, 0.30, 0.30), (0.34, 0.33, 0.33), (0.50, 0.25, 0.25), (0.25, 0.25, 0.50)],
+}
+CURVE_POINTS = 200
+
+
+# ======================================================================
+# EVALUATION
+# ======================================================================
+def pr_curves(labels, scores):
+    """Precision / recall / F1 at every distinct threshold, one sort per column.
+
+    ``scores`` is ``(n,)`` or ``(n, configs)``; returns one dict of arrays per
+    column with thresholds in decreasing order (flag rows with score >= t).
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    scores = np.asarray(scores, dtype=float).reshape(len(labels), -1)
+    positives = int(labels.sum())
+    orders = np.argsort(-scores, axis=0, kind='stable')
+    curves = []
+    for j in range(scores.shape[1]):
+        order = orders[:, j]
+        ranked, hits = scores[order, j], labels[order]
+        tp = np.cumsum(hits)
+        fp = np.arange(1, len(hits) + 1) - tp
+        # Last position of each run of tied scores
+        last = np.r_[np.flatnonzero(ranked[1:] != ranked[:-1]), len(ranked) - 1]
+        tp, fp = tp[last], fp[last]
+        precision = tp / (tp + fp)
+        recall = tp / positives if positives else np.zeros(len(tp))
+        denominator = precision + recall
+        f1 = np.divide(2 * precision * recall, denominator, out=np.zeros(len(tp)), where=denominator > 0)
+        curves.append({'threshold': ranked[last], 'precision': precision, 'recall': recall, 'f1': f1})
+    return curves
+
+
+def curve_summary(curve, threshold):
+    """Metrics at ``threshold`` plus the best-F1 point and average precision"""
+    at = np.searchsorted(-curve['threshold'], -threshold, side='right') - 1
+    best = int(np.argmax(curve['f1']))
+    recall_steps = np.diff(np.r_[0.0, curve['recall']])
+    return {
+        'precision': float(curve['precision'][at]) if at >= 0 else np.nan,
+        'recall': float(curve['recall'][at]) if at >= 0 else 0.0,
+        'f1': float(curve['f1'][at]) if at >= 0 else 0.0,
+        'best_f1': float(curve['f1'][best]),
+        'best_f1_threshold': float(curve['threshold'][best]),
+        'best_f1_precision': float(curve['precision'][best]),
+        'best_f1_recall': float(curve['recall'][best]),
+        'average_precision': float((recall_steps * curve['precision']).sum()),
+    }
+
+
+def downsample_curve(curve, points=CURVE_POINTS):
+    """At most ``points`` evenly spaced points of a curve (ends kept)"""
+    keep = np.unique(np.linspace(0, len(curve['threshold']) - 1, points).astype(int))
+    return {name: values[keep] for name, values in curve.items()}
+
+
+# ======================================================================
+# SHARED-MEMORY WORKERS
+# ======================================================================
+_WORKER_MATRICES = {}
+
+
+def _attach(specs):
+    """Map every shared feature matrix (``{svd: (name, shape, dtype)}``)"""
+    for svd, (name, shape, dtype) in specs.items():
+        block = SharedMemory(name=name)
+        _WORKER_MATRICES[svd] = (block, np.ndarray(shape, dtype=dtype, buffer=block.buf))
+
+
+def _fit_component(task):
+    """Fit one model on a shared matrix and return its Phase 6 rank vector"""
+    kind, svd, value, params = task
+    X = _WORKER_MATRICES[svd][1]
+    start = time.perf_counter()
+    if kind == 'iso':
+        model = IsolationForest(n_estimators=params['n_estimators'], contamination=params['contamination'],
+                                max_features=value, random_state=params['random_state']).fit(X)
+        scores = model.decision_function(X)
+        ranks = percentile_rank(np.sort(scores), scores, ascending=False)
+    else:
+        model = KMeans(n_clusters=value, random_state=params['random_state'], n_init='auto').fit(X)
+        distances = center_distances(X, model.cluster_centers_, model.labels_)
+        ranks = percentile_rank(np.sort(distances), distances)
+    return task[:3], ranks, time.perf_counter() - start
+
+
+# ======================================================================
+# SWEEP
+# ======================================================================
+def prepare(df, label_col=None, **params):
+    """Phases 2-3 once; returns ``(pipeline, engineered frame, labels or None)``"""
+    rows = unique_rows(df)
+    labels = None
+    if label_col is not None:
+        if label_col not in df.columns:
+            raise ValueError(f"Label column '{label_col}' not found")
+        labels = pd.to_numeric(df[label_col].iloc[rows], errors='coerce').fillna(0).to_numpy() > 0
+        df = df.drop(columns=[label_col])
+    pipeline = FraudPipeline(**params)
+    pipeline._fit_clean(df, rows)
+    df = pipeline._clean(df, rows)
+    pipeline._fit_proxies(df)
+    df = pipeline._engineer(df).set_axis(pd.RangeIndex(len(df)))
+    return pipeline, df, labels
+
+
+def _share_matrix(pipeline, df):
+    """Fill the float32 model matrix straight into a new shared block"""
+    shape = (len(df), matrix_width(pipeline.scale_cols_, pipeline.scaler_, pipeline.svd_))
+    block = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 4))
+    tfidf = None
+    if pipeline.svd_ is not None:
+        tfidf = pipeline._text_vectors(df)
+    X = np.ndarray(shape, dtype=np.float32, buffer=block.buf)
+    dense_matrix(df, pipeline.scale_cols_, pipeline.scaler_, tfidf, pipeline.svd_, out=X)
+    return block, (block.name, shape, 'float32')
+
+
+def _proxy_ranks(pipeline, df):
+    frame, _ = pipeline._features(df)
+    columns = scoring_columns(frame)
+    if not columns:
+        return np.zeros(len(frame))
+    return frame[columns].rank(pct=True).mean(axis=1).to_numpy()
+
+
+def run_sweep(df, label_col=None, grid=None, workers=None, **params):
+    """Fit every grid configuration; returns ``(results, curves)`` frames"""
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    base = FraudPipeline(**params).get_params()
+    pipeline, df, labels = prepare(df, label_col, **params)
+    workers = workers or os.cpu_count() or 1
+
+    # One shared float32 matrix per SVD size, filled in place
+    blocks, specs, proxy_ranks = [], {}, None
+    try:
+        for svd in grid['svd_components']:
+            pipeline.svd_components = svd
+            pipeline._fit_features(df)
+            if proxy_ranks is None:
+                proxy_ranks = _proxy_ranks(pipeline, df)
+            block, specs[svd] = _share_matrix(pipeline, df)
+            blocks.append(block)
+
+        tasks = [('iso', svd, mf, base) for svd in grid['svd_components'] for mf in grid['max_features']]
+        tasks += [('kmeans', svd, k, base) for svd in grid['svd_components'] for k in grid['n_clusters']]
+        if workers <= 1:
+            _attach(specs)
+            fitted = [_fit_component(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as pool:
+                fitted = list(pool.map(_fit_component, tasks))
+    finally:
+        for svd in list(_WORKER_MATRICES):
+            block, matrix = _WORKER_MATRICES.pop(svd)
+            del matrix
+            block.close()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    ranks = {key: value for key, value, _ in fitted}
+    seconds = {key: value for key, _, value in fitted}
+    weights = np.asarray(grid['weights'], dtype=float)
+    rows, curves = [], []
+    for svd, mf, k in itertools.product(grid['svd_components'], grid['max_features'], grid['n_clusters']):
+        components = np.column_stack([ranks[('iso', svd, mf)], ranks[('kmeans', svd, k)], proxy_ranks])
+        scores = components @ weights.T
+        thresholds = np.quantile(scores, base['threshold_percentile'], axis=0)
+        pair_curves = pr_curves(labels, scores) if labels is not None else [None] * len(weights)
+        for (w_if, w_km, w_freq_sim), threshold, curve, column in zip(weights, thresholds, pair_curves, scores.T):
+            row = {
+                'config_id': len(rows),
+                'svd_components': svd,
+                'max_features': mf,
+                'n_clusters': k,
+                'w_if': w_if,
+                'w_km': w_km,
+                'w_freq_sim': w_freq_sim,
+                'threshold': float(threshold),
+                'flagged': int((column >= threshold).sum()),
+                'fit_seconds': round(seconds[('iso', svd, mf)] + seconds[('kmeans', svd, k)], 3),
+            }
+            if curve is not None:
+                row.update(curve_summary(curve, threshold))
+                points = downsample_curve(curve)
+                curves.append(pd.DataFrame({'config_id': row['config_id'], **points}))
+            rows.append(row)
+
+    results = pd.DataFrame(rows)
+    results.insert(1, 'rows', len(df))
+    results.insert(2, 'positives', int(labels.sum()) if labels is not None else np.nan)
+    if labels is not None:
+        results = results.sort_values(['f1', 'average_precision'], ascending=False, kind='stable')
+    curves = pd.concat(curves, ignore_index=True) if curves else pd.DataFrame()
+    return results.reset_index(drop=True), curves
+
+
+# ======================================================================
+# CLI
+# ======================================================================
+def _weights(text):
+    values = tuple(float(v) for v in text.split(','))
+    if len(values) != 3:
+        raise argparse.ArgumentTypeError("weights are three comma-separated numbers: w_if,w_km,w_freq_sim")
+    return values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep pipeline hyperparameters in a process pool")
+    parser.add_argument('input', help="Applications CSV")
+    parser.add_argument('--label-col', help="0/1 label column for precision / recall / F1 (dropped from features)")
+    parser.add_argument('--svd-components', type=int, nargs='+', default=DEFAULT_GRID['svd_components'])
+    parser.add_argument('--max-features', type=float, nargs='+', default=DEFAULT_GRID['max_features'])
+    parser.add_argument('--n-clusters', type=int, nargs='+', default=DEFAULT_GRID['n_clusters'])
+    parser.add_argument('--weights', type=_weights, nargs='+', default=DEFAULT_GRID['weights'],
+                        metavar='W_IF,W_KM,W_FREQ_SIM')
+    parser.add_argument('--workers', type=int, help="Worker processes (default: all cores)")
+    parser.add_argument('-o', '--output', default=SWEEP_RESULTS_FILE, help="Results table CSV")
+    parser.add_argument('--curves', default=SWEEP_CURVES_FILE, help="Precision/recall curve CSV")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df, report = load_applications(args.input)
+    print_ingest(report)
+    grid = {
+        'svd_components': args.svd_components,
+        'max_features': args.max_features,
+        'n_clusters': args.n_clusters,
+        'weights': args.weights,
+    }
+    results, curves = run_sweep(df, args.label_col, grid, args.workers)
+    results.to_csv(args.output, index=False)
+    print(f"✔️ {len(results):,} configurations → {args.output}")
+    if len(curves):
+        curves.to_csv(args.curves, index=False)
+        best = results.iloc[0]
+        print(f"📊 Best: svd={int(best['svd_components'])}, max_features={best['max_features']}, "
+              f"n_clusters={int(best['n_clusters'])}, weights=({best['w_if']:.2f}, {best['w_km']:.2f}, "
+              f"{best['w_freq_sim']:.2f}) — precision {best['precision']:.3f}, recall {best['recall']:.3f}, "
+              f"F1 {best['f1']:.3f} at the flag threshold (best F1 {best['best_f1']:.3f}, "
+              f"AP {best['average_precision']:.3f})")
+    print(f"⏱️ Done in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
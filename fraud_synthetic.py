@@ -0,0 +1,328 @@
+"""
+Synthetic Data — applications and scored results at any scale.
+
+The dashboard's old demo frame was fixed at 17,592 rows, 11 titles and 8
+locations from the global numpy seed, and each benchmark carried its own
+small generator. This module builds both shapes from a local seed, in chunks,
+so 10M+ rows can be streamed to disk without holding them in memory:
+
+    Cardinality  ``titles`` / ``locations`` distinct values, expanded from
+                 realistic base names (seniority levels, numbered variants)
+    Free text    ``Job Description`` / ``Requirements`` drawn from a Zipf
+                 vocabulary, with a bounded pool of distinct texts per chunk
+    Duplicates   ``duplicate_rate`` of the rows are exact copies of other
+                 rows in the same chunk
+    Rings        ``ring_rate`` of the rows belong to fraud rings: a template
+                 posting re-submitted 5-40 times within a few hours with
+                 small edits to its title and text (near-duplicates)
+
+``iter_applications`` yields raw notebook-shaped chunks (the pipeline's
+input); ``make_scored`` builds a scored-results frame like the dashboard
+reads. ``labels=True`` adds the ground-truth ``ring_id`` (-1 outside rings).
+
+Usage:
+    python fraud_synthetic.py applications --rows 10000000 -o synthetic.csv --titles 5000 --locations 500
+    python fraud_synthetic.py scored --rows 1000000 -o scored.parquet
+    python fraud_synthetic.py scored --rows 17592 --seed 42 --dashboard -o fraud_demo_dataset.parquet
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from fraud_dataset import DASHBOARD_COLUMNS
+from fraud_store import stream_rows
+from fraud_velocity import DATE_COL
+
+CHUNK_ROWS = 250_000
+TEXT_POOL_ROWS = 50_000
+VOCABULARY_SIZE = 3000
+RING_SIZE = (5, 40)
+RING_HOURS = 6
+
+BASE_TITLES = [
+    'Data Analyst', 'Marketing Intern', 'Full Stack Developer', 'Product Manager', 'HR Coordinator',
+    'DevOps Engineer', 'Data Scientist', 'Frontend Developer', 'Backend Engineer', 'UX Designer',
+    'Sales Executive', 'Customer Service Representative', 'Data Entry Clerk', 'Administrative Assistant',
+    'Account Manager', 'Software Engineer', 'Registered Nurse', 'Accountant', 'Business Analyst',
+    'Project Coordinator',
+]
+SENIORITY = ['', 'Junior ', 'Senior ', 'Lead ', 'Principal ']
+BASE_LOCATIONS = [
+    'New York, NY', 'San Francisco, CA', 'Remote', 'Austin, TX', 'London, UK', 'Berlin, DE', 'Toronto, CA',
+    'Chicago, IL',
+]
+INDUSTRIES = ['Technology', 'Finance', 'Healthcare', 'E-commerce', 'Education', 'Manufacturing', 'Consulting']
+COMPANY_SIZES = ['Startup', 'Small', 'Medium', 'Large', 'Enterprise']
+EMPLOYMENT = ['Full-time', 'Part-time', 'Contract', 'Temporary', 'Other']
+EXPERIENCE = ['Entry level', 'Mid-Senior level', 'Associate', 'Director', 'Internship']
+QUALIFICATION = ["Bachelor's Degree", 'High School', "Master's Degree", 'Unspecified']
+# Edits a ring member's title gets (near-duplicates, not exact copies)
+TITLE_EDITS = ['{}', '{}', '{} ', '{}!!', '{} (Remote)', '{} - Urgent', '{} - Work From Home', '{} $$$']
+
+ALERT_LEVELS = [
+    (0.9, '🚨 HIGH RISK: Multiple Anomaly Indicators'),
+    (0.8, '⚠️ MEDIUM RISK: Behavioral Patterns Detected'),
+    (0.7, '🔍 SUSPICIOUS: Unusual Submission Patterns'),
+]
+
+
+# ======================================================================
+# VALUE POOLS
+# ======================================================================
+def title_pool(n):
+    """``n`` distinct job titles: base titles, then seniority levels, then numbered variants"""
+    titles = [f"{level}{title}" for level in SENIORITY for title in BASE_TITLES]
+    titles += [f"{titles[i % len(titles)]} {i // len(titles) + 2}" for i in range(max(0, n - len(titles)))]
+    return np.array(titles[:n], dtype=object)
+
+
+def location_pool(n):
+    """``n`` distinct locations: the base cities, then numbered ones"""
+    extra = [f"City {i}, ST{i % 50}" for i in range(max(0, n - len(BASE_LOCATIONS)))]
+    return np.array((BASE_LOCATIONS + extra)[:n], dtype=object)
+
+
+def vocabulary(n=VOCABULARY_SIZE):
+    """Words and their Zipf weights"""
+    words = np.array([f"word{i}" for i in range(n)], dtype=object)
+    weights = 1.0 / np.arange(1, n + 1)
+    return words, weights / weights.sum()
+
+
+def join_tokens(words, token_ids):
+    """One space-joined string per row of a token-id matrix"""
+    return np.array([" ".join(row) for row in words[token_ids]], dtype=object)
+
+
+# Text columns are built as (pool, codes): duplicating or shuffling rows only
+# moves integer codes, and each pool is converted to Arrow once (code -1 = missing)
+def _pick(rng, values, rows, missing=0.0):
+    codes = rng.integers(len(values), size=rows)
+    if missing:
+        codes[rng.random(rows) < missing] = -1
+    return np.asarray(values, dtype=object), codes
+
+
+def _distinct(values):
+    return np.asarray(values, dtype=object), np.arange(len(values))
+
+
+def _constant(value, rows):
+    return np.array([value], dtype=object), np.full(rows, 0 if value is not None else -1)
+
+
+def _concat(a, b):
+    (pool_a, codes_a), (pool_b, codes_b) = a, b
+    return np.concatenate([pool_a, pool_b]), np.concatenate([codes_a, np.where(codes_b < 0, -1, codes_b + len(pool_a))])
+
+
+def _to_arrow(column):
+    pool, codes = column
+    indices = pa.array(codes, type=pa.int32(), mask=codes < 0)
+    return pa.array(pool, type=pa.string()).take(indices)
+
+
+# ======================================================================
+# APPLICATIONS (raw pipeline input)
+# ======================================================================
+def _base_rows(rng, rows, titles, locations, words, weights, text_pool_rows):
+    n_texts = max(1, min(text_pool_rows, rows // 3))
+    descriptions = join_tokens(words, rng.choice(len(words), (n_texts, 40), p=weights))
+    requirements = join_tokens(words, rng.choice(len(words), (max(1, n_texts // 4), 15), p=weights))
+    return {
+        'Job Title': _pick(rng, titles, rows),
+        'Job Location': _pick(rng, locations, rows, 0.02),
+        'Department': _pick(rng, [f"Dept {i}" for i in range(40)], rows, 0.6),
+        'Range of Salary': _pick(rng, [f"{i}0000-{i + 2}0000" for i in range(1, 20)], rows, 0.8),
+        'Profile': _pick(rng, [f"Company profile {i}" for i in range(800)], rows, 0.2),
+        'Job Description': _pick(rng, descriptions, rows),
+        'Requirements': _pick(rng, requirements, rows, 0.15),
+        'Telecomunication': rng.integers(0, 2, rows),
+        'Comnpany Logo': rng.integers(0, 2, rows),
+        'Type of Employment': _pick(rng, EMPLOYMENT, rows, 0.2),
+        'Experience': _pick(rng, EXPERIENCE, rows, 0.4),
+        'Qualification': _pick(rng, QUALIFICATION, rows, 0.45),
+        'Type of Industry': _pick(rng, [f"Industry {i}" for i in range(120)], rows, 0.3),
+        'Operations': _pick(rng, [f"Function {i}" for i in range(35)], rows, 0.35),
+        'Fraudulent': (rng.random(rows) < 0.05).astype(np.int64),
+    }
+
+
+def _ring_rows(rng, rows, titles, locations, words, weights):
+    # Ring sizes until ``rows`` members; the last ring is truncated
+    sizes = []
+    while sum(sizes) < rows:
+        sizes.append(int(rng.integers(RING_SIZE[0], RING_SIZE[1] + 1)))
+    sizes[-1] -= sum(sizes) - rows
+    ring = np.repeat(np.arange(len(sizes)), sizes)
+    n_rings = len(sizes)
+
+    def per_ring(values):
+        pool, codes = _pick(rng, values, n_rings)
+        return pool, codes[ring]
+
+    # Template text, then ~10% of each member's words swapped
+    description_ids = rng.choice(len(words), (n_rings, 40), p=weights)[ring]
+    swap = rng.random(description_ids.shape) < 0.1
+    description_ids[swap] = rng.choice(len(words), int(swap.sum()), p=weights)
+    requirements = join_tokens(words, rng.choice(len(words), (n_rings, 15), p=weights))
+
+    edits = np.asarray(TITLE_EDITS, dtype=object)[rng.integers(len(TITLE_EDITS), size=rows)]
+    ring_titles = titles[rng.integers(len(titles), size=n_rings)][ring]
+    return {
+        'Job Title': _distinct([edit.format(title) for edit, title in zip(edits, ring_titles)]),
+        'Job Location': per_ring(locations),
+        'Department': _constant(None, rows),
+        'Range of Salary': per_ring([f"{i}0000-{i + 5}0000" for i in range(5, 15)]),
+        'Profile': _constant(None, rows),
+        'Job Description': _distinct(join_tokens(words, description_ids)),
+        'Requirements': (requirements, ring),
+        'Telecomunication': np.zeros(rows, dtype=np.int64),
+        'Comnpany Logo': np.zeros(rows, dtype=np.int64),
+        'Type of Employment': per_ring(EMPLOYMENT),
+        'Experience': _constant('Entry level', rows),
+        'Qualification': _constant('Unspecified', rows),
+        'Type of Industry': _constant(None, rows),
+        'Operations': _constant(None, rows),
+        'Fraudulent': np.ones(rows, dtype=np.int64),
+    }, ring
+
+
+def iter_applications(rows, titles=1000, locations=200, duplicate_rate=0.05, ring_rate=0.02,
+                      start='2024-01-01', days=365, labels=False, chunk_rows=CHUNK_ROWS,
+                      text_pool_rows=TEXT_POOL_ROWS, seed=0):
+    """Raw applications as Arrow tables of at most ``chunk_rows`` rows, ``rows`` in total"""
+    rng = np.random.default_rng(seed)
+    title_values, location_values = title_pool(titles), location_pool(locations)
+    words, weights = vocabulary()
+    origin = pd.Timestamp(start).value // 10**9
+    span = max(days, 1) * 86_400
+    next_ring = 0
+    for lo in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - lo)
+        n_ring = int(round(n * ring_rate))
+        n_dup = int(round(n * duplicate_rate))
+        n_base = n - n_ring - n_dup
+        data = _base_rows(rng, n_base, title_values, location_values, words, weights, text_pool_rows)
+        dates = origin + rng.integers(0, span, n_base)
+        ring_ids = np.full(n_base, -1)
+        if n_ring:
+            ring_data, ring = _ring_rows(rng, n_ring, title_values, location_values, words, weights)
+            # A ring posts in a burst: one start per ring, members within RING_HOURS
+            ring_start = origin + rng.integers(0, span, ring.max() + 1)
+            dates = np.concatenate([dates, ring_start[ring] + rng.integers(0, RING_HOURS * 3_600, n_ring)])
+            ring_ids = np.concatenate([ring_ids, ring + next_ring])
+            next_ring += ring.max() + 1
+            data = {
+                col: _concat(values, ring_data[col]) if isinstance(values, tuple)
+                else np.concatenate([values, ring_data[col]])
+                for col, values in data.items()
+            }
+
+        # Exact duplicates of random rows, then one shuffle: both only move row positions
+        order = np.concatenate([np.arange(n - n_dup), rng.integers(n - n_dup, size=n_dup)])
+        order = order[rng.permutation(n)]
+        columns = {
+            col: _to_arrow((values[0], values[1][order])) if isinstance(values, tuple) else pa.array(values[order])
+            for col, values in data.items()
+        }
+        if days:
+            columns[DATE_COL] = pc.strftime(pa.array(dates[order], type=pa.timestamp('s')), '%Y-%m-%d %H:%M:%S')
+        if labels:
+            columns['ring_id'] = pa.array(ring_ids[order])
+        yield pa.table(columns)
+
+
+def make_applications(rows, **kwargs):
+    """``iter_applications`` as one pandas frame"""
+    return pa.concat_tables(iter_applications(rows, **kwargs)).to_pandas()
+
+
+def write_applications(path, rows, fmt='csv', compress=False, **kwargs):
+    """Stream ``iter_applications`` chunks to a CSV / Parquet file; returns ``stream_rows``' summary"""
+    return stream_rows(iter_applications(rows, **kwargs), path, fmt, compress)
+
+
+# ======================================================================
+# SCORED RESULTS (dashboard input)
+# ======================================================================
+def _choice(rng, values, rows):
+    return np.asarray(values, dtype=object)[rng.integers(len(values), size=rows)]
+
+
+def make_scored(rows, titles=len(BASE_TITLES), locations=len(BASE_LOCATIONS), flag_rate=0.05,
+                start='2024-01-01', days=730, seed=42):
+    """A scored-results frame with the dashboard's columns, highest score first"""
+    rng = np.random.default_rng(seed)
+    # Mostly normal scores, a suspicious band and a small high-scoring tail
+    n_suspicious, n_fraud = int(rows * 0.06), int(rows * 0.02)
+    scores = np.concatenate([
+        rng.beta(2, 8, rows - n_suspicious - n_fraud),
+        rng.beta(8, 2, n_suspicious),
+        rng.beta(15, 2, n_fraud),
+    ])
+    scores = np.clip(rng.permutation(scores), 0.01, 0.99)
+    data = pd.DataFrame({
+        'Job Title': _choice(rng, title_pool(titles), rows),
+        'Job Location': _choice(rng, location_pool(locations), rows),
+        'Industry': _choice(rng, INDUSTRIES, rows),
+        'Company Size': _choice(rng, COMPANY_SIZES, rows),
+        'fraud_score': scores,
+        'title_freq_scaled': rng.exponential(0.5, rows),
+        'max_title_similarity_scaled': rng.beta(1.5, 5, rows),
+        DATE_COL: pd.to_datetime(pd.Timestamp(start).value + rng.integers(0, days * 86_400 * 10**9, rows)),
+        'response_time_hours': rng.exponential(24, rows),
+    })
+    data['fraud_flag'] = scores >= np.quantile(scores, 1 - flag_rate) if rows else np.zeros(0, dtype=bool)
+    data['Alert_Reason'] = np.select([scores >= level for level, _ in ALERT_LEVELS],
+                                     [reason for _, reason in ALERT_LEVELS], default='Normal')
+    return data.sort_values('fraud_score', ascending=False, ignore_index=True)
+
+
+# ======================================================================
+# CLI
+# ======================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic applications or scored results")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    apps = sub.add_parser('applications', help="Raw applications (pipeline input) with duplicates and fraud rings")
+    apps.add_argument('--titles', type=int, default=1000, help="Distinct job titles")
+    apps.add_argument('--locations', type=int, default=200, help="Distinct job locations")
+    apps.add_argument('--duplicate-rate', type=float, default=0.05, help="Fraction of exact duplicate rows")
+    apps.add_argument('--ring-rate', type=float, default=0.02, help="Fraction of rows in near-duplicate fraud rings")
+    apps.add_argument('--days', type=int, default=365, help="Submission dates span (0: no submission_date)")
+    apps.add_argument('--labels', action='store_true', help="Add the ground-truth ring_id column")
+
+    scored = sub.add_parser('scored', help="Scored results shaped like the dashboard's input")
+    scored.add_argument('--titles', type=int, default=len(BASE_TITLES))
+    scored.add_argument('--locations', type=int, default=len(BASE_LOCATIONS))
+    scored.add_argument('--dashboard', action='store_true',
+                        help="Keep only the columns the dashboard loads (how its demo artifact is built)")
+
+    for p in (apps, scored):
+        p.add_argument('--rows', type=int, required=True)
+        p.add_argument('-o', '--output', required=True, help=".csv, .csv.gz or .parquet")
+        p.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    fmt = 'parquet' if args.output.lower().endswith('.parquet') else 'csv'
+    compress = args.output.lower().endswith('.gz')
+    if args.command == 'applications':
+        summary = write_applications(args.output, args.rows, fmt, compress, titles=args.titles,
+                                     locations=args.locations, duplicate_rate=args.duplicate_rate,
+                                     ring_rate=args.ring_rate, days=args.days, labels=args.labels, seed=args.seed)
+    else:
+        frame = make_scored(args.rows, args.titles, args.locations, seed=args.seed)
+        if args.dashboard:
+            frame = frame[[c for c in DASHBOARD_COLUMNS if c in frame.columns]]
+        summary = stream_rows([pa.Table.from_pandas(frame, preserve_index=False)], args.output, fmt, compress)
+    print(f"✔️ {summary['rows']:,} rows → {args.output} ({summary['bytes'] / 1e6:,.1f} MB) in "
+          f"{summary['seconds']:.2f}s — {summary['rows_per_second']:,} rows/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Phase 3 Text — every free-text column hashed into one sparse matrix.
+
+The notebook runs TF-IDF (100 terms) over the first text column only and
+keeps its fitted vocabulary. ``TextHasher`` covers every detected text
+column with no vocabulary at all:
+
+    Hash      a stateless ``HashingVectorizer`` per column (unigrams,
+              English stop words, l2-normalized), so nothing is fitted,
+              the same rows hash the same in every process and chunk, and
+              streaming needs no extra pass
+    Dedup     each column is factorized first and only its distinct values
+              are hashed; rows are gathered from those by code (categorical
+              text like Department or Type of Employment hashes a handful
+              of strings instead of every row)
+    Parallel  distinct values of every column are split into chunks and
+              hashed in a process pool when there are enough of them
+    Combine   one l2-normalized block of ``n_features`` columns per text
+              column, stacked side by side into a single CSR matrix for
+              Phase 4 ``TruncatedSVD``
+
+Usage:
+    hasher = TextHasher(['Job Title', 'Job Description', 'Requirements'])
+    vectors = hasher.transform(df, workers=4)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# Per column: the SVD components are dense over every hashed column, so the
+# combined width stays modest (2^13 x columns)
+HASHING_FEATURES = 2 ** 13
+CHUNK_VALUES = 20_000
+PARALLEL_MIN_VALUES = 50_000
+
+
+def _vectorizer(n_features):
+    return HashingVectorizer(
+        n_features=n_features,
+        stop_words='english',
+        alternate_sign=False,
+        norm='l2',
+        dtype=np.float32
+    )
+
+
+def _hash_chunk(args):
+    values, n_features = args
+    return _vectorizer(n_features).transform(values)
+
+
+class TextHasher:
+    """Stateless multi-column hashing featurizer: one hashed block per text column"""
+
+    def __init__(self, columns, n_features=HASHING_FEATURES):
+        self.columns = list(columns)
+        self.n_features = n_features
+
+    @property
+    def width(self):
+        return len(self.columns) * self.n_features
+
+    def transform(self, df, workers=None):
+        """``[hash(col_1) | hash(col_2) | ...]`` as one CSR matrix, a row per row of ``df``"""
+        codes, tasks, owners = [], [], []
+        for j, col in enumerate(self.columns):
+            col_codes, uniques = pd.factorize(df[col].fillna('') if col in df.columns else
+                                              pd.Series('', index=df.index))
+            codes.append(col_codes)
+            uniques = [str(u) for u in uniques]
+            for start in range(0, len(uniques), CHUNK_VALUES):
+                tasks.append((uniques[start:start + CHUNK_VALUES], self.n_features))
+                owners.append(j)
+
+        workers = workers or os.cpu_count() or 1
+        n_values = sum(len(values) for values, _ in tasks)
+        if workers <= 1 or n_values < PARALLEL_MIN_VALUES or len(tasks) < 2:
+            hashed = [_hash_chunk(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                hashed = list(pool.map(_hash_chunk, tasks))
+
+        blocks = []
+        for j, col_codes in enumerate(codes):
+            parts = [h for h, owner in zip(hashed, owners) if owner == j]
+            distinct = sp.vstack(parts, format='csr') if parts else \
+                sp.csr_matrix((0, self.n_features), dtype=np.float32)
+            # Each row is its value's hashed row
+            blocks.append(distinct[col_codes] if len(col_codes) else
+                          sp.csr_matrix((0, self.n_features), dtype=np.float32))
+        if not blocks:
+            return sp.csr_matrix((len(df), 0), dtype=np.float32)
+        return sp.hstack(blocks, format='csr', dtype=np.float32)
@@ -0,0 +1,233 @@
+"""
+Submission Velocity Features — sliding-window counters keyed on submission_date.
+
+``title_freq`` / ``location_freq`` count over the whole dataset and are
+recomputed from scratch on every run. ``VelocityStore`` is an incremental
+feature store instead: every application is recorded once, as it arrives,
+and its features are read straight from the counters:
+
+    Windows   1h / 24h / 7d (configurable), each a ring of ``BUCKETS`` time
+              buckets (1 min / 24 min / 2.8 h wide for the defaults)
+    Update    advance the ring to the arrival's bucket, expiring buckets that
+              fell out of the window from the running totals, then increment
+              the arrival's keys — amortized O(1) per application
+    Read      the running total of a key is its count in the window
+
+Features, for each key column and window (counts include the application):
+    title_velocity_1h, title_velocity_24h, title_velocity_7d,
+    location_velocity_1h, ...
+
+``peek`` reads the features a batch would get without recording it, so a
+scorer can record arrivals only once the batch has scored.
+
+Counts are exact up to bucket granularity at the window edge. Timestamps more
+than ``MAX_CLOCK_SKEW`` ahead of the clock are clamped to that bound, so one
+bad date cannot push the rings into the future. An arrival older than a ring is not
+stored there (it fell out of that window) and only counts itself. Scoring
+records the batch, so each application should be scored once.
+"""
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+DATE_COL = 'submission_date'
+VELOCITY_KEYS = ['Job Title', 'Job Location']
+VELOCITY_WINDOWS = {'1h': 3600, '24h': 86400, '7d': 7 * 86400}
+BUCKETS = 60
+# Client clocks may run ahead of ours by this much before a timestamp is clamped
+MAX_CLOCK_SKEW = 300
+
+KEY_PREFIXES = {'Job Title': 'title', 'Job Location': 'location'}
+
+
+def velocity_column(key, window):
+    """Feature name for a key column and window label"""
+    prefix = KEY_PREFIXES.get(key, key.strip().lower().replace(' ', '_'))
+    return f"{prefix}_velocity_{window}"
+
+
+def to_epoch_seconds(values):
+    """Parse timestamps to UTC epoch seconds (NaN where unparseable)"""
+    stamps = pd.to_datetime(pd.Series(values), errors='coerce', utc=True)
+    # Through a timedelta, not the raw integers: their unit (s / us / ns) depends on the pandas version
+    return (stamps - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy(dtype=float, copy=True)
+
+
+# ======================================================================
+# RING-BUFFERED COUNTER
+# ======================================================================
+class SlidingWindowCounter:
+    """Per-key counts over the last ``window_seconds`` in a ring of buckets"""
+
+    def __init__(self, window_seconds, buckets=BUCKETS):
+        self.window_seconds = window_seconds
+        self.width = window_seconds / buckets
+        self.buckets = [Counter() for _ in range(buckets)]
+        self.totals = Counter()
+        self.head = None
+
+    def advance(self, timestamp):
+        """Move the ring forward to ``timestamp``, expiring old buckets"""
+        bucket = int(timestamp // self.width)
+        if self.head is None:
+            self.head = bucket
+            return bucket
+        if bucket > self.head:
+            n = len(self.buckets)
+            for absolute in range(max(self.head + 1, bucket - n + 1), bucket + 1):
+                expired = self.buckets[absolute % n]
+                for key, count in expired.items():
+                    remaining = self.totals[key] - count
+                    if remaining:
+                        self.totals[key] = remaining
+                    else:
+                        del self.totals[key]
+                expired.clear()
+            self.head = bucket
+        return bucket
+
+    def add(self, key, bucket, count=1):
+        """Record ``count`` arrivals of ``key`` in an already-advanced bucket"""
+        if bucket <= self.head - len(self.buckets):
+            # Already outside the window: counting it in a live bucket would inflate the totals
+            return count
+        self.buckets[bucket % len(self.buckets)][key] += count
+        self.totals[key] += count
+        return self.totals[key]
+
+    def peek(self, key, timestamp, pending):
+        """What ``add`` would return after ``advance(timestamp)``, without changing the ring.
+
+        ``pending`` maps keys to the buckets of earlier unrecorded arrivals (in
+        time order) and gets this one.
+        """
+        bucket = int(timestamp // self.width)
+        n = len(self.buckets)
+        head = bucket if self.head is None else self.head
+        if bucket <= head - n:
+            return 1
+        top = max(head, bucket)
+        count = self.totals.get(key, 0)
+        for absolute in range(max(head + 1, top - n + 1), top + 1):
+            count -= self.buckets[absolute % n].get(key, 0)
+        earlier = pending.setdefault(key, [])
+        earlier.append(bucket)
+        return count + len(earlier) - bisect_right(earlier, top - n)
+
+    def count(self, key):
+        return self.totals.get(key, 0)
+
+    def __len__(self):
+        return len(self.totals)
+
+
+# ======================================================================
+# FEATURE STORE
+# ======================================================================
+class VelocityStore:
+    """Sliding-window counters for several key columns and windows"""
+
+    def __init__(self, keys=None, windows=None, buckets=BUCKETS, date_col=DATE_COL):
+        self.keys = list(keys or VELOCITY_KEYS)
+        self.windows = dict(windows or VELOCITY_WINDOWS)
+        self.date_col = date_col
+        self.counters = {label: SlidingWindowCounter(seconds, buckets) for label, seconds in self.windows.items()}
+        self.latest = None
+        self.n_recorded = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def columns(self):
+        return [velocity_column(key, label) for key in self.keys for label in self.windows]
+
+    def _timestamps(self, df):
+        if self.date_col in df.columns:
+            seconds = to_epoch_seconds(df[self.date_col])
+        else:
+            seconds = np.full(len(df), np.nan)
+        # Undated arrivals are stamped with the latest time seen (or now)
+        now = time.time()
+        missing = np.isnan(seconds)
+        if missing.any():
+            seconds[missing] = self.latest if self.latest is not None else now
+        return np.minimum(seconds, now + MAX_CLOCK_SKEW)
+
+    def record(self, df):
+        """Record a batch of arrivals and return its velocity features.
+
+        Rows are applied in timestamp order; each row's features are read
+        right after its own arrival is counted.
+        """
+        seconds = self._timestamps(df)
+        order = np.argsort(seconds, kind='stable')
+        key_values = [df[key].astype(str).to_numpy() if key in df.columns else None for key in self.keys]
+        features = np.zeros((len(df), len(self.keys) * len(self.windows)), dtype=np.int64)
+        counters = list(self.counters.values())
+
+        with self._lock:
+            for i in order:
+                timestamp = seconds[i]
+                column = 0
+                buckets = [counter.advance(timestamp) for counter in counters]
+                for k, values in enumerate(key_values):
+                    for counter, bucket in zip(counters, buckets):
+                        if values is not None:
+                            features[i, column] = counter.add((k, values[i]), bucket)
+                        column += 1
+            if len(seconds):
+                latest = float(seconds.max())
+                self.latest = latest if self.latest is None else max(self.latest, latest)
+            self.n_recorded += len(df)
+        return pd.DataFrame(features, columns=self.columns, index=df.index)
+
+    def peek(self, df):
+        """The features ``record`` would return for a batch, without recording it"""
+        seconds = self._timestamps(df)
+        order = np.argsort(seconds, kind='stable')
+        key_values = [df[key].astype(str).to_numpy() if key in df.columns else None for key in self.keys]
+        features = np.zeros((len(df), len(self.keys) * len(self.windows)), dtype=np.int64)
+        counters = list(self.counters.values())
+        pending = [{} for _ in counters]
+
+        with self._lock:
+            for i in order:
+                column = 0
+                for k, values in enumerate(key_values):
+                    for counter, earlier in zip(counters, pending):
+                        if values is not None:
+                            features[i, column] = counter.peek((k, values[i]), seconds[i], earlier)
+                        column += 1
+        return pd.DataFrame(features, columns=self.columns, index=df.index)
+
+    def transform(self, df, record=True):
+        """Add ``df``'s velocity feature columns, recording it as arrivals unless ``record=False``"""
+        features = self.record(df) if record else self.peek(df)
+        for col in features.columns:
+            df[col] = features[col]
+        return df
+
+    def velocity(self, key, value, window):
+        """Current count of ``value`` in ``key`` over ``window`` (no update)"""
+        return self.counters[window].count((self.keys.index(key), str(value)))
+
+    def summary(self):
+        return {
+            'keys': self.keys,
+            'windows': self.windows,
+            'recorded': self.n_recorded,
+            'latest': pd.Timestamp(self.latest, unit='s', tz='UTC').isoformat() if self.latest is not None else None,
+            'active_keys': {label: len(counter) for label, counter in self.counters.items()},
+        }
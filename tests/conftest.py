@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fraud_pipeline import FraudPipeline  # noqa: E402
+from fraud_synthetic import make_applications  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def applications():
+    return make_applications(1500, seed=7)
+
+
+@pytest.fixture(scope='session')
+def pipeline(applications):
+    return FraudPipeline().fit(applications)
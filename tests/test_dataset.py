@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from fraud_dataset import MAX_SEGMENTS, FilterIndex, SharedDataset, segment_chain
+
+
+def _scored(seed, n, locations):
+    rng = np.random.default_rng(seed)
+    titles = rng.choice(['analyst', 'clerk', None, 'driver'], n)
+    return pd.DataFrame({
+        'Job Title': pd.Series(titles, dtype='str'),
+        'Job Location': rng.choice(locations, n),
+        'Industry': rng.choice(['Finance', 'Retail'], n),
+        'fraud_score': rng.random(n).round(2),
+        'fraud_flag': rng.random(n) < 0.2,
+    })
+
+
+def _assert_same_queries(dataset, reference):
+    for where in ({}, {'Job Location': 'c'}, {'Job Location': 'e', 'Industry': 'Retail'}):
+        for min_score in (None, 0.5, 0.95):
+            assert np.array_equal(dataset.index.query(min_score=min_score, where=where),
+                                  reference.query(min_score=min_score, where=where))
+    assert dataset.index.categories('Job Location') == reference.categories('Job Location')
+
+
+def test_appends_merge_the_index_and_ranks_like_a_rebuild(tmp_path):
+    frames = [_scored(0, 300, ['a', 'c'])]
+    dataset = SharedDataset.load('v0', lambda: frames[0], tmp_path)
+    dataset.index
+    dataset.sort_ranks('Job Title')
+    dataset.sort_ranks('fraud_score')
+    for i in range(1, MAX_SEGMENTS + 3):
+        # New locations appear and sort before / between the known ones
+        frames.append(_scored(i, 40, ['a', 'b', 'c', 'e'][:2 + i % 3]))
+        dataset = dataset.append(frames[-1], f"v{i}", tmp_path)
+        full = pd.concat(frames, ignore_index=True)
+        _assert_same_queries(dataset, FilterIndex(full))
+        reference = SharedDataset(dataset.table, 'ref')
+        reference.index
+        for col in ('Job Title', 'fraud_score'):
+            assert np.array_equal(dataset.sort_ranks(col), reference.sort_ranks(col))
+        assert len(dataset.flagged) == int(full['fraud_flag'].sum())
+        assert np.array_equal(dataset.frame['fraud_score'], full['fraud_score'])
+
+    # Segments are chained until MAX_SEGMENTS, then one compacted file is written:
+    # the last two appends chain to it
+    assert len(segment_chain(dataset.path)) == dataset.segments == 3
+    reloaded = SharedDataset.load(dataset.key, lambda: None, tmp_path)
+    assert reloaded.segments == 3
+    pd.testing.assert_frame_equal(reloaded.frame, dataset.frame)
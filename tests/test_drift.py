@@ -0,0 +1,68 @@
+import os
+
+from fraud_drift import RETRY_MAX_SECONDS, RetrainScheduler, split_holdout
+from fraud_pipeline import FraudPipeline
+from fraud_synthetic import make_applications
+from fraud_velocity import to_epoch_seconds
+
+
+def test_holdout_is_the_latest_applications(applications):
+    train, holdout = split_holdout(applications, 200)
+    assert len(holdout) == 200 and len(train) + 200 == len(applications.drop_duplicates())
+    assert to_epoch_seconds(train['submission_date']).max() <= to_epoch_seconds(holdout['submission_date']).min()
+
+
+def test_retrain_validates_out_of_sample_and_needs_new_data(tmp_path):
+    applications = make_applications(2500, seed=11)
+    train = tmp_path / 'applications.csv'
+    applications.to_csv(train, index=False)
+    FraudPipeline(velocity_keys=['Job Title']).fit(applications).save(tmp_path / 'models')
+
+    scheduler = RetrainScheduler(tmp_path / 'models', str(train), holdout_rows=500, cooldown_seconds=3600)
+    scheduler.due = lambda: "drift: iso_score_raw"
+    version = scheduler.tick()
+    saved = FraudPipeline.load(tmp_path / 'models' / version)
+    assert scheduler.pipeline.version == version
+    # Validation scored a throwaway copy; the refit never saw the holdout
+    assert scheduler.pipeline.velocity_.n_recorded == saved.velocity_.n_recorded
+    assert saved.velocity_.n_recorded == len(split_holdout(applications, 500)[0])
+    assert scheduler.history[-1]['flag_rate_checked'] is True
+    # Cooling down after a successful swap
+    assert scheduler.tick() is None and scheduler.retry_at > 0
+
+    # Still drifted, but the training data has not changed: no refit of the same rows
+    scheduler.retry_at = 0.0
+    assert scheduler.tick() is None
+    assert scheduler.waiting == "drift: iso_score_raw"
+    assert len(scheduler.history) == 1
+
+    applications.to_csv(train, index=False)
+    stat = os.stat(train)
+    os.utime(train, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert scheduler.new_training_data()
+
+
+def test_failed_retrain_backs_off(tmp_path, pipeline):
+    pipeline.save(tmp_path / 'models')
+    scheduler = RetrainScheduler(tmp_path / 'models', 'unused.csv', retry_seconds=60)
+    calls = []
+
+    def failing_check():
+        calls.append(1)
+        raise ValueError("holdout flag rate far from target")
+
+    scheduler.check = failing_check
+    scheduler.tick()
+    scheduler.tick()
+    assert len(calls) == 1
+    assert scheduler.history[-1]['retry_in_s'] == 60
+
+    scheduler.retry_at = 0.0
+    scheduler.tick()
+    assert len(calls) == 2
+    assert scheduler.history[-1]['retry_in_s'] == 120
+
+    scheduler.failures = 50
+    scheduler.retry_at = 0.0
+    scheduler.tick()
+    assert scheduler.history[-1]['retry_in_s'] == RETRY_MAX_SECONDS
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from fraud_dataset import APPLICATION_ID
+from fraud_neighbors import CURRENT_FILE, MANIFEST_FILE, NeighborIndex, current_version, index_results
+from fraud_store import export_results
+
+
+def make_index(seed, n=50):
+    vectors = np.random.default_rng(seed).normal(size=(n, 4))
+    return NeighborIndex.build(vectors, pd.DataFrame({'row': np.arange(n) + seed * 1000}))
+
+
+def test_save_swaps_in_a_new_version_and_keeps_the_previous_one(tmp_path):
+    first = make_index(1).save(tmp_path)
+    assert NeighborIndex.load(tmp_path).rows['row'].iloc[0] == 1000
+
+    second = make_index(2).save(tmp_path)
+    assert current_version(tmp_path) == second.name
+    assert NeighborIndex.load(tmp_path).rows['row'].iloc[0] == 2000
+    # The version a reader may still be loading stays until the next save
+    assert NeighborIndex.load(first).rows['row'].iloc[0] == 1000
+
+    third = make_index(3).save(tmp_path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([CURRENT_FILE, second.name, third.name])
+
+
+def test_save_replaces_an_unversioned_index(tmp_path):
+    index = make_index(4)
+    legacy = index.save(tmp_path / "legacy")
+    for f in legacy.iterdir():
+        f.rename(tmp_path / f.name)
+    assert NeighborIndex.load(tmp_path).n_rows == 50
+
+    make_index(5, n=20).save(tmp_path)
+    assert not (tmp_path / MANIFEST_FILE).exists()
+    assert NeighborIndex.load(tmp_path).n_rows == 20
+
+
+def _scored(seed, n, day):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        APPLICATION_ID: np.arange(n) + seed * 1000,
+        'fraud_score': rng.random(n),
+        'f1': rng.normal(size=n),
+        'f2': rng.normal(size=n),
+        'submission_date': pd.to_datetime([day] * n),
+    })
+
+
+def test_index_follows_appended_and_replaced_store_files(tmp_path):
+    store, path = tmp_path / "store", tmp_path / "index"
+    export_results(_scored(1, 30, '2024-06-01'), store)
+    index, added = index_results(store, path, ['f1', 'f2'])
+    assert (index.n_rows, added) == (30, 30)
+
+    second = _scored(2, 20, '2024-06-02')
+    export_results(second, store)
+    index, added = index_results(store, path, ['f1', 'f2'])
+    assert (index.n_rows, added) == (50, 20)
+    position = index.position(2005)
+    assert index.rows[APPLICATION_ID].iloc[position] == 2005
+    assert np.allclose(index.vectors(position), second.loc[5, ['f1', 'f2']].to_numpy(dtype=np.float32))
+    assert index.position(-1) is None
+    assert index_results(store, path, ['f1', 'f2'])[1] == 0
+
+    # Replacing a day removes the files the index was built from: it is rebuilt from the store
+    export_results(_scored(3, 5, '2024-06-01'), store, mode='replace')
+    index, added = index_results(store, path, ['f1', 'f2'])
+    assert sorted(NeighborIndex.load(path).rows[APPLICATION_ID]) == sorted([*range(2000, 2020), *range(3000, 3005)])
+    assert added == 25
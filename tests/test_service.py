@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from fraud_pipeline import FraudPipeline
+from fraud_service import MicroBatcher, record_error
+
+
+def test_record_error_rejects_nested_and_unknown_columns(pipeline, applications):
+    record = applications.iloc[0].to_dict()
+    assert record_error(record, pipeline.input_columns_) is None
+    assert 'Job Title' in record_error({**record, 'Job Title': {'nested': 1}}, pipeline.input_columns_)
+    assert 'Unknown columns' in record_error({**record, 'bogus': 1}, pipeline.input_columns_)
+    assert record_error([record], pipeline.input_columns_) is not None
+    assert 'finite' in record_error({**record, 'Telecomunication': float('inf')}, pipeline.input_columns_)
+
+
+def score_in_one_batch(pipeline, records):
+    async def score_all():
+        # One batch: the window is long enough for every request to join it
+        batcher = MicroBatcher(pipeline, max_batch_size=len(records), max_wait_ms=500, workers=1)
+        batcher.start()
+        try:
+            results = await asyncio.gather(*(batcher.submit(r) for r in records), return_exceptions=True)
+            return results, list(batcher.stats.batch_sizes)
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(score_all())
+
+
+def test_bad_record_fails_alone_in_its_batch(pipeline, applications):
+    records = [applications.iloc[i].to_dict() for i in range(8)]
+    records[3]['Job Title'] = {'nested': 1}
+    results, batch_sizes = score_in_one_batch(pipeline, records)
+    assert batch_sizes == [len(records)]
+    assert isinstance(results[3], Exception)
+    good = [r for i, r in enumerate(results) if i != 3]
+    assert all(isinstance(r, dict) and 0.0 <= r['fraud_score'] <= 1.0 for r in good)
+
+    alone = pipeline.score(applications.iloc[[0]], per_row=True)['fraud_score'].iloc[0]
+    assert results[0]['fraud_score'] == pytest.approx(alone)
+
+
+def test_failed_batch_records_velocity_arrivals_once(applications):
+    pipeline = FraudPipeline(velocity_keys=['Job Title']).fit(applications)
+    records = [{key: value for key, value in applications.iloc[i].to_dict().items() if key != 'submission_date'}
+               for i in range(8)]
+    # Past record_error (as if it were skipped): fails inside the batch
+    records[3]['Telecomunication'] = float('inf')
+    recorded = pipeline.velocity_.n_recorded
+
+    results, batch_sizes = score_in_one_batch(pipeline, records)
+    assert batch_sizes == [len(records)]
+    assert isinstance(results[3], Exception)
+    assert pipeline.velocity_.n_recorded == recorded + len(records) - 1
+    # submit stamps a copy: the caller's records are untouched
+    assert all('submission_date' not in record for record in records)
@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from fraud_store import export_results, load_results
+
+
+def _batch(titles, day):
+    return pd.DataFrame({
+        'Job Title': titles,
+        'fraud_score': [0.5] * len(titles),
+        'fraud_flag': [False] * len(titles),
+        'submission_date': pd.to_datetime([day] * len(titles)),
+    })
+
+
+def test_overlapping_exports_keep_both_batches(tmp_path):
+    export_results(_batch(['a', 'b'], '2024-06-01'), tmp_path)
+    export_results(pd.concat([_batch(['c'], '2024-06-01'), _batch(['d'], '2024-06-02')]), tmp_path)
+    stored = load_results(tmp_path, ['Job Title'])
+    assert sorted(stored['Job Title']) == ['a', 'b', 'c', 'd']
+
+
+def test_replace_mode_swaps_only_the_batch_days(tmp_path):
+    export_results(pd.concat([_batch(['a', 'b'], '2024-06-01'), _batch(['x'], '2024-06-02')]), tmp_path)
+    export_results(_batch(['c'], '2024-06-01'), tmp_path, mode='replace')
+    stored = load_results(tmp_path, ['Job Title'])
+    assert sorted(stored['Job Title']) == ['c', 'x']
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        export_results(_batch(['a'], '2024-06-01'), tmp_path, mode='merge')
@@ -0,0 +1,45 @@
+import tempfile
+
+import numpy as np
+
+from fraud_duplicates import DUPLICATE_COLUMNS
+from fraud_pipeline import FraudPipeline
+from fraud_streaming import RowDeduplicator, StreamingFraudPipeline, iter_chunks
+
+
+def test_deduplicator_matches_drop_duplicates(applications, tmp_path):
+    path = tmp_path / "applications.csv"
+    applications.to_csv(path, index=False)
+    dedup = RowDeduplicator(tmp_path, partitions=4)
+    dedup.scan(iter_chunks(path, 250))
+    dedup.resolve()
+    kept = np.concatenate([dedup.keep(start, 250) for start in range(0, len(applications), 250)])
+    np.testing.assert_array_equal(kept, ~applications.duplicated().to_numpy())
+    assert dedup.n_duplicates > 0
+
+
+def test_streaming_fit_deduplicates_and_clusters_like_a_batch_fit(applications, tmp_path, monkeypatch):
+    path = tmp_path / "applications.csv"
+    applications.to_csv(path, index=False)
+    spill = tmp_path / "spill"
+    spill.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(spill))
+
+    streaming = StreamingFraudPipeline(chunksize=400, sample_size=1000, duplicate_columns=DUPLICATE_COLUMNS)
+    streaming.fit_stream(path)
+    batch = FraudPipeline(duplicate_columns=DUPLICATE_COLUMNS).fit(applications)
+
+    assert streaming.n_training_rows_ == batch.n_training_rows_ < len(applications)
+    assert streaming.title_counts_ == batch.title_counts_
+    assert streaming.location_counts_ == batch.location_counts_
+
+    streamed, expected = streaming.duplicates_, batch.duplicates_
+    assert streamed.n_records_ == expected.n_records_
+    assert streamed.n_clusters_ == expected.n_clusters_ > 0
+    for (keys, components), (expected_keys, expected_components) in zip(streamed.tables_, expected.tables_):
+        np.testing.assert_array_equal(keys, expected_keys)
+        np.testing.assert_array_equal(streamed.component_ids_[components], expected.component_ids_[expected_components])
+        np.testing.assert_array_equal(streamed.component_sizes_[components],
+                                      expected.component_sizes_[expected_components])
+    # The row-hash spill files are removed after the fit
+    assert list(spill.iterdir()) == []
@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from fraud_velocity import MAX_CLOCK_SKEW, VelocityStore
+
+
+def arrivals(stamps, title='Data Entry Clerk'):
+    return pd.DataFrame({'Job Title': title, 'submission_date': stamps})
+
+
+def test_far_future_date_does_not_stop_windows_expiring():
+    store = VelocityStore(['Job Title'])
+    store.record(arrivals(['2099-01-01 00:00:00'], title='Spam'))
+    assert store.latest <= time.time() + MAX_CLOCK_SKEW
+
+    start = pd.Timestamp.now(tz='UTC').floor('min') - pd.Timedelta(hours=30)
+    stamps = [str((start + pd.Timedelta(hours=3 * i)).tz_localize(None)) for i in range(10)]
+    features = pd.concat([store.record(arrivals([stamp])) for stamp in stamps])
+    assert features['title_velocity_1h'].tolist() == [1] * 10
+    assert features['title_velocity_7d'].tolist() == list(range(1, 11))
+
+
+def test_stale_arrivals_count_only_themselves():
+    store = VelocityStore(['Job Title'])
+    store.record(arrivals(['2024-06-10 12:00:00', '2024-06-10 12:10:00']))
+    stale = store.record(arrivals(['2024-06-01 12:00:00'] * 3))
+    assert stale['title_velocity_1h'].tolist() == [1, 1, 1]
+    assert store.velocity('Job Title', 'Data Entry Clerk', '1h') == 2
+    # The 1h count still expires an hour after the last live arrival
+    later = store.record(arrivals(['2024-06-10 13:30:00']))
+    assert later['title_velocity_1h'].tolist() == [1]
+
+
+def test_undated_arrivals_take_the_latest_time():
+    store = VelocityStore(['Job Title'])
+    store.record(arrivals(['2024-06-10 12:00:00']))
+    features = store.record(arrivals([None, 'not a date']))
+    assert features['title_velocity_1h'].tolist() == [2, 3]
+
+
+def test_peek_matches_record_without_recording():
+    rng = np.random.default_rng(0)
+    base = pd.Timestamp('2024-06-01').value // 10**9
+    store = VelocityStore(['Job Title', 'Job Location'], buckets=12)
+    for step in range(100):
+        n = int(rng.integers(1, 30))
+        # Mostly in order, now and then far behind the ring
+        offsets = rng.integers(-20 * 86400 if step % 7 == 0 else -3000, 9000, n)
+        batch = pd.DataFrame({'Job Title': rng.choice(list('abc'), n), 'Job Location': rng.choice(list('xy'), n),
+                              'submission_date': pd.to_datetime(base + step * 4000 + offsets, unit='s').astype(str)})
+        recorded = store.n_recorded
+        peeked = store.peek(batch)
+        assert store.n_recorded == recorded
+        pd.testing.assert_frame_equal(peeked, store.record(batch))